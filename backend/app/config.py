@@ -1,14 +1,51 @@
+from pathlib import Path
+
 from pydantic_settings import BaseSettings
 
+# Relative paths in settings (data_dir, sessions_dir, ...) resolve against the backend directory.
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
 
 class Settings(BaseSettings):
     openrouter_api_key: str = ""
     openrouter_model: str = "anthropic/claude-sonnet-4-20250514"
+    ai_max_connections: int = 20
+    ai_max_keepalive_connections: int = 10
+    ai_keepalive_expiry: float = 60.0  # seconds an idle connection to the LLM gateway is kept open
+    interview_context_tokens: int = 6000  # prompt budget per interview turn; older turns are summarized
+    interview_recent_messages: int = 6  # latest interview messages always sent verbatim
+    interview_summary_tokens: int = 300
     cors_origins: list[str] = ["http://localhost:5573"]
     sandbox_timeout: int = 10
+    sandbox_test_timeout: float = 3.0
     sandbox_max_memory_mb: int = 256
+    sandbox_python: str = "python3"
+    sandbox_pool_size: int = 4
+    sandbox_pool_queue_depth: int = 32
+    sandbox_pool_max_idle_seconds: int = 300
+    sandbox_shard_submit: bool = False
+    sandbox_max_shards: int = 8
+    sandbox_cache_max_mb: int = 64
+    sandbox_cache_dir: str = ""
+    sandbox_cache_disk_max_mb: int = 512
+    sandbox_preload_modules: list[str] = ["json", "typing", "dataclasses", "collections", "pydantic.main"]
+    execution_max_concurrency: int = 4
+    execution_queue_size: int = 64
+    execution_job_ttl_seconds: int = 300
     data_dir: str = "data/problems"
+    problem_cache_size: int = 256
+    problem_bundle: str = "build/problems.bundle"  # built by scripts/build_problem_bundle.py; "" disables
+    problem_reload_interval: float = 2.0  # seconds between data-dir mtime scans; 0 disables
     sessions_dir: str = "sessions"
+    session_store: str = "sqlite"  # "sqlite" (sessions_dir/sessions.db) | "json" (one file per session)
+    session_flush_interval: float = 2.0  # max seconds an autosave stays in memory only; 0 writes through
+    session_cache_size: int = 512
+    session_archive_after_days: float = 30.0  # submitted/scored sessions older than this move to the archive
+    session_abandon_after_days: float = 90.0  # in-progress sessions with no code edit for this long are archived
+    session_empty_ttl_hours: float = 24.0  # untouched in-progress sessions older than this are deleted
+    session_compact_interval: float = 3600.0  # seconds between compaction runs; 0 disables
+    solution_cache_dir: str = "solutions"  # LLM-generated reference solutions; "" keeps them in memory only
+    solution_cache_size: int = 256
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8", "extra": "ignore"}
 
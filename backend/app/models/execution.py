@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class ExecutionJob(BaseModel):
+    job_id: str
+    kind: str  # "run" | "submit"
+    status: str  # "queued" | "running" | "done" | "failed"
+    position: int = 0  # 1-based place in the queue while queued, 0 otherwise
+    result: dict | None = None
+    error: str | None = None
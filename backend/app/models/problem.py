@@ -1,4 +1,8 @@
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+ComplexityClass = Literal["O(1)", "O(log n)", "O(n)", "O(n log n)", "O(n^2)", "O(n^3)"]
 
 
 class TestCase(BaseModel):
@@ -7,6 +11,16 @@ class TestCase(BaseModel):
     is_hidden: bool = False
 
 
+class ComplexityCheck(BaseModel):
+    """Performance check: time ``function`` on ``generate(n)`` inputs for each ``n`` in ``sizes``."""
+
+    function: str
+    generator: str  # Python source defining ``generate(n)`` -> tuple of positional args
+    sizes: list[int]
+    target: ComplexityClass
+    repeats: int = 5
+
+
 class Problem(BaseModel):
     id: str
     title: str
@@ -19,6 +33,9 @@ class Problem(BaseModel):
     test_cases: list[TestCase]
     time_limit_minutes: int = 30
     tags: list[str] = []
+    complexity: ComplexityCheck | None = None
+    virtual_clock: bool = False  # run tests against a simulated ``time`` clock (instant sleeps)
+    solution: str | None = Field(default=None, exclude=True)  # reference solution; never sent with the problem
 
 
 class ProblemSummary(BaseModel):
@@ -28,3 +45,21 @@ class ProblemSummary(BaseModel):
     difficulty: str
     tags: list[str] = []
     time_limit_minutes: int = 30
+
+
+class ProblemSearchPage(BaseModel):
+    items: list[ProblemSummary]
+    total: int  # matches across all pages
+    next_cursor: str | None = None
+
+
+class ReloadReport(BaseModel):
+    """What an incremental problem reload picked up (by problem id)."""
+
+    added: list[str] = []
+    changed: list[str] = []
+    removed: list[str] = []
+    index_reloaded: bool = False
+    problems: int = 0
+    version: int = 0
+    duration_ms: float = 0.0
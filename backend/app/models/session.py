@@ -14,22 +14,103 @@ class SubmissionResult(BaseModel):
     expected: str
     actual: str
     error: str | None = None
+    wall_time_ms: float | None = None
+    cpu_time_ms: float | None = None
+    peak_rss_kb: int | None = None
+
+
+class ComplexityTiming(BaseModel):
+    n: int
+    seconds: float | None = None  # best per-call time at this size
+    error: str | None = None
+
+
+class ComplexityReport(BaseModel):
+    target: str
+    estimated: str | None = None
+    verdict: str  # "pass" | "borderline" | "fail" | "inconclusive"
+    timings: list[ComplexityTiming] = []
+    error: str | None = None
 
 
 class Session(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     problem_id: str
+    version: int = 0  # bumped by every save; saves compare-and-swap on it
     code: str = ""
+    code_revision: int = 0  # bumped by every code change; PATCH deltas must name the revision they apply to
     started_at: str = Field(default_factory=lambda: datetime.now().isoformat())
     submitted_at: str | None = None
     time_remaining_seconds: int | None = None
     test_results: list[SubmissionResult] = []
+    complexity: ComplexityReport | None = None
     interview_messages: list[dict] = []
+    interview_summary: str = ""  # rolling summary of the first ``interview_summary_messages`` messages
+    interview_summary_messages: int = 0
     score: dict | None = None
     status: str = "in_progress"  # "in_progress" | "submitted" | "scored"
 
 
+class SessionSummary(BaseModel):
+    """What the session list shows; stores keep these in an index so listing never loads sessions."""
+
+    id: str
+    problem_id: str
+    status: str
+    started_at: str
+    score: float | None = None  # the overall score once the session is scored
+
+
+class SessionSummaryPage(BaseModel):
+    items: list[SessionSummary]  # newest first
+    next_cursor: str | None = None
+
+
+class CompactionReport(BaseModel):
+    """What a session compaction run did."""
+
+    archived: int = 0
+    deleted: int = 0  # empty in-progress sessions past their TTL
+    skipped: bool = False  # another worker was compacting
+    duration_ms: float = 0.0
+
+
 class SessionUpdate(BaseModel):
     code: str | None = None
     time_remaining_seconds: int | None = None
     status: str | None = None
+
+
+class CodeDelta(BaseModel):
+    """Replace ``delete`` characters at ``offset`` with ``insert``.
+
+    Offsets and lengths count UTF-16 code units, like browser editors do.
+    """
+
+    offset: int = Field(ge=0)
+    delete: int = Field(default=0, ge=0)
+    insert: str = ""
+
+
+class CodePatch(BaseModel):
+    base_revision: int
+    deltas: list[CodeDelta]  # applied in order, each to the result of the previous one
+    time_remaining_seconds: int | None = None
+
+
+class CodePatchResult(BaseModel):
+    revision: int
+
+
+class CodeEdit(BaseModel):
+    """One entry of a session's append-only code edit log."""
+
+    revision: int
+    deltas: list[CodeDelta] = []
+    snapshot: str | None = None  # the full code after this edit, stored periodically and on full rewrites
+    at: str = Field(default_factory=lambda: datetime.now().isoformat())
+
+
+class CodeVersion(BaseModel):
+    revision: int
+    code: str
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+
+from app.models.problem import ReloadReport
+from app.models.session import CompactionReport
+from app.services.problem_service import refresh_problems
+from app.services.session_archive import compact_sessions
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.post("/problems/reload", response_model=ReloadReport)
+def reload_problems_endpoint():
+    """Reload problem files edited, added or removed since the last check; reports ids and timing."""
+    return refresh_problems()
+
+
+@router.post("/sessions/compact", response_model=CompactionReport)
+def compact_sessions_endpoint():
+    """Run session archival and TTL eviction now instead of waiting for the background job."""
+    return compact_sessions()
@@ -1,8 +1,16 @@
-from fastapi import APIRouter
+import json
+import logging
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+
+from fastapi import APIRouter, Request
 from pydantic import BaseModel
 
-from app.services.ai_service import chat_completion
+from app.services.ai_service import AI_SERVICE_ERRORS, chat_completion, chat_completion_stream
 from app.services.problem_service import get_problem
+from app.services.streaming import sse_response
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/code-chat", tags=["code-chat"])
 
@@ -37,8 +45,7 @@ class CodeChatResponse(BaseModel):
     reply: str
 
 
-@router.post("", response_model=CodeChatResponse)
-async def ask_code_question(req: CodeChatRequest):
+def _build_messages(req: CodeChatRequest) -> list[dict]:
     problem = get_problem(req.problem_id)
     title = problem.title if problem else "Unknown Problem"
     description = problem.description if problem else ""
@@ -58,10 +65,35 @@ async def ask_code_question(req: CodeChatRequest):
         selection_context=selection_context,
     )
 
-    messages = [
+    return [
         {"role": "system", "content": system_msg},
         {"role": "user", "content": req.message},
     ]
 
-    reply = await chat_completion(messages, temperature=0.5)
+
+@router.post("", response_model=CodeChatResponse)
+async def ask_code_question(req: CodeChatRequest):
+    reply = await chat_completion(_build_messages(req), temperature=0.5)
     return CodeChatResponse(reply=reply)
+
+
+@router.post("/stream")
+async def stream_code_question(req: CodeChatRequest, request: Request):
+    """SSE variant that streams the answer; the upstream call is cancelled if the client goes away."""
+    messages = _build_messages(req)
+
+    async def generate() -> AsyncIterator[str]:
+        try:
+            stream = chat_completion_stream(messages, temperature=0.5, max_tokens=1024, timeout=60.0)
+            async with aclosing(stream) as chunks:  # closing it closes the upstream connection
+                async for chunk in chunks:
+                    yield f"data: {json.dumps({'chunk': chunk})}\n\n"
+        except AI_SERVICE_ERRORS as e:
+            logger.warning("Code chat stream failed for %s: %s", req.problem_id, e)
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+        except Exception:
+            logger.exception("Code chat stream crashed for %s", req.problem_id)
+            yield f"data: {json.dumps({'error': 'Internal error — please try again'})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return sse_response(request, generate())
@@ -1,26 +1,169 @@
+import json
+from collections.abc import AsyncIterator
+from typing import Literal
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.services.executor import execute_run, execute_submit, ExecutionError
+from app.models.execution import ExecutionJob
+from app.models.session import SubmissionResult
+from app.sandbox.cache import get_result_cache
+from app.sandbox.pool import SandboxBusyError, get_pool
+from app.services.execution_queue import QueueFullError, get_scheduler
+from app.services.executor import (
+    check_executable,
+    execute_profile,
+    execute_run,
+    execute_submit,
+    stream_run,
+    stream_submit,
+    ExecutionError,
+    SessionArchivedError,
+)
 
 router = APIRouter(prefix="/api/execute", tags=["execution"])
 
 
 class ExecuteRequest(BaseModel):
     session_id: str
+    use_cache: bool = True  # set False for code whose output depends on time/randomness
+    sharded: bool | None = None  # submit only; None falls back to settings.sandbox_shard_submit
+
+
+class JobRequest(ExecuteRequest):
+    mode: Literal["run", "submit"] = "run"
+
+
+def _not_executable(e: ExecutionError) -> HTTPException:
+    return HTTPException(status_code=409 if isinstance(e, SessionArchivedError) else 404, detail=str(e))
+
+
+def _queue_full(e: QueueFullError) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 
 
 @router.post("/run")
-def run_code_endpoint(req: ExecuteRequest):
+async def run_code_endpoint(req: ExecuteRequest):
     try:
-        return execute_run(req.session_id)
+        return await get_scheduler().run("run", execute_run, req.session_id, use_cache=req.use_cache)
     except ExecutionError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+        raise _not_executable(e)
+    except QueueFullError as e:
+        raise _queue_full(e)
+    except SandboxBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
 
 @router.post("/submit")
-def submit_code_endpoint(req: ExecuteRequest):
+async def submit_code_endpoint(req: ExecuteRequest):
+    try:
+        return await get_scheduler().run(
+            "submit", execute_submit, req.session_id, use_cache=req.use_cache, sharded=req.sharded
+        )
+    except ExecutionError as e:
+        raise _not_executable(e)
+    except QueueFullError as e:
+        raise _queue_full(e)
+    except SandboxBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+@router.post("/profile")
+async def profile_code_endpoint(req: ExecuteRequest):
+    """Performance check: time the solution over growing inputs and estimate its complexity class."""
+    try:
+        return await get_scheduler().run("profile", execute_profile, req.session_id)
+    except ExecutionError as e:
+        raise _not_executable(e)
+    except QueueFullError as e:
+        raise _queue_full(e)
+    except SandboxBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+@router.post("/jobs", response_model=ExecutionJob, status_code=202)
+def create_job(req: JobRequest):
+    """Queue a run/submit and return immediately; poll ``GET /jobs/{job_id}`` for the outcome."""
+    try:
+        check_executable(req.session_id)
+    except ExecutionError as e:
+        raise _not_executable(e)
+
+    scheduler = get_scheduler()
     try:
-        return execute_submit(req.session_id)
+        if req.mode == "submit":
+            return scheduler.submit(
+                "submit", execute_submit, req.session_id, use_cache=req.use_cache, sharded=req.sharded
+            )
+        return scheduler.submit("run", execute_run, req.session_id, use_cache=req.use_cache)
+    except QueueFullError as e:
+        raise _queue_full(e)
+
+
+@router.get("/jobs/{job_id}", response_model=ExecutionJob)
+def get_job(job_id: str):
+    job = get_scheduler().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+async def _sse_results(results: AsyncIterator[SubmissionResult]) -> AsyncIterator[str]:
+    """Emit one SSE event per finished test, then a summary event and ``[DONE]``."""
+    all_passed = True
+    try:
+        async for result in results:
+            all_passed = all_passed and result.passed
+            yield f"data: {json.dumps({'result': result.model_dump()})}\n\n"
+        yield f"data: {json.dumps({'all_passed': all_passed, 'error': None})}\n\n"
+    except (ExecutionError, SandboxBusyError) as e:
+        yield f"data: {json.dumps({'error': str(e)})}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+def _stream_response(results: AsyncIterator[SubmissionResult]) -> StreamingResponse:
+    return StreamingResponse(
+        _sse_results(results),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/run/stream")
+async def stream_run_endpoint(req: ExecuteRequest):
+    """SSE variant of ``/run`` that emits each test result as soon as it completes."""
+    try:
+        check_executable(req.session_id)
+        return _stream_response(get_scheduler().stream("run", stream_run, req.session_id, use_cache=req.use_cache))
+    except ExecutionError as e:
+        raise _not_executable(e)
+    except QueueFullError as e:
+        raise _queue_full(e)
+
+
+@router.post("/submit/stream")
+async def stream_submit_endpoint(req: ExecuteRequest):
+    """SSE variant of ``/submit``; results are saved to the session once the stream completes."""
+    try:
+        check_executable(req.session_id)
+        results = get_scheduler().stream(
+            "submit", stream_submit, req.session_id, use_cache=req.use_cache, sharded=req.sharded
+        )
+        return _stream_response(results)
     except ExecutionError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+        raise _not_executable(e)
+    except QueueFullError as e:
+        raise _queue_full(e)
+
+
+@router.get("/stats")
+def execution_stats():
+    """Scheduler queue depth, sandbox pool occupancy and result-cache hit/miss counters."""
+    pool = get_pool()
+    cache = get_result_cache()
+    return {
+        "scheduler": get_scheduler().stats(),
+        "pool": pool.stats() if pool else None,
+        "cache": cache.stats() if cache else None,
+    }
@@ -1,13 +1,25 @@
-from fastapi import APIRouter, HTTPException
+import json
+import logging
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+
+from fastapi import APIRouter, HTTPException, Request
 
 from app.models.chat import (
     InterviewStartRequest,
     InterviewChatRequest,
     InterviewResponse,
 )
-from app.services.session_service import get_session, _save_session
+from app.models.session import Session
+from app.services.session_service import get_session, modify_session
+from app.services.session_store import SessionConflictError
 from app.services.problem_service import get_problem
-from app.services.ai_service import chat_completion
+from app.services.ai_service import AI_SERVICE_ERRORS, chat_completion, chat_completion_stream
+from app.services.interview_context import build_context, schedule_summary_refresh
+from app.services.streaming import sse_response
+from app.sandbox.complexity import summarize_report
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/interview", tags=["interview"])
 
@@ -23,9 +35,10 @@ Their submitted code:
 ```
 
 Test results: {test_summary}
+Performance check: {complexity_summary}
 
 Your role:
-1. Ask about their approach, time/space complexity, and trade-offs
+1. Ask about their approach, time/space complexity, and trade-offs (if the performance check measured a complexity, probe any mismatch with what they claim)
 2. Ask follow-up questions about edge cases they may have missed
 3. Ask 1-2 questions relating to real-world applications of this concept
 4. Be professional but conversational — this should feel like a real technical interview
@@ -36,6 +49,48 @@ Guidelines:
 - After 5-6 exchanges, wrap up naturally by saying you have no more questions
 - When wrapping up, end your message with exactly: [INTERVIEW_COMPLETE]"""
 
+COMPLETE_SENTINEL = "[INTERVIEW_COMPLETE]"
+READY_MESSAGE = "I'm ready for the interview. Please begin."
+
+
+class SentinelFilter:
+    """Strip ``COMPLETE_SENTINEL`` from a reply streamed in arbitrary chunks.
+
+    Text that might be the start of a sentinel split across chunks, and trailing
+    whitespace, is held back until the next chunk decides it, so the pieces
+    ``feed`` and ``finish`` return add up to ``reply.replace(sentinel, "").strip()``.
+    """
+
+    def __init__(self) -> None:
+        self.is_complete = False
+        self._held = ""
+        self._started = False
+
+    def feed(self, chunk: str) -> str:
+        text = self._held + chunk
+        if COMPLETE_SENTINEL in text:
+            self.is_complete = True
+            text = text.replace(COMPLETE_SENTINEL, "")
+        partial = next(
+            (
+                n
+                for n in range(min(len(COMPLETE_SENTINEL) - 1, len(text)), 0, -1)
+                if text.endswith(COMPLETE_SENTINEL[:n])
+            ),
+            0,
+        )
+        ready = text[: len(text) - partial].rstrip()
+        self._held = text[len(ready) :]
+        if not self._started:
+            ready = ready.lstrip()
+            self._started = bool(ready)
+        return ready
+
+    def finish(self) -> str:
+        """The held-back text once the reply has ended: an unfinished sentinel is kept, whitespace dropped."""
+        rest, self._held = self._held.rstrip(), ""
+        return rest if self._started else rest.lstrip()
+
 
 def _build_interview_context(session_id: str) -> tuple[list[dict], str]:
     session = get_session(session_id)
@@ -55,36 +110,52 @@ def _build_interview_context(session_id: str) -> tuple[list[dict], str]:
         problem_description=problem.description,
         code=session.code,
         test_summary=test_summary,
+        complexity_summary=summarize_report(session.complexity),
     )
 
-    messages = [{"role": "system", "content": system_msg}]
-    for msg in session.interview_messages:
-        messages.append({"role": msg["role"], "content": msg["content"]})
+    return build_context(system_msg, session), session_id
+
+
+def _append_messages(session_id: str, *new_messages: dict) -> None:
+    """Add an exchange to the latest transcript, so saves made while the AI was replying are kept."""
+
+    def change(session: Session) -> None:
+        session.interview_messages.extend(new_messages)
+
+    if not modify_session(session_id, change):
+        raise HTTPException(status_code=404, detail="Session not found")
+    schedule_summary_refresh(session_id)
 
-    return messages, session_id
+
+def _clear_interview(session_id: str) -> None:
+    """Restarting replaces the previous interview."""
+
+    def clear(session: Session) -> None:
+        session.interview_messages = []
+        session.interview_summary = ""
+        session.interview_summary_messages = 0
+
+    if not modify_session(session_id, clear):
+        raise HTTPException(status_code=404, detail="Session not found")
 
 
 @router.post("/start", response_model=InterviewResponse)
 async def start_interview(req: InterviewStartRequest):
     messages, session_id = _build_interview_context(req.session_id)
 
-    session = get_session(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    # Clear previous interview if restarting
-    session.interview_messages = []
-    _save_session(session)
+    _clear_interview(session_id)
 
-    messages_for_ai = messages + [{"role": "user", "content": "I'm ready for the interview. Please begin."}]
+    messages_for_ai = messages + [{"role": "user", "content": READY_MESSAGE}]
 
     reply = await chat_completion(messages_for_ai)
-    is_complete = "[INTERVIEW_COMPLETE]" in reply
-    clean_reply = reply.replace("[INTERVIEW_COMPLETE]", "").strip()
+    is_complete = COMPLETE_SENTINEL in reply
+    clean_reply = reply.replace(COMPLETE_SENTINEL, "").strip()
 
-    session.interview_messages.append({"role": "user", "content": "I'm ready for the interview. Please begin."})
-    session.interview_messages.append({"role": "assistant", "content": clean_reply})
-    _save_session(session)
+    _append_messages(
+        session_id,
+        {"role": "user", "content": READY_MESSAGE},
+        {"role": "assistant", "content": clean_reply},
+    )
 
     return InterviewResponse(message=clean_reply, is_complete=is_complete)
 
@@ -93,18 +164,67 @@ async def start_interview(req: InterviewStartRequest):
 async def chat(req: InterviewChatRequest):
     messages, session_id = _build_interview_context(req.session_id)
 
-    session = get_session(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    session.interview_messages.append({"role": "user", "content": req.message})
     messages.append({"role": "user", "content": req.message})
 
     reply = await chat_completion(messages)
-    is_complete = "[INTERVIEW_COMPLETE]" in reply
-    clean_reply = reply.replace("[INTERVIEW_COMPLETE]", "").strip()
+    is_complete = COMPLETE_SENTINEL in reply
+    clean_reply = reply.replace(COMPLETE_SENTINEL, "").strip()
 
-    session.interview_messages.append({"role": "assistant", "content": clean_reply})
-    _save_session(session)
+    _append_messages(
+        session_id,
+        {"role": "user", "content": req.message},
+        {"role": "assistant", "content": clean_reply},
+    )
 
     return InterviewResponse(message=clean_reply, is_complete=is_complete)
+
+
+async def _stream_reply(session_id: str, messages: list[dict], user_message: dict) -> AsyncIterator[str]:
+    """Forward the interviewer's reply as SSE ``chunk`` events, then a summary event and ``[DONE]``.
+
+    The exchange is saved to the session once the reply is complete; a reply cut
+    short by an error is not saved.
+    """
+    sentinel = SentinelFilter()
+    parts = []
+    try:
+        async with aclosing(chat_completion_stream(messages, max_tokens=1024, timeout=60.0)) as chunks:
+            async for chunk in chunks:
+                text = sentinel.feed(chunk)
+                if text:
+                    parts.append(text)
+                    yield f"data: {json.dumps({'chunk': text})}\n\n"
+        text = sentinel.finish()
+        if text:
+            parts.append(text)
+            yield f"data: {json.dumps({'chunk': text})}\n\n"
+        _append_messages(session_id, user_message, {"role": "assistant", "content": "".join(parts)})
+        yield f"data: {json.dumps({'is_complete': sentinel.is_complete, 'error': None})}\n\n"
+    except HTTPException as e:  # the session was deleted while the AI was replying
+        yield f"data: {json.dumps({'error': e.detail})}\n\n"
+    except (*AI_SERVICE_ERRORS, SessionConflictError) as e:
+        logger.warning("Interview stream failed for %s: %s", session_id, e)
+        yield f"data: {json.dumps({'error': str(e)})}\n\n"
+    except Exception:
+        logger.exception("Interview stream crashed for %s", session_id)
+        yield f"data: {json.dumps({'error': 'Internal error — please try again'})}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@router.post("/start/stream")
+async def stream_start_interview(req: InterviewStartRequest, request: Request):
+    """SSE variant of ``/start`` that forwards the interviewer's opening as it is generated."""
+    messages, session_id = _build_interview_context(req.session_id)
+
+    _clear_interview(session_id)
+
+    user_message = {"role": "user", "content": READY_MESSAGE}
+    return sse_response(request, _stream_reply(session_id, messages + [user_message], user_message))
+
+
+@router.post("/chat/stream")
+async def stream_chat(req: InterviewChatRequest, request: Request):
+    """SSE variant of ``/chat``; ``[INTERVIEW_COMPLETE]`` is reported in the summary event, never as text."""
+    messages, session_id = _build_interview_context(req.session_id)
+    user_message = {"role": "user", "content": req.message}
+    return sse_response(request, _stream_reply(session_id, messages + [user_message], user_message))
@@ -1,149 +1,116 @@
 import json
 import logging
+from contextlib import aclosing
+from typing import Annotated
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+import httpx
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 
-from app.models.problem import Problem, ProblemSummary
-from app.services.problem_service import list_problems, get_problem
-from app.services.ai_service import chat_completion, chat_completion_stream
+from app.models.problem import Problem, ProblemSearchPage, ProblemSummary
+from app.services import solution_service
+from app.services.ai_service import AI_SERVICE_ERRORS
+from app.services.problem_search import InvalidCursorError
+from app.services.problem_service import get_problem, get_problem_json, list_problems_json, search_problems
+from app.services.streaming import sse_response
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/problems", tags=["problems"])
 
-SOLUTION_PROMPT = """You are an expert Python programmer and educator.
-Generate a clean, well-commented solution for the following coding problem.
 
-**CRITICAL FORMAT RULES — follow exactly:**
-1. Start with a block of comments explaining:
-   - What the problem is asking (1-2 lines)
-   - The approach/algorithm you will use (2-4 lines)
-   - Time and space complexity (1-2 lines)
-   - Key steps of the solution (numbered list)
-2. Then write the actual code with inline comments on non-obvious lines.
-3. Output ONLY valid Python code (with comments). No markdown, no backticks, no explanation outside of comments.
-4. The function signature must match the starter code exactly.
-
-Problem: {title}
-{description}
-
-Constraints: {constraints}
+class SolutionResponse(BaseModel):
+    solution: str
 
-Starter code:
-{starter_code}
 
-Examples:
-{examples}"""
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
 
 
-class SolutionResponse(BaseModel):
-    solution: str
+def _json_response(request: Request, cached: tuple[str, bytes]) -> Response:
+    """Serve pre-serialized JSON with a strong ETag, or ``304`` if the client already has it."""
+    etag, body = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}  # cacheable, but revalidate: problems hot-reload
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get("", response_model=list[ProblemSummary])
-def get_problems(category: str | None = None, difficulty: str | None = None):
-    return list_problems(category=category, difficulty=difficulty)
+def get_problems(
+    request: Request,
+    category: str | None = None,
+    difficulty: str | None = None,
+    tag: Annotated[list[str] | None, Query()] = None,
+):
+    return _json_response(request, list_problems_json(category=category, difficulty=difficulty, tags=tag))
+
+
+@router.get("/search", response_model=ProblemSearchPage)
+def search_catalogue(
+    q: str = "",
+    category: str | None = None,
+    difficulty: str | None = None,
+    tag: Annotated[list[str] | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str | None = None,
+):
+    """Ranked search over titles, tags and descriptions; pass ``next_cursor`` back as ``cursor`` for the next page."""
+    try:
+        items, total, next_cursor = search_problems(q, category, difficulty, tag, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ProblemSearchPage(items=items, total=total, next_cursor=next_cursor)
 
 
 @router.get("/{problem_id}", response_model=Problem)
-def get_problem_detail(problem_id: str):
-    problem = get_problem(problem_id)
-    if not problem:
+def get_problem_detail(request: Request, problem_id: str):
+    cached = get_problem_json(problem_id)
+    if not cached:
         raise HTTPException(status_code=404, detail="Problem not found")
-    return problem
+    return _json_response(request, cached)
 
 
 @router.get("/{problem_id}/solution", response_model=SolutionResponse)
 async def get_solution(problem_id: str):
+    """The bundled reference solution, or one generated by the AI (cached per problem version)."""
     problem = get_problem(problem_id)
     if not problem:
         raise HTTPException(status_code=404, detail="Problem not found")
 
-    examples_text = "\n".join(
-        f"  Input: {ex.get('input', '')}  Output: {ex.get('output', '')}" for ex in problem.examples
-    )
-
-    prompt = SOLUTION_PROMPT.format(
-        title=problem.title,
-        description=problem.description,
-        constraints=", ".join(problem.constraints),
-        starter_code=problem.starter_code,
-        examples=examples_text,
-    )
-
-    messages = [
-        {"role": "system", "content": prompt},
-        {"role": "user", "content": "Generate the solution now."},
-    ]
-
     try:
-        solution = await chat_completion(
-            messages,
-            temperature=0.3,
-            max_tokens=4096,
-            timeout=120.0,
-        )
-    except Exception as e:
-        logger.error("Solution generation failed for %s: %s", problem_id, e)
+        solution = await solution_service.get_solution(problem)
+    except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="AI service timed out — please try again")
-
-    # Strip markdown code fences if the AI added them
-    solution = solution.strip()
-    if solution.startswith("```python"):
-        solution = solution[len("```python") :].strip()
-    if solution.startswith("```"):
-        solution = solution[3:].strip()
-    if solution.endswith("```"):
-        solution = solution[:-3].strip()
+    except AI_SERVICE_ERRORS as e:
+        logger.warning("Solution generation failed for %s: %s", problem_id, e)
+        raise HTTPException(status_code=502, detail="AI service unavailable — please try again")
 
     return SolutionResponse(solution=solution)
 
 
-def _build_solution_messages(problem: Problem) -> list[dict]:
-    """Build the prompt messages for solution generation (shared by both endpoints)."""
-    examples_text = "\n".join(
-        f"  Input: {ex.get('input', '')}  Output: {ex.get('output', '')}" for ex in problem.examples
-    )
-    prompt = SOLUTION_PROMPT.format(
-        title=problem.title,
-        description=problem.description,
-        constraints=", ".join(problem.constraints),
-        starter_code=problem.starter_code,
-        examples=examples_text,
-    )
-    return [
-        {"role": "system", "content": prompt},
-        {"role": "user", "content": "Generate the solution now."},
-    ]
-
-
 @router.get("/{problem_id}/solution/stream")
-async def stream_solution(problem_id: str):
-    """SSE endpoint that streams the solution as the LLM generates it."""
+async def stream_solution(request: Request, problem_id: str):
+    """SSE endpoint that streams the solution: replayed when bundled or cached, else as the LLM generates it."""
     problem = get_problem(problem_id)
     if not problem:
         raise HTTPException(status_code=404, detail="Problem not found")
 
-    messages = _build_solution_messages(problem)
-
     async def generate():
         try:
-            async for chunk in chat_completion_stream(
-                messages,
-                temperature=0.3,
-                max_tokens=4096,
-                timeout=120.0,
-            ):
-                yield f"data: {json.dumps({'chunk': chunk})}\n\n"
-        except Exception as e:
-            logger.error("Stream failed for %s: %s", problem_id, e)
+            async with aclosing(solution_service.stream_solution(problem)) as chunks:
+                async for chunk in chunks:
+                    yield f"data: {json.dumps({'chunk': chunk})}\n\n"
+        except AI_SERVICE_ERRORS as e:
+            logger.warning("Solution stream failed for %s: %s", problem_id, e)
             yield f"data: {json.dumps({'error': str(e)})}\n\n"
+        except Exception:
+            logger.exception("Solution stream crashed for %s", problem_id)
+            yield f"data: {json.dumps({'error': 'Internal error — please try again'})}\n\n"
         yield "data: [DONE]\n\n"
 
-    return StreamingResponse(
-        generate(),
-        media_type="text/event-stream",
-        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
-    )
+    return sse_response(request, generate())
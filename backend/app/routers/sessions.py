@@ -1,9 +1,25 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 
-from app.models.session import Session, SessionCreate, SessionUpdate
+from app.models.session import (
+    CodeEdit,
+    CodePatch,
+    CodePatchResult,
+    CodeVersion,
+    Session,
+    SessionCreate,
+    SessionSummaryPage,
+    SessionUpdate,
+)
+from app.services.problem_search import InvalidCursorError
+from app.services.session_store import SessionConflictError
 from app.services.session_service import (
+    CodeConflictError,
+    InvalidDeltaError,
     create_session,
+    get_code_at,
+    get_code_history,
     get_session,
+    patch_code,
     update_session,
     list_sessions,
 )
@@ -19,9 +35,18 @@ def create_new_session(req: SessionCreate):
         raise HTTPException(status_code=404, detail=str(e))
 
 
-@router.get("", response_model=list[Session])
-def get_all_sessions():
-    return list_sessions()
+@router.get("", response_model=SessionSummaryPage)
+def get_all_sessions(
+    status: str | None = None,
+    problem_id: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+):
+    """Session summaries, newest first; pass ``next_cursor`` back as ``cursor`` for the next page."""
+    try:
+        return list_sessions(status, problem_id, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{session_id}", response_model=Session)
@@ -34,7 +59,43 @@ def get_session_detail(session_id: str):
 
 @router.put("/{session_id}", response_model=Session)
 def update_existing_session(session_id: str, update: SessionUpdate):
-    session = update_session(session_id, update)
+    try:
+        session = update_session(session_id, update)
+    except SessionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     return session
+
+
+@router.patch("/{session_id}/code", response_model=CodePatchResult)
+def patch_session_code(session_id: str, patch: CodePatch):
+    """Autosave with editor deltas instead of the whole buffer; ``409`` means resend the full code via PUT."""
+    try:
+        result = patch_code(session_id, patch)
+    except CodeConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"X-Code-Revision": str(e.revision)})
+    except InvalidDeltaError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except SessionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not result:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return result
+
+
+@router.get("/{session_id}/code/history", response_model=list[CodeEdit])
+def get_session_code_history(session_id: str):
+    """The append-only edit log, for replaying how the code was written."""
+    history = get_code_history(session_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return history
+
+
+@router.get("/{session_id}/code", response_model=CodeVersion)
+def get_session_code(session_id: str, revision: int):
+    version = get_code_at(session_id, revision)
+    if not version:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return version
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.models.session import SubmissionResult
+from app.sandbox.wrapper_template import HARNESS_VERSION
+
+NONDETERMINISTIC_MODULES = ("time", "random", "datetime", "uuid", "secrets", "asyncio")
+
+_MODULES_PATTERN = "|".join(NONDETERMINISTIC_MODULES)
+_NONDETERMINISTIC_IMPORT = re.compile(
+    rf"(?:^|;)\s*(?:from\s+(?:{_MODULES_PATTERN})\b|import\s+(?:[\w.]+\s*,\s*)*(?:{_MODULES_PATTERN})\b)",
+    re.MULTILINE,
+)
+
+_results_adapter = TypeAdapter(list[SubmissionResult])
+
+
+def normalize_code(code: str) -> str:
+    """Drop differences that cannot change behaviour: line endings and trailing whitespace."""
+    lines = [line.rstrip() for line in code.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    return "\n".join(lines).strip("\n")
+
+
+def is_cacheable(user_code: str, test_cases: list[dict], virtual_clock: bool = False) -> bool:
+    """Code or tests that read clocks or randomness must always run for real.
+
+    Under the virtual clock ``time`` is deterministic, so importing it alone is fine.
+    """
+    sources = [user_code] + [tc["input"] for tc in test_cases]
+    for src in sources:
+        for match in _NONDETERMINISTIC_IMPORT.finditer(src):
+            if not (virtual_clock and _imported_modules(match.group(0)) <= {"time"}):
+                return False
+    return True
+
+
+def _imported_modules(statement: str) -> set[str]:
+    return {m for m in NONDETERMINISTIC_MODULES if re.search(rf"\b{m}\b", statement)}
+
+
+def cache_key(user_code: str, test_cases: list[dict], virtual_clock: bool = False) -> str:
+    payload = json.dumps(
+        {
+            "code": normalize_code(user_code),
+            "tests": [[tc["input"], tc["expected"]] for tc in test_cases],
+            "harness": HARNESS_VERSION,
+            "limits": [settings.sandbox_test_timeout, settings.sandbox_max_memory_mb, settings.sandbox_timeout],
+            "virtual_clock": virtual_clock,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """Two-tier (memory LRU + optional disk) cache of serialized test results, bounded by bytes."""
+
+    def __init__(self, max_bytes: int, disk_dir: str = "", disk_max_bytes: int = 0) -> None:
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes: int | None = None
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def get(self, key: str) -> list[SubmissionResult] | None:
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None:
+                self._entries.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return _results_adapter.validate_json(blob)
+
+        blob = self._read_disk(key)
+        with self._lock:
+            if blob is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._insert(key, blob)
+        return _results_adapter.validate_json(blob)
+
+    def put(self, key: str, results: list[SubmissionResult]) -> None:
+        blob = _results_adapter.dump_json(results)
+        with self._lock:
+            self._counters["stores"] += 1
+            self._insert(key, blob)
+        self._write_disk(key, blob)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "disk_bytes": self._disk_bytes or 0,
+            }
+
+    def _insert(self, key: str, blob: bytes) -> None:
+        if len(blob) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = blob
+        self._bytes += len(blob)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._counters["evictions"] += 1
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> bytes | None:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            blob = path.read_bytes()
+        except OSError:
+            return None
+        path.touch()  # mtime doubles as the disk tier's LRU clock
+        return blob
+
+    def _write_disk(self, key: str, blob: bytes) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        replaced = path.stat().st_size if path.exists() else 0
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(blob)
+        tmp.replace(path)
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(p.stat().st_size for p in self.disk_dir.glob("*/*.json"))
+            else:
+                self._disk_bytes += len(blob) - replaced
+            if self._disk_bytes <= self.disk_max_bytes:
+                return
+            files = sorted(self.disk_dir.glob("*/*.json"), key=lambda p: p.stat().st_mtime)
+            for old in files:
+                if self._disk_bytes <= self.disk_max_bytes * 0.9:
+                    break
+                size = old.stat().st_size
+                old.unlink(missing_ok=True)
+                self._disk_bytes -= size
+                self._counters["evictions"] += 1
+
+
+_cache: ResultCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache | None:
+    """Return the shared result cache, or ``None`` when caching is disabled."""
+    global _cache
+    if settings.sandbox_cache_max_mb <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(
+                max_bytes=settings.sandbox_cache_max_mb * 1024 * 1024,
+                disk_dir=settings.sandbox_cache_dir,
+                disk_max_bytes=settings.sandbox_cache_disk_max_mb * 1024 * 1024,
+            )
+        return _cache
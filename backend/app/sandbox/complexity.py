@@ -0,0 +1,113 @@
+import math
+from collections.abc import Callable
+from typing import get_args
+
+from app.models.problem import ComplexityClass
+from app.models.session import ComplexityReport, ComplexityTiming
+
+# Ordered from fastest- to slowest-growing; the order defines pass/fail against a target.
+COMPLEXITY_CLASSES: tuple[str, ...] = get_args(ComplexityClass)
+
+_GROWTH: dict[str, Callable[[float], float]] = {
+    "O(1)": lambda n: 1.0,
+    "O(log n)": lambda n: math.log2(n),
+    "O(n)": lambda n: n,
+    "O(n log n)": lambda n: n * math.log2(n),
+    "O(n^2)": lambda n: n**2,
+    "O(n^3)": lambda n: n**3,
+}
+
+MIN_POINTS = 3
+# How far the measured growth exponent may exceed the target class's before the
+# verdict drops to borderline, and then to fail. Classes a log factor apart are
+# ~0.1 apart over typical size ranges, within run-to-run noise, so the pass band
+# covers them: a linear solution must not flip between pass and borderline.
+PASS_SLOPE_MARGIN = 0.15
+BORDERLINE_SLOPE_MARGIN = 0.4
+
+
+def _median(values: list[float]) -> float:
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+def _fit_slope(sizes: list[int], seconds: list[float]) -> tuple[float, int, int] | None:
+    """``(slope, n_min, n_max)`` of a timing curve on log-log axes, or ``None`` with too few points.
+
+    The slope is the median over all pairs of sizes (Theil–Sen), which shrugs off
+    the odd noisy sample.
+    """
+    points = sorted({n: t for n, t in zip(sizes, seconds) if n >= 2}.items())
+    if len(points) < MIN_POINTS:
+        return None
+    logs = [(math.log(n), math.log(max(t, 1e-9))) for n, t in points]
+    slope = _median(
+        [(lt_j - lt_i) / (ln_j - ln_i) for i, (ln_i, lt_i) in enumerate(logs) for ln_j, lt_j in logs[i + 1 :]]
+    )
+    return slope, points[0][0], points[-1][0]
+
+
+def _expected_slope(label: str, n_min: int, n_max: int) -> float:
+    """The log-log slope of a complexity class over ``[n_min, n_max]``."""
+    growth = _GROWTH[label]
+    return (math.log(growth(n_max)) - math.log(growth(n_min))) / (math.log(n_max) - math.log(n_min))
+
+
+def fit_complexity(sizes: list[int], seconds: list[float]) -> str | None:
+    """Estimate the complexity class of a timing curve, or ``None`` with too few points.
+
+    The class whose own log-log slope over the same size range is closest to the
+    measured one (``_fit_slope``) wins.
+    """
+    fit = _fit_slope(sizes, seconds)
+    if fit is None:
+        return None
+    slope, n_min, n_max = fit
+    return min(COMPLEXITY_CLASSES, key=lambda label: abs(_expected_slope(label, n_min, n_max) - slope))
+
+
+def build_report(target: str, timings: list[ComplexityTiming], error: str | None = None) -> ComplexityReport:
+    """Fit the successful timings and grade them against ``target``.
+
+    Hitting the time limit at any declared size is a fail regardless of the fit:
+    a solution in the target class is expected to finish every size. Otherwise the
+    verdict depends on how far the measured growth exponent exceeds the target's
+    (``PASS_SLOPE_MARGIN``, ``BORDERLINE_SLOPE_MARGIN``); a pass reports the target
+    as the estimate when the nearest class is only a log factor slower.
+    """
+    measured = [t for t in timings if t.seconds is not None]
+    fit = _fit_slope([t.n for t in measured], [t.seconds for t in measured])
+    estimated = fit_complexity([t.n for t in measured], [t.seconds for t in measured])
+    timed_out = any(t.error and "time limit exceeded" in t.error.lower() for t in timings)
+    failed = next((t.error for t in timings if t.error), None)
+
+    if timed_out:
+        verdict = "fail"
+    elif failed or error or fit is None:
+        verdict = "inconclusive"
+    else:
+        slope, n_min, n_max = fit
+        excess = slope - _expected_slope(target, n_min, n_max)
+        if excess <= PASS_SLOPE_MARGIN:
+            verdict = "pass"
+            if COMPLEXITY_CLASSES.index(estimated) > COMPLEXITY_CLASSES.index(target):
+                estimated = target  # within timing noise of the target
+        elif excess <= BORDERLINE_SLOPE_MARGIN:
+            verdict = "borderline"
+        else:
+            verdict = "fail"
+    return ComplexityReport(target=target, estimated=estimated, verdict=verdict, timings=timings, error=error or failed)
+
+
+def summarize_report(report: ComplexityReport | None) -> str:
+    """One-line description of a performance check for AI prompts."""
+    if report is None:
+        return "Not measured"
+    if report.estimated is None:
+        reason = report.error or "not enough measurements"
+        return f"No estimate against a target of {report.target} — {report.verdict} ({reason})"
+    summary = f"Measured {report.estimated} against a target of {report.target} — {report.verdict}"
+    if report.error:
+        summary += f" ({report.error})"
+    return summary
@@ -12,6 +12,7 @@ BLOCKED_IMPORTS = [
     "ctypes",
     "importlib",
     "signal",
+    "resource",
     "threading",
     "multiprocessing",
 ]
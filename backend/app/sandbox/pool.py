@@ -0,0 +1,160 @@
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+
+from app.config import settings
+from app.sandbox.wrapper_template import WORKER_BOOTSTRAP
+
+
+class SandboxBusyError(Exception):
+    pass
+
+
+class SandboxWorker:
+    """A single-use sandbox process blocked on stdin until it is handed a script."""
+
+    def __init__(self) -> None:
+        self.pool: SandboxPool | None = None
+        self.workdir = tempfile.mkdtemp(prefix="sandbox-")
+        self.created_at = time.monotonic()
+        bootstrap = WORKER_BOOTSTRAP.format(
+            preload_modules=tuple(settings.sandbox_preload_modules),
+            cpu_seconds=settings.sandbox_timeout,
+            memory_bytes=settings.sandbox_max_memory_mb * 1024 * 1024,
+        )
+        self.proc = subprocess.Popen(
+            [settings.sandbox_python, "-c", bootstrap],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=self.workdir,
+        )
+
+    def is_alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def close(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        for stream in (self.proc.stdin, self.proc.stdout, self.proc.stderr):
+            if stream is not None:
+                stream.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class SandboxPool:
+    """Keeps ``size`` warm workers ready and bounds how many runs may wait for one.
+
+    Workers are never reused: each one runs exactly one submission and is replaced
+    by a freshly spawned worker, so no state leaks between candidates.
+    """
+
+    def __init__(self, size: int, queue_depth: int, max_idle_seconds: int) -> None:
+        self.size = size
+        self.queue_depth = queue_depth
+        self.max_idle_seconds = max_idle_seconds
+        self._idle: deque[SandboxWorker] = deque()
+        self._busy = 0
+        self._waiting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def start(self) -> None:
+        with self._cond:
+            while len(self._idle) + self._busy < self.size:
+                self._idle.append(SandboxWorker())
+
+    def acquire(self, timeout: float) -> SandboxWorker:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if not self._idle and self._waiting >= self.queue_depth:
+                raise SandboxBusyError("Sandbox queue is full — please try again shortly")
+            self._waiting += 1
+            try:
+                while not self._idle and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        raise SandboxBusyError("Timed out waiting for a free sandbox")
+                if self._closed:
+                    raise SandboxBusyError("Sandbox pool is shut down")
+                worker = self._idle.popleft()
+                self._busy += 1
+            finally:
+                self._waiting -= 1
+
+        # Recycle policy: workers that died or sat idle too long are swapped for fresh ones.
+        if not worker.is_alive() or time.monotonic() - worker.created_at > self.max_idle_seconds:
+            worker.close()
+            worker = SandboxWorker()
+        worker.pool = self
+        return worker
+
+    def release(self, worker: SandboxWorker) -> None:
+        worker.close()
+        replacement = None if self._closed else SandboxWorker()
+        with self._cond:
+            self._busy -= 1
+            if replacement is not None and not self._closed:
+                self._idle.append(replacement)
+                replacement = None
+            self._cond.notify()
+        if replacement is not None:
+            replacement.close()
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._cond.notify_all()
+        for worker in idle:
+            worker.close()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"size": self.size, "idle": len(self._idle), "busy": self._busy, "waiting": self._waiting}
+
+
+_pool: SandboxPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> SandboxPool | None:
+    """Return the shared pool, starting it on first use. ``None`` when pooling is disabled."""
+    global _pool
+    if settings.sandbox_pool_size <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxPool(
+                size=settings.sandbox_pool_size,
+                queue_depth=settings.sandbox_pool_queue_depth,
+                max_idle_seconds=settings.sandbox_pool_max_idle_seconds,
+            )
+            _pool.start()
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def acquire_worker() -> SandboxWorker:
+    pool = get_pool()
+    if pool is None:
+        return SandboxWorker()
+    return pool.acquire(timeout=settings.sandbox_timeout)
+
+
+def release_worker(worker: SandboxWorker) -> None:
+    if worker.pool is None:
+        worker.close()
+    else:
+        worker.pool.release(worker)
@@ -0,0 +1,65 @@
+import ast
+import marshal
+import sys
+from functools import lru_cache
+
+from app.sandbox.wrapper_template import COMPILE_INPUT_SOURCE
+
+# Marshal format the sandbox can read even when it runs an older interpreter than the API.
+PAYLOAD_MARSHAL_VERSION = 4
+
+
+_compile_namespace: dict = {}
+exec(COMPILE_INPUT_SOURCE, _compile_namespace)  # noqa: S102 - our own source, shared with the sandbox
+
+
+def compile_input(source: str):
+    """Compile a test input as a module whose last expression (if any) is the test's value."""
+    return _compile_namespace["_compile_input"](source)
+
+
+@lru_cache(maxsize=4096)
+def compile_test(input_source: str, expected_source: str) -> bytes:
+    """Marshalled ``(code, error, expected, expected_code, expected_text)`` for one test case.
+
+    Literal expected values are evaluated here, once, and shipped as values together
+    with their ``str()``; anything else is compiled and evaluated in the sandbox.
+    """
+    code, error = None, None
+    try:
+        code = compile_input(input_source)
+    except SyntaxError as e:
+        error = str(e)
+
+    expected, expected_code, expected_text = None, None, None
+    try:
+        expected = ast.literal_eval(expected_source)
+        expected_text = str(expected)
+        marshal.dumps(expected)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        expected = None
+        expected_text = None
+        try:
+            expected_code = compile(expected_source, "<expected>", "eval")
+        except SyntaxError:
+            pass  # surfaces as the same SyntaxError when the sandbox evaluates the source
+
+    return marshal.dumps((code, error, expected, expected_code, expected_text))
+
+
+def build_test_bundle(test_cases: list[dict]) -> tuple:
+    """What the harness loads instead of parsing tests: ``(cache_tag, compiled, sources)``.
+
+    Bytecode is only valid for the interpreter that produced it, so the sandbox uses
+    ``compiled`` when its ``cache_tag`` matches and recompiles ``sources`` otherwise.
+    """
+    return (
+        sys.implementation.cache_tag,
+        tuple(compile_test(tc["input"], tc["expected"]) for tc in test_cases),
+        tuple((tc["input"], tc["expected"]) for tc in test_cases),
+    )
+
+
+def encode_payload(script: str, test_bundle: tuple | None = None) -> bytes:
+    """Serialize a worker's stdin payload: the script to exec plus its precompiled tests."""
+    return marshal.dumps((script, test_bundle), PAYLOAD_MARSHAL_VERSION)
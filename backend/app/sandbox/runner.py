@@ -1,18 +1,36 @@
 import json
+import os
+import queue
+import selectors
+import signal
 import subprocess
-import tempfile
-from pathlib import Path
+import time
+from collections.abc import Generator, Iterator
+from concurrent.futures import ThreadPoolExecutor
 
 from app.config import settings
+from app.sandbox.cache import cache_key, get_result_cache, is_cacheable
+from app.sandbox.complexity import build_report
 from app.sandbox.policies import BLOCKED_IMPORTS
-from app.sandbox.wrapper_template import WRAPPER_TEMPLATE
-from app.models.session import SubmissionResult
+from app.sandbox.pool import SandboxWorker, acquire_worker, release_worker
+from app.sandbox.precompile import build_test_bundle, encode_payload
+from app.sandbox.wrapper_template import COMPILE_INPUT_SOURCE, PROFILE_TEMPLATE, WRAPPER_TEMPLATE
+from app.models.problem import ComplexityCheck
+from app.models.session import ComplexityReport, ComplexityTiming, SubmissionResult
+
+RESULT_MARKER = "__RESULT__"
+MAX_STDERR_BYTES = 64 * 1024
+PROFILE_MIN_SAMPLE_SECONDS = 0.02
 
 
 class SandboxError(Exception):
     pass
 
 
+class _SandboxTimeout(Exception):
+    pass
+
+
 def check_blocked_imports(code: str) -> str | None:
     for imp in BLOCKED_IMPORTS:
         for pattern in [f"import {imp}", f"from {imp}"]:
@@ -21,69 +39,271 @@ def check_blocked_imports(code: str) -> str | None:
     return None
 
 
-def run_code(user_code: str, test_cases: list[dict]) -> list[SubmissionResult]:
+def _failed(test_cases: list[dict], indices: list[int], error: str) -> list[SubmissionResult]:
+    return [
+        SubmissionResult(
+            test_index=i,
+            passed=False,
+            input=test_cases[i]["input"],
+            expected=test_cases[i]["expected"],
+            actual="",
+            error=error,
+        )
+        for i in indices
+    ]
+
+
+def _read_stdout_lines(worker: SandboxWorker, deadline: float, stderr: bytearray) -> Iterator[str]:
+    """Yield stdout lines as the worker prints them, collecting stderr on the side."""
+    selector = selectors.DefaultSelector()
+    selector.register(worker.proc.stdout, selectors.EVENT_READ, "stdout")
+    selector.register(worker.proc.stderr, selectors.EVENT_READ, "stderr")
+    pending = b""
+    try:
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise _SandboxTimeout()
+            for key, _ in selector.select(remaining):
+                chunk = os.read(key.fd, 65536)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                elif key.data == "stderr":
+                    stderr.extend(chunk[: MAX_STDERR_BYTES - len(stderr)])
+                else:
+                    *lines, pending = (pending + chunk).split(b"\n")
+                    for line in lines:
+                        yield line.decode(errors="replace")
+        if pending:
+            yield pending.decode(errors="replace")
+    finally:
+        selector.close()
+
+
+def _write_script(worker: SandboxWorker, script: str, test_bundle: tuple | None = None) -> None:
+    try:
+        worker.proc.stdin.write(encode_payload(script, test_bundle))
+        worker.proc.stdin.close()
+    except BrokenPipeError:
+        pass
+
+
+def stream_code(
+    user_code: str, test_cases: list[dict], use_cache: bool = True, virtual_clock: bool = False
+) -> Iterator[SubmissionResult]:
+    """Yield each test's result as soon as the sandbox reports it.
+
+    Results that arrived before a timeout or crash are kept; only the tests that
+    never reported are marked as failed. Identical runs are served from the result
+    cache unless ``use_cache`` is off or the code/tests import a nondeterministic module.
+    With ``virtual_clock`` the ``time`` module runs on a simulated clock that only
+    ``sleep`` advances.
+    """
     blocked = check_blocked_imports(user_code)
     if blocked:
-        return [
-            SubmissionResult(
-                test_index=i,
-                passed=False,
-                input=tc["input"],
-                expected=tc["expected"],
-                actual="",
-                error=blocked,
-            )
-            for i, tc in enumerate(test_cases)
-        ]
-
-    tests_json = json.dumps(test_cases)
-    script = WRAPPER_TEMPLATE.format(user_code=user_code, tests_json=tests_json)
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        script_path = Path(tmpdir) / "solution.py"
-        script_path.write_text(script)
+        yield from _failed(test_cases, list(range(len(test_cases))), blocked)
+        return
 
+    cacheable = use_cache and is_cacheable(user_code, test_cases, virtual_clock=virtual_clock)
+    cache = get_result_cache() if cacheable else None
+    key = cache_key(user_code, test_cases, virtual_clock=virtual_clock) if cache is not None else ""
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            yield from cached
+            return
+
+    results = []
+    sandbox = _stream_sandbox(user_code, test_cases, virtual_clock)
+    try:
+        while True:
+            result = next(sandbox)
+            results.append(result)
+            yield result
+    except StopIteration as stop:
+        complete = stop.value
+    finally:
+        sandbox.close()
+
+    # Only cache clean runs: sandbox-level failures and timeouts may not reproduce.
+    if cache is not None and complete and not any(_is_timeout(r) for r in results):
+        cache.put(key, results)
+
+
+def _is_timeout(result: SubmissionResult) -> bool:
+    return bool(result.error) and result.error.startswith("Time limit exceeded")
+
+
+def _stream_sandbox(
+    user_code: str, test_cases: list[dict], virtual_clock: bool = False
+) -> Generator[SubmissionResult, None, bool]:
+    """Run the tests in a sandbox worker; returns True if every test reported a result."""
+    script = WRAPPER_TEMPLATE.format(
+        user_code=user_code,
+        compile_input_source=COMPILE_INPUT_SOURCE,
+        virtual_clock=bool(virtual_clock),
+        test_timeout=settings.sandbox_test_timeout,
+        memory_mb=settings.sandbox_max_memory_mb,
+    )
+
+    reported: set[int] = set()
+    stderr = bytearray()
+    worker = acquire_worker()
+    try:
+        deadline = time.monotonic() + settings.sandbox_timeout
+        _write_script(worker, script, build_test_bundle(test_cases))
+
+        try:
+            for line in _read_stdout_lines(worker, deadline, stderr):
+                if not line.startswith(RESULT_MARKER):
+                    continue
+                try:
+                    result = SubmissionResult(**json.loads(line[len(RESULT_MARKER) :]))
+                except json.JSONDecodeError:
+                    continue
+                reported.add(result.test_index)
+                yield result
+        except _SandboxTimeout:
+            missing = [i for i in range(len(test_cases)) if i not in reported]
+            yield from _failed(test_cases, missing, f"Time limit exceeded ({settings.sandbox_timeout}s)")
+            return False
         try:
-            result = subprocess.run(
-                ["python3", str(script_path)],
-                capture_output=True,
-                text=True,
-                timeout=settings.sandbox_timeout,
-                cwd=tmpdir,
-            )
+            returncode = worker.proc.wait(timeout=max(deadline - time.monotonic(), 0.1))
         except subprocess.TimeoutExpired:
-            return [
-                SubmissionResult(
-                    test_index=i,
-                    passed=False,
-                    input=tc["input"],
-                    expected=tc["expected"],
-                    actual="",
-                    error=f"Time limit exceeded ({settings.sandbox_timeout}s)",
-                )
-                for i, tc in enumerate(test_cases)
-            ]
-
-        stdout = result.stdout
-        stderr = result.stderr
-
-        if "__RESULTS__" in stdout:
-            results_str = stdout.split("__RESULTS__", 1)[1].strip()
+            returncode = None
+    finally:
+        release_worker(worker)
+
+    missing = [i for i in range(len(test_cases)) if i not in reported]
+    if missing:
+        if returncode == -signal.SIGXCPU:
+            error_msg = f"CPU time limit exceeded ({settings.sandbox_timeout}s)"
+        else:
+            error_msg = stderr.decode(errors="replace").strip() or "Unknown error during execution"
+        yield from _failed(test_cases, missing, error_msg)
+        return False
+    return True
+
+
+def run_code(
+    user_code: str, test_cases: list[dict], use_cache: bool = True, virtual_clock: bool = False
+) -> list[SubmissionResult]:
+    return list(stream_code(user_code, test_cases, use_cache=use_cache, virtual_clock=virtual_clock))
+
+
+def profile_code(user_code: str, check: ComplexityCheck) -> ComplexityReport:
+    """Time the candidate's function across the check's input sizes and fit a complexity class.
+
+    Sizes run smallest first and stop at the first error, so a solution that is too
+    slow reports the sizes it managed plus a time-limit error for the one it didn't.
+    """
+    blocked = check_blocked_imports(user_code)
+    if blocked:
+        return build_report(check.target, [], error=blocked)
+
+    script = PROFILE_TEMPLATE.format(
+        user_code=user_code,
+        generator=check.generator,
+        function=check.function,
+        sizes=sorted(check.sizes),
+        repeats=max(check.repeats, 1),
+        size_timeout=settings.sandbox_test_timeout,
+        min_sample_seconds=PROFILE_MIN_SAMPLE_SECONDS,
+    )
+
+    timings: list[ComplexityTiming] = []
+    stderr = bytearray()
+    error = None
+    worker = acquire_worker()
+    try:
+        deadline = time.monotonic() + settings.sandbox_timeout
+        _write_script(worker, script)
+        try:
+            for line in _read_stdout_lines(worker, deadline, stderr):
+                if line.startswith(RESULT_MARKER):
+                    try:
+                        timings.append(ComplexityTiming(**json.loads(line[len(RESULT_MARKER) :])))
+                    except json.JSONDecodeError:
+                        continue
+        except _SandboxTimeout:
+            error = f"Time limit exceeded ({settings.sandbox_timeout}s)"
+        else:
             try:
-                raw = json.loads(results_str)
-                return [SubmissionResult(**r) for r in raw]
-            except json.JSONDecodeError:
-                pass
-
-        error_msg = stderr.strip() if stderr else "Unknown error during execution"
-        return [
-            SubmissionResult(
-                test_index=i,
-                passed=False,
-                input=tc["input"],
-                expected=tc["expected"],
-                actual="",
-                error=error_msg,
-            )
-            for i, tc in enumerate(test_cases)
-        ]
+                returncode = worker.proc.wait(timeout=max(deadline - time.monotonic(), 0.1))
+            except subprocess.TimeoutExpired:
+                returncode = None
+            if returncode == -signal.SIGXCPU:
+                error = f"CPU time limit exceeded ({settings.sandbox_timeout}s)"
+            elif not timings:
+                error = stderr.decode(errors="replace").strip() or "Unknown error during execution"
+    finally:
+        release_worker(worker)
+
+    if error and error.startswith(("Time limit", "CPU time limit")):
+        # Treat the first size that never reported as the one that ran out of time.
+        unreported = [n for n in sorted(check.sizes) if n not in {t.n for t in timings}]
+        if unreported:
+            timings.append(ComplexityTiming(n=unreported[0], error=error))
+            error = None
+    return build_report(check.target, timings, error=error)
+
+
+def choose_shard_count(test_count: int) -> int:
+    """One shard per test, capped by available cores, ``sandbox_max_shards`` and the pool.
+
+    Every shard holds a pooled sandbox, and up to ``execution_max_concurrency`` jobs
+    run at once, so each job gets its share of the pool; more shards would only wait
+    for a worker and time out as ``SandboxBusyError``.
+    """
+    shards = min(test_count, os.cpu_count() or 1, settings.sandbox_max_shards)
+    if settings.sandbox_pool_size > 0:
+        shards = min(shards, settings.sandbox_pool_size // max(1, settings.execution_max_concurrency))
+    return max(1, shards)
+
+
+def stream_code_sharded(
+    user_code: str, test_cases: list[dict], shards: int, use_cache: bool = True, virtual_clock: bool = False
+) -> Iterator[SubmissionResult]:
+    """Split the tests round-robin across ``shards`` concurrent sandboxes.
+
+    Results are yielded in completion order with ``test_index`` mapped back to the
+    position in ``test_cases``. Each shard is an independent process, so tests must
+    not rely on state left behind by earlier tests.
+    """
+    if shards <= 1:
+        yield from stream_code(user_code, test_cases, use_cache=use_cache, virtual_clock=virtual_clock)
+        return
+
+    groups = [list(range(k, len(test_cases), shards)) for k in range(shards)]
+    done = object()
+    results: queue.Queue = queue.Queue()
+
+    def run_shard(indices: list[int]) -> None:
+        try:
+            shard = [test_cases[i] for i in indices]
+            for result in stream_code(user_code, shard, use_cache=use_cache, virtual_clock=virtual_clock):
+                results.put(result.model_copy(update={"test_index": indices[result.test_index]}))
+        except Exception as e:  # noqa: BLE001 - re-raised by the consumer below
+            results.put(e)
+        finally:
+            results.put(done)
+
+    with ThreadPoolExecutor(max_workers=shards, thread_name_prefix="sandbox-shard") as executor:
+        for indices in groups:
+            executor.submit(run_shard, indices)
+        remaining = shards
+        while remaining:
+            item = results.get()
+            if item is done:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+
+
+def run_code_sharded(
+    user_code: str, test_cases: list[dict], shards: int, use_cache: bool = True, virtual_clock: bool = False
+) -> list[SubmissionResult]:
+    results = stream_code_sharded(user_code, test_cases, shards, use_cache=use_cache, virtual_clock=virtual_clock)
+    return sorted(results, key=lambda r: r.test_index)
@@ -1,36 +1,329 @@
+import hashlib
+
+WORKER_BOOTSTRAP = """
+import linecache
+import marshal
+import resource
+import sys
+
+for _name in {preload_modules!r}:
+    try:
+        __import__(_name)
+    except Exception:
+        pass
+
+# Limits are applied after preloading so warm-up imports don't eat into the candidate's budget.
+_usage = resource.getrusage(resource.RUSAGE_SELF)
+_cpu_limit = int(_usage.ru_utime + _usage.ru_stime) + {cpu_seconds}
+resource.setrlimit(resource.RLIMIT_CPU, (_cpu_limit, _cpu_limit + 1))
+resource.setrlimit(resource.RLIMIT_AS, ({memory_bytes}, {memory_bytes}))
+
+# Payload: (script, precompiled test bundle or None) — see app.sandbox.precompile.
+_source, _tests = marshal.loads(sys.stdin.buffer.read())
+linecache.cache["solution.py"] = (len(_source), None, _source.splitlines(True), "solution.py")
+exec(compile(_source, "solution.py", "exec"), {{"__name__": "__main__", "__tests__": _tests}})
+"""
+
+# Compiles a test input REPL-style: the trailing expression — also inside a final
+# try/if/with block — is assigned to __test_result__. Shared verbatim by the API
+# (app.sandbox.precompile) and the harness, which needs it when the sandbox runs a
+# different interpreter and cannot load the API's bytecode.
+COMPILE_INPUT_SOURCE = """
+def _capture_last_expression(body, ast):
+    if not body:
+        return
+    last = body[-1]
+    if isinstance(last, ast.Expr):
+        target = ast.Name(id="__test_result__", ctx=ast.Store())
+        body[-1] = ast.copy_location(ast.Assign(targets=[target], value=last.value), last)
+    elif isinstance(last, ast.Try):
+        _capture_last_expression(last.orelse or last.body, ast)
+        for handler in last.handlers:
+            _capture_last_expression(handler.body, ast)
+    elif isinstance(last, ast.If):
+        _capture_last_expression(last.body, ast)
+        _capture_last_expression(last.orelse, ast)
+    elif isinstance(last, ast.With):
+        _capture_last_expression(last.body, ast)
+
+
+def _compile_input(source):
+    import ast
+
+    tree = ast.parse(source, "<test>", "exec")
+    _capture_last_expression(tree.body, ast)
+    ast.fix_missing_locations(tree)
+    return compile(tree, "<test>", "exec")
+"""
+
 WRAPPER_TEMPLATE = """
 import json
+import linecache as _linecache
+import marshal as _marshal
+import resource as _resource
+import signal as _signal
+import sys as _sys
+import time as _time
+
+_perf_counter = _time.perf_counter
+_process_time = _time.process_time
+_setitimer = _signal.setitimer
+
+
+class _TestTimeout(BaseException):
+    pass
+
+
+def _on_test_timeout(signum, frame):
+    raise _TestTimeout()
+
+
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return _resource.getrusage(_resource.RUSAGE_SELF).ru_maxrss
+
+
+{compile_input_source}
+
+def _load_tests(bundle):
+    cache_tag, compiled, sources = bundle
+    if cache_tag == _sys.implementation.cache_tag:
+        return [_marshal.loads(blob) for blob in compiled]
+    tests = []
+    for source, _ in sources:
+        try:
+            tests.append((_compile_input(source), None, None, None, None))
+        except SyntaxError as e:
+            tests.append((None, str(e), None, None, None))
+    return tests
+
+
+def _install_virtual_clock():
+    # Problems that sleep inside their tests opt into a simulated clock: sleep() advances
+    # it instantly and nothing else moves it, so timing assertions are deterministic.
+    import time
+
+    elapsed = [0.0]
+
+    def sleep(seconds):
+        if seconds < 0:
+            raise ValueError("sleep length must be non-negative")
+        elapsed[0] += seconds
+
+    def clock(start):
+        return lambda: start + elapsed[0]
+
+    def clock_ns(start):
+        return lambda: int((start + elapsed[0]) * 1e9)
+
+    time.sleep = sleep
+    time.time, time.time_ns = clock(1_700_000_000.0), clock_ns(1_700_000_000.0)
+    time.monotonic, time.monotonic_ns = clock(1_000.0), clock_ns(1_000.0)
+    time.perf_counter, time.perf_counter_ns = clock(1_000.0), clock_ns(1_000.0)
+    _install_virtual_event_loop(elapsed)
+
+
+def _install_virtual_event_loop(elapsed):
+    # asyncio's loop clock is time.monotonic, now virtual, so timers must advance it too:
+    # when the loop would block until its next timer, the clock jumps there instead.
+    import asyncio
+    import selectors
+
+    class VirtualTimeSelector(selectors.BaseSelector):
+        def __init__(self):
+            self._selector = selectors.DefaultSelector()
+
+        def register(self, fileobj, events, data=None):
+            return self._selector.register(fileobj, events, data)
+
+        def unregister(self, fileobj):
+            return self._selector.unregister(fileobj)
+
+        def modify(self, fileobj, events, data=None):
+            return self._selector.modify(fileobj, events, data)
+
+        def select(self, timeout=None):
+            if timeout is None:
+                return self._selector.select(None)  # nothing scheduled: wait for real I/O
+            ready = self._selector.select(0)
+            if not ready and timeout > 0:
+                elapsed[0] += timeout
+            return ready
+
+        def close(self):
+            self._selector.close()
+
+        def get_key(self, fileobj):
+            return self._selector.get_key(fileobj)
+
+        def get_map(self):
+            return self._selector.get_map()
+
+    class VirtualTimePolicy(asyncio.DefaultEventLoopPolicy):
+        def new_event_loop(self):
+            return asyncio.SelectorEventLoop(VirtualTimeSelector())
+
+    asyncio.set_event_loop_policy(VirtualTimePolicy())
+
+
+_signal.signal(_signal.SIGALRM, _on_test_timeout)
+if {virtual_clock}:
+    _install_virtual_clock()
 
 # === User code ===
-{user_code}
+# The solution runs in a namespace of its own, so nothing it defines can rebind the
+# harness's names (_signal, _perf_counter, ...) and switch off the per-test alarm.
+_solution_source = {user_code!r}
+_solution_globals = {{"__name__": "__main__", "__builtins__": __builtins__}}
+_linecache.cache["<solution>"] = (
+    len(_solution_source), None, _solution_source.splitlines(True), "<solution>"
+)
+exec(compile(_solution_source, "<solution>", "exec"), _solution_globals)
 # === End user code ===
 
 # === Test runner ===
-results = []
-tests = {tests_json}
+# Tests arrive precompiled (see app.sandbox.precompile). Each input runs in the
+# solution's globals; its trailing expression lands in __test_result__. Each result
+# is printed on its own marker line as soon as the test finishes, so the runner can
+# stream it and keep it even if a later test hangs.
+def _run_tests(namespace, bundle):
+    sources = bundle[2]
+    for i, (code, error, expected, expected_code, expected_text) in enumerate(_load_tests(bundle)):
+        source, expected_source = sources[i]
+        _reset_peak_rss()
+        wall_start, cpu_start = _perf_counter(), _process_time()
+        try:
+            if error is not None:
+                raise SyntaxError(error)
+            namespace.pop("__test_result__", None)
+            _setitimer(_signal.ITIMER_REAL, {test_timeout})
+            try:
+                exec(code, namespace)
+            finally:
+                _setitimer(_signal.ITIMER_REAL, 0)
+            actual = namespace.pop("__test_result__", None)
+            if expected_text is None:
+                expected = eval(expected_code if expected_code is not None else expected_source, namespace)
+                expected_text = str(expected)
+            result = {{
+                "test_index": i,
+                "passed": actual == expected,
+                "input": source,
+                "expected": expected_text,
+                "actual": str(actual),
+                "error": None,
+            }}
+        except (Exception, _TestTimeout) as e:
+            if isinstance(e, _TestTimeout):
+                message = "Time limit exceeded ({test_timeout}s per test)"
+            elif isinstance(e, MemoryError):
+                message = "Memory limit exceeded ({memory_mb} MB)"
+            else:
+                message = str(e)
+            result = {{
+                "test_index": i,
+                "passed": False,
+                "input": source,
+                "expected": expected_source,
+                "actual": "",
+                "error": message,
+            }}
+        result["wall_time_ms"] = round((_perf_counter() - wall_start) * 1000, 3)
+        result["cpu_time_ms"] = round((_process_time() - cpu_start) * 1000, 3)
+        result["peak_rss_kb"] = _peak_rss_kb()
+        print("\\n__RESULT__" + json.dumps(result), flush=True)
+
 
-for i, test in enumerate(tests):
+_run_tests(_solution_globals, __tests__)
+"""
+
+PROFILE_TEMPLATE = """
+import gc as _gc
+import json
+import signal as _signal
+import time as _time
+
+# CPU time rather than wall time, so other processes competing for the core do not skew the curve.
+_clock = _time.process_time
+
+
+class _SizeTimeout(BaseException):
+    pass
+
+
+def _on_size_timeout(signum, frame):
+    raise _SizeTimeout()
+
+
+_signal.signal(_signal.SIGALRM, _on_size_timeout)
+
+# === User code ===
+# Run in a namespace of its own, like the test harness, so it cannot rebind _clock or _signal.
+_solution_globals = {{"__name__": "__main__", "__builtins__": __builtins__}}
+exec(compile({user_code!r}, "<solution>", "exec"), _solution_globals)
+# === End user code ===
+
+# === Profiler ===
+# Times the candidate's function once per input size. Each sample loops the call
+# until it spans at least {min_sample_seconds}s so fast functions aren't lost in
+# timer resolution; the median of {repeats} samples is reported per call.
+_generator_ns = {{}}
+exec({generator!r}, _generator_ns)
+_generate = _generator_ns["generate"]
+_function = _solution_globals.get({function!r})
+
+for n in {sizes!r}:
+    result = {{"n": n, "seconds": None, "error": None}}
     try:
-        actual = eval(test["input"])
-        expected = eval(test["expected"])
-        passed = actual == expected
-        results.append({{
-            "test_index": i,
-            "passed": passed,
-            "input": test["input"],
-            "expected": str(expected),
-            "actual": str(actual),
-            "error": None,
-        }})
+        if not callable(_function):
+            raise NameError("Function '{function}' is not defined")
+        args = _generate(n)
+        _gc.collect()
+        _gc.disable()
+        _signal.setitimer(_signal.ITIMER_REAL, {size_timeout})
+        try:
+            loops = 1
+            while True:
+                start = _clock()
+                for _ in range(loops):
+                    _function(*args)
+                elapsed = _clock() - start
+                if elapsed >= {min_sample_seconds}:
+                    break
+                loops *= 2
+            samples = [elapsed / loops]
+            for _ in range({repeats} - 1):
+                start = _clock()
+                for _ in range(loops):
+                    _function(*args)
+                samples.append((_clock() - start) / loops)
+        finally:
+            _signal.setitimer(_signal.ITIMER_REAL, 0)
+            _gc.enable()
+        samples.sort()
+        result["seconds"] = samples[len(samples) // 2]
+    except _SizeTimeout:
+        result["error"] = "Time limit exceeded at n={{}} ({size_timeout}s)".format(n)
     except Exception as e:
-        results.append({{
-            "test_index": i,
-            "passed": False,
-            "input": test["input"],
-            "expected": test["expected"],
-            "actual": "",
-            "error": str(e),
-        }})
-
-print("__RESULTS__" + json.dumps(results))
+        result["error"] = str(e) or type(e).__name__
+    print("\\n__RESULT__" + json.dumps(result), flush=True)
+    if result["error"]:
+        break
 """
+
+# Changes whenever the harness changes, so cached results from an older harness are never reused.
+HARNESS_VERSION = hashlib.sha256((WORKER_BOOTSTRAP + COMPILE_INPUT_SOURCE + WRAPPER_TEMPLATE).encode()).hexdigest()[:16]
@@ -1,3 +1,4 @@
+import importlib.util
 import json
 from collections.abc import AsyncGenerator
 
@@ -8,6 +9,52 @@ from app.config import settings
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 
 
+class AIServiceError(Exception):
+    """The gateway answered, but not with a completion."""
+
+
+# What a gateway call can be expected to fail with: no connection, a timeout, an
+# error status, or a reply without a completion. Anything else is a bug.
+AI_SERVICE_ERRORS = (httpx.HTTPError, AIServiceError)
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_ai_client() -> httpx.AsyncClient:
+    """The application-wide client for the LLM gateway, so calls reuse warm connections.
+
+    Opened by the app's lifespan (or on first use) and closed by ``close_ai_client``.
+    Speaks HTTP/2 when the ``h2`` package is installed (``httpx[http2]``), which lets
+    concurrent requests share one TLS connection; otherwise HTTP/1.1 with keep-alive.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=settings.ai_max_connections,
+                max_keepalive_connections=settings.ai_max_keepalive_connections,
+                keepalive_expiry=settings.ai_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        )
+    return _client
+
+
+async def close_ai_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _headers() -> dict:
+    return {
+        "Authorization": f"Bearer {settings.openrouter_api_key}",
+        "Content-Type": "application/json",
+    }
+
+
 async def chat_completion_stream(
     messages: list[dict],
     temperature: float = 0.7,
@@ -19,36 +66,33 @@ async def chat_completion_stream(
         yield "[AI service not configured — set OPENROUTER_API_KEY in .env]"
         return
 
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        async with client.stream(
-            "POST",
-            OPENROUTER_URL,
-            headers={
-                "Authorization": f"Bearer {settings.openrouter_api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": settings.openrouter_model,
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens,
-                "stream": True,
-            },
-        ) as response:
-            response.raise_for_status()
-            async for line in response.aiter_lines():
-                if not line.startswith("data: "):
-                    continue
-                payload = line[6:].strip()
-                if payload == "[DONE]":
-                    break
-                try:
-                    chunk = json.loads(payload)
-                    content = chunk["choices"][0]["delta"].get("content", "")
-                    if content:
-                        yield content
-                except (json.JSONDecodeError, KeyError, IndexError):
-                    continue
+    async with get_ai_client().stream(
+        "POST",
+        OPENROUTER_URL,
+        headers=_headers(),
+        json={
+            "model": settings.openrouter_model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        },
+        timeout=timeout,
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            payload = line[6:].strip()
+            if payload == "[DONE]":
+                break
+            try:
+                chunk = json.loads(payload)
+                content = chunk["choices"][0]["delta"].get("content", "")
+                if content:
+                    yield content
+            except (json.JSONDecodeError, KeyError, IndexError):
+                continue
 
 
 async def chat_completion(
@@ -60,20 +104,19 @@ async def chat_completion(
     if not settings.openrouter_api_key:
         return "[AI service not configured — set OPENROUTER_API_KEY in .env]"
 
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.post(
-            OPENROUTER_URL,
-            headers={
-                "Authorization": f"Bearer {settings.openrouter_api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": settings.openrouter_model,
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens,
-            },
-        )
-        response.raise_for_status()
-        data = response.json()
-        return data["choices"][0]["message"]["content"]
+    response = await get_ai_client().post(
+        OPENROUTER_URL,
+        headers=_headers(),
+        json={
+            "model": settings.openrouter_model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        },
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    try:
+        return response.json()["choices"][0]["message"]["content"]
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        raise AIServiceError("The AI service returned no completion") from e
@@ -0,0 +1,222 @@
+import asyncio
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import Future
+
+from app.config import settings
+from app.models.execution import ExecutionJob
+
+_END = object()
+
+
+class QueueFullError(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Execution queue is full — please retry shortly")
+        self.retry_after = retry_after
+
+
+class _Job:
+    def __init__(self, kind: str, fn: Callable, args: tuple, kwargs: dict) -> None:
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.status = "queued"  # "queued" | "running" | "done" | "failed"
+        self.future: Future = Future()
+        self.created_at = time.monotonic()
+        self.finished_at: float | None = None
+
+
+class ExecutionScheduler:
+    """Runs sandbox work on a fixed number of threads behind a bounded FIFO queue.
+
+    Keeps blocking subprocess work off both the event loop and Starlette's shared
+    threadpool, and turns overload into an immediate ``QueueFullError`` instead of
+    an ever-growing backlog.
+    """
+
+    def __init__(self, concurrency: int, queue_size: int, job_ttl_seconds: int) -> None:
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.job_ttl_seconds = job_ttl_seconds
+        self._queue: deque[_Job] = deque()
+        self._jobs: dict[str, _Job] = {}
+        self._running = 0
+        self._avg_seconds = 1.0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"execution-{i}", daemon=True) for i in range(concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, kind: str, fn: Callable, *args, **kwargs) -> ExecutionJob:
+        """Queue ``fn`` for polling via ``get``; raises ``QueueFullError`` when the queue is full."""
+        job = self._enqueue(kind, fn, args, kwargs)
+        with self._cond:
+            return self._snapshot(job)
+
+    def get(self, job_id: str) -> ExecutionJob | None:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    async def run(self, kind: str, fn: Callable, *args, **kwargs):
+        """Queue ``fn`` and await its return value (exceptions are re-raised)."""
+        job = self._enqueue(kind, fn, args, kwargs)
+        return await asyncio.wrap_future(job.future)
+
+    def stream(self, kind: str, fn: Callable, *args, **kwargs) -> AsyncIterator:
+        """Queue a generator function and return an async iterator over what it yields.
+
+        Queueing happens immediately, so ``QueueFullError`` is raised before the caller
+        starts a response. The worker drains the generator to the end even if the
+        iterator is abandoned, like a job whose result nobody fetches.
+        """
+        loop = asyncio.get_running_loop()
+        items: asyncio.Queue = asyncio.Queue()
+
+        def push(item) -> None:
+            try:
+                loop.call_soon_threadsafe(items.put_nowait, item)
+            except RuntimeError:
+                pass  # event loop already closed; nobody is listening
+
+        def consume() -> None:
+            try:
+                for item in fn(*args, **kwargs):
+                    push(item)
+            except Exception as e:
+                push(e)
+                raise
+            finally:
+                push(_END)
+
+        self._enqueue(kind, consume, (), {})
+
+        async def iterate():
+            while True:
+                item = await items.get()
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+
+        return iterate()
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            pending, self._queue = list(self._queue), deque()
+            self._cond.notify_all()
+        for job in pending:
+            job.status = "failed"
+            if job.future.set_running_or_notify_cancel():
+                job.future.set_exception(RuntimeError("Server is shutting down"))
+        for thread in self._threads:
+            thread.join(timeout=settings.sandbox_timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "concurrency": self.concurrency,
+                "running": self._running,
+                "queued": len(self._queue),
+                "queue_size": self.queue_size,
+                "avg_job_seconds": round(self._avg_seconds, 3),
+            }
+
+    def _enqueue(self, kind: str, fn: Callable, args: tuple, kwargs: dict) -> _Job:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Execution scheduler is shut down")
+            self._prune()
+            if len(self._queue) >= self.queue_size:
+                raise QueueFullError(self._retry_after())
+            job = _Job(kind, fn, args, kwargs)
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._cond.notify()
+            return job
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                job = self._queue.popleft()
+                if not job.future.set_running_or_notify_cancel():
+                    job.status = "failed"  # the awaiting request went away while queued
+                    job.finished_at = time.monotonic()
+                    continue
+                job.status = "running"
+                self._running += 1
+
+            started = time.monotonic()
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except BaseException as e:  # noqa: BLE001 - handed to whoever awaits the job
+                job.future.set_exception(e)
+                job.status = "failed"
+            else:
+                job.future.set_result(result)
+                job.status = "done"
+
+            with self._cond:
+                self._running -= 1
+                job.finished_at = time.monotonic()
+                self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (job.finished_at - started)
+
+    def _retry_after(self) -> int:
+        backlog = len(self._queue) + self._running
+        return max(1, math.ceil(backlog * self._avg_seconds / max(self.concurrency, 1)))
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.job_ttl_seconds
+        expired = [jid for jid, job in self._jobs.items() if job.finished_at is not None and job.finished_at < cutoff]
+        for jid in expired:
+            del self._jobs[jid]
+
+    def _snapshot(self, job: _Job) -> ExecutionJob:
+        position = 0
+        if job.status == "queued":
+            position = next((i + 1 for i, queued in enumerate(self._queue) if queued is job), 0)
+        snapshot = ExecutionJob(job_id=job.id, kind=job.kind, status=job.status, position=position)
+        if job.status == "done":
+            snapshot.result = job.future.result()
+        elif job.status == "failed":
+            snapshot.error = "Cancelled" if job.future.cancelled() else str(job.future.exception())
+        return snapshot
+
+
+_scheduler: ExecutionScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> ExecutionScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ExecutionScheduler(
+                concurrency=settings.execution_max_concurrency,
+                queue_size=settings.execution_queue_size,
+                job_ttl_seconds=settings.execution_job_ttl_seconds,
+            )
+        return _scheduler
+
+
+def shutdown_scheduler() -> None:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None:
+            _scheduler.shutdown()
+            _scheduler = None
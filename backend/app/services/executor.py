@@ -1,27 +1,86 @@
+from collections.abc import Callable, Iterator
 from datetime import datetime
 
+from app.models.problem import Problem
+from app.models.session import Session, SubmissionResult
 from app.services.problem_service import get_problem
-from app.services.session_service import get_session, _save_session
-from app.sandbox.runner import run_code
+from app.services.session_archive import get_session_archive
+from app.services.session_service import modify_session
+from app.services.session_store import get_session_store
+from app.config import settings
+from app.sandbox.runner import (
+    choose_shard_count,
+    profile_code,
+    run_code,
+    run_code_sharded,
+    stream_code,
+    stream_code_sharded,
+)
 
 
 class ExecutionError(Exception):
     pass
 
 
-def execute_run(session_id: str) -> dict:
-    """Run visible test cases only."""
-    session = get_session(session_id)
+class SessionArchivedError(ExecutionError):
+    """The session is in the read-only archive, so it can't be run or have results saved."""
+
+
+def _load_session_problem(session_id: str) -> tuple[Session, Problem]:
+    session = get_session_store().get(session_id)
     if not session:
+        if get_session_archive().get(session_id):
+            raise SessionArchivedError("Session is archived and can no longer be run or submitted")
         raise ExecutionError("Session not found")
 
     problem = get_problem(session.problem_id)
     if not problem:
         raise ExecutionError("Problem not found")
 
-    visible_tests = [{"input": tc.input, "expected": tc.expected} for tc in problem.test_cases if not tc.is_hidden]
+    return session, problem
+
+
+def check_executable(session_id: str) -> None:
+    """Raise ``ExecutionError`` now rather than from inside a queued job."""
+    _load_session_problem(session_id)
+
+
+def _visible_tests(problem: Problem) -> list[dict]:
+    return [{"input": tc.input, "expected": tc.expected} for tc in problem.test_cases if not tc.is_hidden]
+
+
+def _all_tests(problem: Problem) -> list[dict]:
+    return [{"input": tc.input, "expected": tc.expected} for tc in problem.test_cases]
+
+
+def _submit_shards(sharded: bool | None, test_count: int) -> int:
+    if sharded is None:
+        sharded = settings.sandbox_shard_submit
+    return choose_shard_count(test_count) if sharded else 1
+
+
+def _save_result(session_id: str, change: Callable[[Session], None]) -> None:
+    """Apply ``change`` to the live session; fail loudly if it was archived or deleted meanwhile."""
+    if modify_session(session_id, change) is None:
+        raise SessionArchivedError("Session was archived or deleted while running; the result was not saved")
+
+
+def _record_submission(session_id: str, results: list[SubmissionResult]) -> None:
+    submitted_at = datetime.now().isoformat()
+
+    def change(session: Session) -> None:
+        session.test_results = results
+        session.status = "submitted"
+        session.submitted_at = submitted_at
+
+    _save_result(session_id, change)
+
+
+def execute_run(session_id: str, use_cache: bool = True) -> dict:
+    """Run visible test cases only."""
+    session, problem = _load_session_problem(session_id)
 
-    results = run_code(session.code, visible_tests)
+    results = run_code(session.code, _visible_tests(problem), use_cache=use_cache, virtual_clock=problem.virtual_clock)
     all_passed = all(r.passed for r in results)
 
     return {
@@ -31,28 +90,72 @@ def execute_run(session_id: str) -> dict:
     }
 
 
-def execute_submit(session_id: str) -> dict:
-    """Run all test cases (visible + hidden) and save results."""
-    session = get_session(session_id)
-    if not session:
-        raise ExecutionError("Session not found")
-
-    problem = get_problem(session.problem_id)
-    if not problem:
-        raise ExecutionError("Problem not found")
+def execute_submit(session_id: str, use_cache: bool = True, sharded: bool | None = None) -> dict:
+    """Run all test cases (visible + hidden) and save results.
 
-    all_tests = [{"input": tc.input, "expected": tc.expected} for tc in problem.test_cases]
+    With ``sharded`` (default: ``settings.sandbox_shard_submit``) the tests are spread
+    over several concurrent sandboxes.
+    """
+    session, problem = _load_session_problem(session_id)
 
-    results = run_code(session.code, all_tests)
+    tests = _all_tests(problem)
+    shards = _submit_shards(sharded, len(tests))
+    results = run_code_sharded(session.code, tests, shards, use_cache=use_cache, virtual_clock=problem.virtual_clock)
     all_passed = all(r.passed for r in results)
 
-    session.test_results = results
-    session.status = "submitted"
-    session.submitted_at = datetime.now().isoformat()
-    _save_session(session)
+    _record_submission(session_id, results)
 
     return {
         "results": [r.model_dump() for r in results],
         "all_passed": all_passed,
         "error": None,
     }
+
+
+def execute_profile(session_id: str) -> dict:
+    """Run the problem's performance check against the session's code and save the report."""
+    session, problem = _load_session_problem(session_id)
+    if problem.complexity is None:
+        raise ExecutionError("Problem has no performance check")
+
+    report = profile_code(session.code, problem.complexity)
+
+    def change(latest: Session) -> None:
+        latest.complexity = report
+
+    _save_result(session_id, change)
+    return report.model_dump()
+
+
+def stream_run(session_id: str, use_cache: bool = True) -> Iterator[SubmissionResult]:
+    """Like ``execute_run`` but yields each result as its test finishes.
+
+    Session/problem lookup happens eagerly so a missing session raises before streaming starts.
+    """
+    session, problem = _load_session_problem(session_id)
+    return stream_code(session.code, _visible_tests(problem), use_cache=use_cache, virtual_clock=problem.virtual_clock)
+
+
+def stream_submit(session_id: str, use_cache: bool = True, sharded: bool | None = None) -> Iterator[SubmissionResult]:
+    """Like ``execute_submit`` but yields each result as its test finishes.
+
+    Sharded streams yield in completion order. Results are saved (sorted by test index)
+    once the last one has been yielded. Run through ``ExecutionScheduler.stream`` the
+    generator is drained by a worker thread, so the submission runs to the end and is
+    saved even if the client disconnects midway; only a caller that stops iterating
+    this generator itself saves nothing.
+    """
+    session, problem = _load_session_problem(session_id)
+    tests = _all_tests(problem)
+    shards = _submit_shards(sharded, len(tests))
+
+    def generate() -> Iterator[SubmissionResult]:
+        results = []
+        for result in stream_code_sharded(
+            session.code, tests, shards, use_cache=use_cache, virtual_clock=problem.virtual_clock
+        ):
+            results.append(result)
+            yield result
+        _record_submission(session_id, sorted(results, key=lambda r: r.test_index))
+
+    return generate()
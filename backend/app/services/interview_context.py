@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import re
+from collections.abc import Sequence
+
+from app.config import settings
+from app.models.session import Session
+from app.services.ai_service import AI_SERVICE_ERRORS, chat_completion
+from app.services.session_service import get_session, modify_session
+from app.services.session_store import SessionConflictError
+
+logger = logging.getLogger(__name__)
+
+# Per-message framing (role, separators) that chat APIs add on top of the content.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = """You keep the notes for a technical coding interview. Update the summary of the interview so far with the new exchanges below.
+
+Keep: each question the interviewer asked, what the candidate answered or claimed (approach, time/space complexity, edge cases, trade-offs), and anything left unresolved. Drop pleasantries. Write plain prose, at most {words} words.
+
+Summary so far:
+{summary}
+
+New exchanges:
+{transcript}"""
+
+# Pieces a BPE tokenizer rarely merges across: runs of letters/digits and single symbols.
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+_refreshing: set[str] = set()  # session ids with a summary refresh in flight
+_tasks: set[asyncio.Task] = set()
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count, computed locally.
+
+    Splits like a BPE pre-tokenizer and counts about one token per four
+    characters of each word; close enough to budget prompts without shipping
+    a vocabulary.
+    """
+    return sum(-(-len(piece) // 4) for piece in _PIECES.findall(text))
+
+
+def message_tokens(message: dict) -> int:
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def render_transcript(messages: Sequence[dict]) -> str:
+    return "\n".join(
+        f"{'Interviewer' if msg['role'] == 'assistant' else 'Candidate'}: {msg['content']}" for msg in messages
+    )
+
+
+def _window(session: Session, budget: int) -> tuple[str, int, list[dict]]:
+    """``(summary, omitted, recent)``: the rolling summary, how many unsummarized messages
+    did not fit, and the latest messages that go in verbatim.
+
+    The last ``interview_recent_messages`` are always kept; older messages not yet
+    covered by the summary are added newest first while they fit in ``budget``.
+    """
+    transcript = session.interview_messages
+    covered = min(session.interview_summary_messages, len(transcript))
+    summary = session.interview_summary if covered else ""
+    remaining = budget - (estimate_tokens(summary) + MESSAGE_OVERHEAD_TOKENS if summary else 0)
+    unsummarized = transcript[covered:]
+    keep = len(unsummarized)
+    for index in range(len(unsummarized) - 1, -1, -1):
+        cost = message_tokens(unsummarized[index])
+        if cost > remaining and len(unsummarized) - index > settings.interview_recent_messages:
+            keep = len(unsummarized) - index - 1
+            break
+        remaining -= cost
+    return summary, len(unsummarized) - keep, unsummarized[len(unsummarized) - keep :]
+
+
+def _summary_note(summary: str, omitted: int) -> str:
+    lines = [f"Summary of the interview so far:\n{summary}"] if summary else []
+    if omitted:
+        lines.append(f"({omitted} earlier messages are not shown.)")
+    return "\n".join(lines)
+
+
+def build_context(system_prompt: str, session: Session) -> list[dict]:
+    """Chat messages for the next interview turn, within ``interview_context_tokens``.
+
+    The system prompt and the latest turns go in verbatim; earlier turns are
+    replaced by the session's rolling summary (see ``schedule_summary_refresh``),
+    so the prompt stops growing once the interview is long.
+    """
+    system = {"role": "system", "content": system_prompt}
+    summary, omitted, recent = _window(session, settings.interview_context_tokens - message_tokens(system))
+    messages = [system]
+    note = _summary_note(summary, omitted)
+    if note:
+        messages.append({"role": "system", "content": note})
+    messages.extend({"role": msg["role"], "content": msg["content"]} for msg in recent)
+    return messages
+
+
+def transcript_within_budget(session: Session) -> str:
+    """The transcript for prompts that embed it as text (scoring), windowed like ``build_context``."""
+    summary, omitted, recent = _window(session, settings.interview_context_tokens)
+    note = _summary_note(summary, omitted)
+    return f"{note}\n\n{render_transcript(recent)}" if note else render_transcript(recent)
+
+
+def _stale_messages(session: Session) -> list[dict]:
+    """Messages due to be folded into the summary: past the verbatim window, once enough have piled up."""
+    unsummarized = session.interview_messages[session.interview_summary_messages :]
+    stale = unsummarized[: max(len(unsummarized) - settings.interview_recent_messages, 0)]
+    if len(stale) >= settings.interview_recent_messages:
+        return stale
+    if stale and sum(map(message_tokens, unsummarized)) > settings.interview_context_tokens // 2:
+        return stale
+    return []
+
+
+async def refresh_summary(session_id: str) -> bool:
+    """Fold older turns into the session's rolling summary; returns whether it changed.
+
+    Runs after a reply has been saved, so the extra LLM call is off the candidate's
+    critical path. The summary is only stored if the transcript it covers is still
+    the session's (an interview restarted meanwhile discards it).
+    """
+    session = get_session(session_id)
+    if session is None or not settings.openrouter_api_key:
+        return False
+    stale = _stale_messages(session)
+    if not stale:
+        return False
+    covered = session.interview_summary_messages + len(stale)
+    prompt = SUMMARY_PROMPT.format(
+        words=settings.interview_summary_tokens * 3 // 4,
+        summary=session.interview_summary or "(none yet)",
+        transcript=render_transcript(stale),
+    )
+    summary = await chat_completion(
+        [{"role": "user", "content": prompt}], temperature=0.2, max_tokens=settings.interview_summary_tokens
+    )
+    covered_messages = session.interview_messages[:covered]
+    stored = False
+
+    def change(latest: Session) -> None:
+        nonlocal stored
+        if latest.interview_messages[:covered] == covered_messages and latest.interview_summary_messages < covered:
+            latest.interview_summary = summary.strip()
+            latest.interview_summary_messages = covered
+            stored = True
+
+    modify_session(session_id, change)
+    return stored
+
+
+async def _refresh(session_id: str) -> None:
+    try:
+        await refresh_summary(session_id)
+    except (*AI_SERVICE_ERRORS, SessionConflictError) as e:
+        logger.warning("Interview summary refresh failed for %s: %s", session_id, e)
+    except Exception:
+        logger.exception("Interview summary refresh crashed for %s", session_id)
+    finally:
+        _refreshing.discard(session_id)
+
+
+def schedule_summary_refresh(session_id: str) -> None:
+    """Refresh the rolling summary in the background, at most one refresh per session at a time."""
+    if session_id in _refreshing:
+        return
+    _refreshing.add(session_id)
+    task = asyncio.get_running_loop().create_task(_refresh(session_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
@@ -0,0 +1,107 @@
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from app.config import BACKEND_DIR, settings
+from app.models.problem import Problem, ProblemSummary
+from app.services.problem_search import description_terms
+
+MAGIC = b"CDPB"
+FORMAT_VERSION = 1
+# magic, format version, byte length of the JSON table that follows
+_HEADER = struct.Struct("<4sIQ")
+
+
+class ProblemBundleError(Exception):
+    pass
+
+
+class ProblemBundle:
+    """Read side of a compiled problem bundle, memory-mapped so only requested problems are paged in.
+
+    Layout: a fixed header, a JSON table (index mtime plus one record per problem
+    with its file, mtime, summary, search terms and blob offset/length), then the
+    problems' JSON documents back to back. Problems were validated when the bundle
+    was built; ``read`` returns one document's bytes without touching the others.
+    """
+
+    def __init__(self, path: Path) -> None:
+        try:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, table_length = _HEADER.unpack_from(self._map)
+        except (OSError, ValueError, struct.error) as e:
+            raise ProblemBundleError(f"Unreadable problem bundle {path}: {e}") from e
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ProblemBundleError(f"{path} is not a version {FORMAT_VERSION} problem bundle")
+
+        self._base = _HEADER.size + table_length
+        try:
+            table = json.loads(self._map[_HEADER.size : self._base])
+            self.index_mtime: float = table["index_mtime"]
+            self.problems: list[dict] = table["problems"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise ProblemBundleError(f"Corrupt problem bundle {path}: {e}") from e
+
+    def read(self, offset: int, length: int) -> bytes:
+        return self._map[self._base + offset : self._base + offset + length]
+
+
+def write_bundle(data_dir: Path | None = None, output: Path | None = None) -> int:
+    """Validate every problem under ``data_dir`` and write them to ``output`` as one bundle.
+
+    Problems keep the index order, with files missing from the index appended. The
+    file is written next to ``output`` and renamed over it, so a running server that
+    has the old bundle mapped keeps reading a consistent file. Returns the count.
+    """
+    data_dir = data_dir or BACKEND_DIR / settings.data_dir
+    output = output or BACKEND_DIR / settings.problem_bundle
+    index_file = data_dir / "problem_index.json"
+    with open(index_file) as f:
+        indexed = [entry["file"] for entry in json.load(f)["problems"]]
+    on_disk = {p.relative_to(data_dir).as_posix() for p in data_dir.glob("*/*.json")}
+    order = [rel_path for rel_path in indexed if rel_path in on_disk] + sorted(on_disk - set(indexed))
+
+    records, blobs, seen, offset = [], [], {}, 0
+    for rel_path in order:
+        path = data_dir / rel_path
+        mtime = path.stat().st_mtime
+        with open(path) as f:
+            data = json.load(f)
+        try:
+            problem = Problem(**data)
+        except (ValidationError, TypeError) as e:
+            raise ProblemBundleError(f"{rel_path}: {e}") from e
+        if problem.id in seen:
+            raise ProblemBundleError(f"Duplicate problem id {problem.id!r} in {seen[problem.id]} and {rel_path}")
+        seen[problem.id] = rel_path
+
+        blob = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+        summary = ProblemSummary(**problem.model_dump(include=set(ProblemSummary.model_fields)))
+        records.append(
+            {
+                "file": rel_path,
+                "mtime": mtime,
+                "offset": offset,
+                "length": len(blob),
+                "summary": summary.model_dump(),
+                "terms": description_terms(problem.description),
+            }
+        )
+        blobs.append(blob)
+        offset += len(blob)
+
+    table = json.dumps({"index_mtime": index_file.stat().st_mtime, "problems": records}).encode()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(table)))
+        f.write(table)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, output)
+    return len(records)
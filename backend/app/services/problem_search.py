@@ -0,0 +1,153 @@
+import base64
+import bisect
+import json
+import math
+import re
+from collections.abc import Iterable
+
+from app.models.problem import ProblemSummary
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can each for from given has have if in into is it its of on or return "  # noqa: SIM905
+    "returns should that the their then this to was were which will with you your".split()
+)
+
+# How much a query term counts when found in each field; a document scores its best field.
+FIELD_WEIGHTS = {"title": 3.0, "tags": 2.0, "description": 1.0}
+MAX_PREFIX_EXPANSION = 50
+
+
+class InvalidCursorError(Exception):
+    pass
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase alphanumeric words, minus one-letter words and stopwords."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def description_terms(description: str) -> list[str]:
+    """The distinct description tokens stored in the index, so search never opens problem files."""
+    return sorted(set(tokenize(description)))
+
+
+def encode_cursor(score: float, position: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, position]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        score, position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(score), int(position)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+class SearchIndex:
+    """Inverted indexes over a catalogue's summaries, built once per catalogue snapshot.
+
+    Facets (category, difficulty, tags) map to the set of catalogue positions that
+    carry them; the full-text postings map each term to ``{position: weight}``.
+    """
+
+    def __init__(self, summaries: list[ProblemSummary], terms: list[Iterable[str]]) -> None:
+        self.summaries = summaries
+        self.by_category: dict[str, set[int]] = {}
+        self.by_difficulty: dict[str, set[int]] = {}
+        self.by_tag: dict[str, set[int]] = {}
+        self.postings: dict[str, dict[int, float]] = {}
+
+        for position, (summary, description) in enumerate(zip(summaries, terms)):
+            self.by_category.setdefault(summary.category, set()).add(position)
+            self.by_difficulty.setdefault(summary.difficulty, set()).add(position)
+            for tag in summary.tags:
+                self.by_tag.setdefault(tag.lower(), set()).add(position)
+
+            fields = {
+                "title": tokenize(summary.title),
+                "tags": tokenize(" ".join(summary.tags)),
+                "description": description,
+            }
+            for field, tokens in fields.items():
+                for token in tokens:
+                    postings = self.postings.setdefault(token, {})
+                    postings[position] = max(postings.get(position, 0.0), FIELD_WEIGHTS[field])
+
+        self.vocabulary = sorted(self.postings)
+
+    def filter(
+        self, category: str | None = None, difficulty: str | None = None, tags: Iterable[str] = ()
+    ) -> set[int] | None:
+        """Positions matching every given facet, or ``None`` when no facet is given."""
+        facets = []
+        if category:
+            facets.append(self.by_category.get(category, set()))
+        if difficulty:
+            facets.append(self.by_difficulty.get(difficulty, set()))
+        facets.extend(self.by_tag.get(tag.lower(), set()) for tag in tags)
+        if not facets:
+            return None
+        return set.intersection(*sorted(facets, key=len))
+
+    def _expand(self, token: str) -> list[str]:
+        start = bisect.bisect_left(self.vocabulary, token)
+        end = bisect.bisect_left(self.vocabulary, token + "\uffff")
+        return self.vocabulary[start : min(end, start + MAX_PREFIX_EXPANSION)]
+
+    def score(self, query: str, candidates: set[int] | None) -> dict[int, float]:
+        """Rank documents containing every query term (the last one as a prefix, for typeahead).
+
+        Each term contributes its inverse document frequency times the weight of the
+        best field it appears in.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return {p: 0.0 for p in (range(len(self.summaries)) if candidates is None else candidates)}
+
+        n = len(self.summaries)
+        scores: dict[int, float] | None = None
+        for i, token in enumerate(tokens):
+            expansions = self._expand(token) if i == len(tokens) - 1 else [token]
+            term_scores: dict[int, float] = {}
+            for term in expansions:
+                postings = self.postings.get(term, {})
+                idf = math.log(1 + n / len(postings)) if postings else 0.0
+                for position, weight in postings.items():
+                    if candidates is None or position in candidates:
+                        term_scores[position] = max(term_scores.get(position, 0.0), idf * weight)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {p: s + term_scores[p] for p, s in scores.items() if p in term_scores}
+            if not scores:
+                break
+        return scores or {}
+
+    def search(
+        self,
+        query: str = "",
+        category: str | None = None,
+        difficulty: str | None = None,
+        tags: Iterable[str] = (),
+        limit: int = 20,
+        cursor: str | None = None,
+    ) -> tuple[list[ProblemSummary], int, str | None]:
+        """One page of results ranked by score, then catalogue order: ``(items, total, next_cursor)``.
+
+        The cursor is the sort key of the last item returned rather than an offset, so a
+        page boundary never repeats or skips an item that was ranked before it.
+        """
+        scores = self.score(query, self.filter(category, difficulty, tags))
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if cursor:
+            after = decode_cursor(cursor)
+            start = bisect.bisect_right(ranked, (-after[0], after[1]), key=lambda item: (-item[1], item[0]))
+        else:
+            start = 0
+        page = ranked[start : start + limit]
+        next_cursor = None
+        if start + limit < len(ranked):
+            position, score = page[-1]
+            next_cursor = encode_cursor(score, position)
+        return [self.summaries[position] for position, _ in page], len(ranked), next_cursor
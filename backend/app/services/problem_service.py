@@ -1,63 +1,389 @@
+import hashlib
 import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import cached_property
 from pathlib import Path
+from typing import NamedTuple
 
-from app.config import settings
-from app.models.problem import Problem, ProblemSummary
+from pydantic import TypeAdapter
 
+from app.config import BACKEND_DIR, settings
+from app.models.problem import Problem, ProblemSummary, ReloadReport
+from app.sandbox.precompile import compile_test
+from app.services.problem_bundle import ProblemBundle, ProblemBundleError
+from app.services.problem_search import SearchIndex, description_terms
 
-_problems_cache: dict[str, Problem] = {}
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "problem_index.json"
+_SUMMARY_FIELDS = ("title", "category", "difficulty", "tags", "time_limit_minutes")
+_INDEX_FIELDS = (*_SUMMARY_FIELDS, "terms")
+
+
+class _Entry(NamedTuple):
+    summary: ProblemSummary
+    terms: list[str]  # distinct description tokens for full-text search
+    blob: tuple[int, int] | None = None  # (offset, length) in the catalogue's bundle, if it came from one
+
+
+class _Catalogue:
+    """Snapshot of the problem set: where each problem lives, its list summary and search indexes.
+
+    Built once and never mutated — a reload builds a new one and swaps the module
+    reference — so readers need no lock and never see a half-built catalogue. Full
+    problems are loaded separately, on demand, from the bundle or their own file.
+    """
+
+    def __init__(
+        self,
+        entries: dict[str, _Entry],
+        mtimes: dict[str, float],
+        index_mtime: float,
+        version: int,
+        bundle: ProblemBundle | None = None,
+    ) -> None:
+        self.entries = entries  # relative path -> entry, in index order
+        self.mtimes = mtimes  # relative path -> mtime when the snapshot was taken
+        self.index_mtime = index_mtime
+        self.version = version
+        self.bundle = bundle
+        self.files = {entry.summary.id: rel_path for rel_path, entry in entries.items()}
+        self.summaries = [entry.summary for entry in entries.values()]
+
+    @cached_property
+    def search(self) -> SearchIndex:
+        return SearchIndex(self.summaries, [entry.terms for entry in self.entries.values()])
+
+
+_catalogue: _Catalogue | None = None
+_catalogue_lock = threading.Lock()
+_refresh_lock = threading.Lock()  # one reload at a time (watcher vs admin endpoint)
+
+# Bounded LRU of fully loaded problems (with the file mtime they were read at), filled by ``get_problem``.
+_problems: OrderedDict[str, tuple[float, Problem]] = OrderedDict()
+_problems_lock = threading.Lock()
+_loading: dict[str, threading.Lock] = {}  # per-problem locks so each file is read once
+
+# Serialized JSON bodies (with their ETag) keyed by catalogue version, so unchanged content is encoded once.
+RESPONSE_CACHE_SIZE = 512
+_responses: OrderedDict[tuple, tuple[str, bytes]] = OrderedDict()
+_responses_lock = threading.Lock()
+_summary_list = TypeAdapter(list[ProblemSummary])
+
+_watcher: threading.Thread | None = None
+_watcher_stop = threading.Event()
 
 
 def _get_data_dir() -> Path:
-    return Path(__file__).resolve().parent.parent.parent / settings.data_dir
+    return BACKEND_DIR / settings.data_dir
+
 
+def _read_json(rel_path: str) -> dict:
+    with open(_get_data_dir() / rel_path) as f:
+        return json.load(f)
 
-def _load_problems() -> dict[str, Problem]:
-    global _problems_cache
-    if _problems_cache:
-        return _problems_cache
 
+def _scan() -> dict[str, float]:
+    """Relative path -> mtime of every problem file under the data dir."""
     data_dir = _get_data_dir()
-    index_path = data_dir / "problem_index.json"
-    with open(index_path) as f:
-        index = json.load(f)
+    return {p.relative_to(data_dir).as_posix(): p.stat().st_mtime for p in data_dir.glob("*/*.json")}
 
-    for entry in index["problems"]:
-        file_path = data_dir / entry["file"]
-        with open(file_path) as f:
-            data = json.load(f)
-        _problems_cache[data["id"]] = Problem(**data)
 
-    return _problems_cache
+def _entry(data: dict, terms: list[str]) -> _Entry:
+    summary = ProblemSummary(id=data["id"], **{field: data[field] for field in _SUMMARY_FIELDS if field in data})
+    return _Entry(summary, terms)
 
 
-def list_problems(category: str | None = None, difficulty: str | None = None) -> list[ProblemSummary]:
-    problems = _load_problems()
-    result = []
-    for p in problems.values():
-        if category and p.category != category:
-            continue
-        if difficulty and p.difficulty != difficulty:
-            continue
-        result.append(
-            ProblemSummary(
-                id=p.id,
-                title=p.title,
-                category=p.category,
-                difficulty=p.difficulty,
-                tags=p.tags,
-                time_limit_minutes=p.time_limit_minutes,
-            )
+def _entry_from_file(rel_path: str) -> _Entry:
+    data = _read_json(rel_path)
+    return _entry(data, description_terms(data.get("description", "")))
+
+
+def _bundle_catalogue() -> _Catalogue | None:
+    """The catalogue recorded in the compiled problem bundle, for the problem files it still matches.
+
+    A record is only trusted while its file's mtime is the one the bundle was built
+    from; a bundle that matches none of the files (built from another checkout, or
+    long out of date) is ignored altogether.
+    """
+    if not settings.problem_bundle:
+        return None
+    path = BACKEND_DIR / settings.problem_bundle
+    if not path.exists():
+        return None
+    try:
+        bundle = ProblemBundle(path)
+    except ProblemBundleError as e:
+        logger.warning("Ignoring problem bundle: %s", e)
+        return None
+    on_disk = _scan()
+    current = [record for record in bundle.problems if on_disk.get(record["file"]) == record["mtime"]]
+    if not current:
+        logger.warning("Ignoring problem bundle %s: it matches none of the problem files", path)
+        return None
+    entries = {
+        record["file"]: _Entry(
+            ProblemSummary(**record["summary"]), record["terms"], (record["offset"], record["length"])
         )
-    return result
+        for record in current
+    }
+    mtimes = {record["file"]: record["mtime"] for record in current}
+    return _Catalogue(entries, mtimes, bundle.index_mtime, version=0, bundle=bundle)
+
+
+def _build_catalogue(previous: _Catalogue | None = None) -> tuple[_Catalogue, ReloadReport]:
+    """Build a catalogue, reusing ``previous`` for every file whose mtime is unchanged.
+
+    Order and summaries come from the index; files edited or added since the index
+    was last rebuilt are read directly so they show up without rebuilding it.
+    """
+    mtimes = _scan()
+    index_mtime = (_get_data_dir() / INDEX_FILE).stat().st_mtime
+    report = ReloadReport()
+
+    if previous is not None and previous.index_mtime == index_mtime:
+        order = [rel_path for rel_path in previous.entries if rel_path in mtimes]
+        indexed: dict[str, dict] = {}
+    else:
+        report.index_reloaded = previous is not None
+        indexed = {entry["file"]: entry for entry in _read_json(INDEX_FILE)["problems"]}
+        order = [rel_path for rel_path in indexed if rel_path in mtimes]
+    order += sorted(set(mtimes) - set(order))
+
+    entries: dict[str, _Entry] = {}
+    for rel_path in order:
+        unchanged = previous is not None and previous.mtimes.get(rel_path) == mtimes[rel_path]
+        kept = previous.entries.get(rel_path) if unchanged else None
+        if kept is not None and not indexed:
+            entries[rel_path] = kept
+            continue
+        entry = indexed.get(rel_path)
+        if entry is not None and (unchanged or previous is None) and all(f in entry for f in _INDEX_FIELDS):
+            entries[rel_path] = _entry(entry, entry["terms"])._replace(blob=kept.blob if kept else None)
+        else:
+            # Not in the index, edited since the index was built, or an index without summaries.
+            entries[rel_path] = _entry_from_file(rel_path)
+        if previous is not None and not unchanged:
+            (report.changed if rel_path in previous.entries else report.added).append(entries[rel_path].summary.id)
+
+    if previous is not None:
+        report.removed = [entry.summary.id for rel_path, entry in previous.entries.items() if rel_path not in mtimes]
+        if not (report.added or report.changed or report.removed or report.index_reloaded):
+            # Nothing changed: keep the version, so search cursors, cached responses and ETags stay valid.
+            report.version = previous.version
+            report.problems = len(previous.entries)
+            return previous, report
+    version = previous.version + 1 if previous is not None else 1
+    catalogue = _Catalogue(entries, mtimes, index_mtime, version, previous.bundle if previous is not None else None)
+    report.version = version
+    report.problems = len(entries)
+    return catalogue, report
+
+
+def _load_catalogue() -> _Catalogue:
+    """Start from the bundle when there is one: only files edited since it was built are read."""
+    bundled = _bundle_catalogue()
+    catalogue, report = _build_catalogue(bundled)
+    if bundled is not None and (report.added or report.changed or report.removed):
+        stale = len(report.added) + len(report.changed) + len(report.removed)
+        logger.info("Problem bundle is out of date for %d files; serving them from disk", stale)
+    return catalogue
+
+
+def _get_catalogue() -> _Catalogue:
+    global _catalogue
+    if _catalogue is None:
+        with _catalogue_lock:
+            if _catalogue is None:
+                _catalogue = _load_catalogue()
+    return _catalogue
+
+
+def _read_problem(rel_path: str, source: bytes | None = None) -> Problem:
+    """Load a problem from its bundled JSON ``source`` when given, otherwise from its file."""
+    problem = Problem.model_validate_json(source) if source is not None else Problem(**_read_json(rel_path))
+    for tc in problem.test_cases:
+        compile_test(tc.input, tc.expected)  # warm the sandbox's precompiled test cache
+    return problem
+
+
+def _cache_problem(problem: Problem, mtime: float) -> None:
+    with _problems_lock:
+        _problems[problem.id] = (mtime, problem)
+        _problems.move_to_end(problem.id)
+        while len(_problems) > max(settings.problem_cache_size, 1):
+            _problems.popitem(last=False)
+
+
+def _cached(problem_id: str, mtime: float) -> Problem | None:
+    """The cached problem if it was read from the file version the catalogue knows. Caller holds the lock."""
+    cached = _problems.get(problem_id)
+    if cached is None or cached[0] != mtime:
+        return None
+    _problems.move_to_end(problem_id)
+    return cached[1]
+
+
+def list_problems(
+    category: str | None = None, difficulty: str | None = None, tags: list[str] | None = None
+) -> list[ProblemSummary]:
+    catalogue = _get_catalogue()
+    if not (category or difficulty or tags):
+        return list(catalogue.summaries)  # without building the search index
+    matches = catalogue.search.filter(category, difficulty, tags or ())
+    return [catalogue.summaries[position] for position in sorted(matches)]
+
+
+def search_problems(
+    query: str = "",
+    category: str | None = None,
+    difficulty: str | None = None,
+    tags: list[str] | None = None,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> tuple[list[ProblemSummary], int, str | None]:
+    """Ranked full-text search over titles, tags and descriptions; see ``SearchIndex.search``."""
+    return _get_catalogue().search.search(query, category, difficulty, tags or (), limit, cursor)
 
 
 def get_problem(problem_id: str) -> Problem | None:
-    problems = _load_problems()
-    return problems.get(problem_id)
+    catalogue = _get_catalogue()
+    rel_path = catalogue.files.get(problem_id)
+    if rel_path is None:
+        return None
+    mtime = catalogue.mtimes[rel_path]
+
+    with _problems_lock:
+        problem = _cached(problem_id, mtime)
+        if problem is not None:
+            return problem
+        lock = _loading.setdefault(problem_id, threading.Lock())
+
+    # Single flight: concurrent first requests wait for one read instead of racing.
+    with lock:
+        try:
+            with _problems_lock:
+                problem = _cached(problem_id, mtime)
+            if problem is None:
+                blob = catalogue.entries[rel_path].blob
+                problem = _read_problem(rel_path, catalogue.bundle.read(*blob) if blob else None)
+                _cache_problem(problem, mtime)
+        finally:
+            with _problems_lock:
+                _loading.pop(problem_id, None)
+    return problem
+
+
+def _cached_json(key: tuple, render: Callable[[], bytes | None]) -> tuple[str, bytes] | None:
+    """``(etag, body)`` for ``key`` under the current catalogue version, rendering it on a miss.
+
+    The ETag is a hash of the body, so it survives reloads that leave the content alone.
+    """
+    key = (_get_catalogue().version, *key)
+    with _responses_lock:
+        cached = _responses.get(key)
+        if cached is not None:
+            _responses.move_to_end(key)
+            return cached
+
+    body = render()
+    if body is None:
+        return None
+    cached = (f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', body)
+    with _responses_lock:
+        _responses[key] = cached
+        while len(_responses) > RESPONSE_CACHE_SIZE:
+            _responses.popitem(last=False)
+    return cached
+
+
+def list_problems_json(
+    category: str | None = None, difficulty: str | None = None, tags: list[str] | None = None
+) -> tuple[str, bytes]:
+    """``list_problems`` serialized, with its ETag."""
+    return _cached_json(
+        ("list", category, difficulty, tuple(tags or ())),
+        lambda: _summary_list.dump_json(list_problems(category, difficulty, tags)),
+    )
+
+
+def get_problem_json(problem_id: str) -> tuple[str, bytes] | None:
+    """``get_problem`` serialized, with its ETag; ``None`` for unknown problems."""
+
+    def render() -> bytes | None:
+        problem = get_problem(problem_id)
+        return problem.model_dump_json().encode() if problem else None
+
+    return _cached_json(("problem", problem_id), render)
+
+
+def refresh_problems() -> ReloadReport:
+    """Pick up problem files that changed, appeared or disappeared since the last load.
+
+    Unchanged problems keep their summaries and cached full models; the new
+    catalogue replaces the old one in a single assignment.
+    """
+    global _catalogue
+    started = time.perf_counter()
+    with _refresh_lock:
+        catalogue, report = _build_catalogue(_get_catalogue())
+        with _catalogue_lock:
+            _catalogue = catalogue
+        with _problems_lock:
+            for problem_id in report.changed + report.removed:
+                _problems.pop(problem_id, None)
+    report.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+    if report.added or report.changed or report.removed or report.index_reloaded:
+        logger.info(
+            "Reloaded problems in %.1fms: added=%s changed=%s removed=%s",
+            report.duration_ms,
+            report.added,
+            report.changed,
+            report.removed,
+        )
+    return report
 
 
 def reload_problems() -> None:
-    global _problems_cache
-    _problems_cache = {}
-    _load_problems()
+    global _catalogue
+    with _refresh_lock:
+        catalogue = _load_catalogue()
+        with _catalogue_lock:
+            _catalogue = catalogue
+        with _problems_lock:
+            _problems.clear()
+        with _responses_lock:
+            _responses.clear()
+
+
+def _watch(interval: float) -> None:
+    while not _watcher_stop.wait(interval):
+        try:
+            refresh_problems()
+        except Exception:
+            logger.exception("Problem reload failed; keeping the current catalogue")
+
+
+def start_problem_watcher() -> None:
+    """Poll the data dir every ``problem_reload_interval`` seconds (0 disables)."""
+    global _watcher
+    if settings.problem_reload_interval <= 0 or _watcher is not None:
+        return
+    _watcher_stop.clear()
+    _watcher = threading.Thread(
+        target=_watch, args=(settings.problem_reload_interval,), name="problem-watcher", daemon=True
+    )
+    _watcher.start()
+
+
+def stop_problem_watcher() -> None:
+    global _watcher
+    if _watcher is None:
+        return
+    _watcher_stop.set()
+    _watcher.join(timeout=5)
+    _watcher = None
@@ -1,9 +1,12 @@
 import json
 
-from app.services.session_service import get_session, _save_session
+from app.services.session_service import get_session, modify_session
 from app.services.problem_service import get_problem
 from app.services.ai_service import chat_completion
+from app.services.interview_context import transcript_within_budget
 from app.models.scoring import EvaluationResult, ScoreCategory
+from app.models.session import Session
+from app.sandbox.complexity import summarize_report
 
 
 SCORING_PROMPT = """You are evaluating a coding interview candidate. Analyze their performance and return a JSON evaluation.
@@ -18,13 +21,15 @@ SCORING_PROMPT = """You are evaluating a coding interview candidate. Analyze the
 
 **Test Results**: {test_summary}
 
+**Performance Check**: {complexity_summary}
+
 **Interview Transcript**:
 {interview_transcript}
 
 Evaluate the candidate across these 3 categories (score 0-100 each):
 
 1. **Correctness** - Did the code pass tests? Is the logic sound?
-2. **Code Quality** - Is it clean, readable, well-structured? Good naming? Efficient?
+2. **Code Quality** - Is it clean, readable, well-structured? Good naming? Efficient? (Weigh the measured performance check when present.)
 3. **Communication** - Did they explain their approach well? Handle interview questions thoughtfully?
 
 Return ONLY valid JSON in this exact format, no markdown fences:
@@ -40,6 +45,9 @@ Return ONLY valid JSON in this exact format, no markdown fences:
   "improvements": ["<improvement 1>", "<improvement 2>"]
 }}"""
 
+# Fallback Code Quality score by performance-check verdict when the AI evaluation is unavailable.
+EFFICIENCY_FALLBACK_SCORES = {"pass": 70, "borderline": 55, "fail": 30}
+
 
 async def evaluate_session(session_id: str) -> EvaluationResult:
     session = get_session(session_id)
@@ -54,17 +62,14 @@ async def evaluate_session(session_id: str) -> EvaluationResult:
     total = len(session.test_results)
     test_summary = f"{passed}/{total} tests passed" if total > 0 else "No tests run"
 
-    transcript_lines = []
-    for msg in session.interview_messages:
-        role = "Interviewer" if msg["role"] == "assistant" else "Candidate"
-        transcript_lines.append(f"{role}: {msg['content']}")
-    interview_transcript = "\n".join(transcript_lines) if transcript_lines else "No interview conducted"
+    interview_transcript = transcript_within_budget(session) or "No interview conducted"
 
     prompt = SCORING_PROMPT.format(
         problem_title=problem.title,
         problem_description=problem.description,
         code=session.code,
         test_summary=test_summary,
+        complexity_summary=summarize_report(session.complexity),
         interview_transcript=interview_transcript,
     )
 
@@ -84,6 +89,11 @@ async def evaluate_session(session_id: str) -> EvaluationResult:
     except (json.JSONDecodeError, Exception):
         # Fallback: generate score from test results only
         correctness_score = int((passed / total) * 100) if total > 0 else 0
+        quality_score = 50
+        quality_feedback = "AI evaluation unavailable. Review your code for readability and efficiency."
+        if session.complexity:
+            quality_score = EFFICIENCY_FALLBACK_SCORES.get(session.complexity.verdict, 50)
+            quality_feedback += f" Performance check: {summarize_report(session.complexity)}."
         data = {
             "overall_score": correctness_score,
             "categories": [
@@ -94,8 +104,8 @@ async def evaluate_session(session_id: str) -> EvaluationResult:
                 },
                 {
                     "name": "Code Quality",
-                    "score": 50,
-                    "feedback": "AI evaluation unavailable. Review your code for readability and efficiency.",
+                    "score": quality_score,
+                    "feedback": quality_feedback,
                 },
                 {
                     "name": "Communication",
@@ -117,8 +127,11 @@ async def evaluate_session(session_id: str) -> EvaluationResult:
         improvements=data.get("improvements", []),
     )
 
-    session.score = result.model_dump()
-    session.status = "scored"
-    _save_session(session)
+    # The evaluation took a while; record it on the latest copy so autosaves made meanwhile survive.
+    def change(latest: Session) -> None:
+        latest.score = result.model_dump()
+        latest.status = "scored"
+
+    modify_session(session_id, change)
 
     return result
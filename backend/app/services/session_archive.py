@@ -0,0 +1,274 @@
+import fcntl
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+from app.config import BACKEND_DIR, settings
+from app.models.session import CodeEdit, CompactionReport, Session, SessionSummary
+from app.services.problem_service import get_problem
+from app.services.session_store import (
+    JsonlTail,
+    SessionConflictError,
+    SessionStore,
+    get_session_store,
+    page_summaries,
+    summarize,
+)
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIRNAME = "archive"
+INDEX_FILENAME = "index.jsonl"
+FINISHED_STATUSES = ("submitted", "scored")
+# A new segment starts once the current one reaches this size.
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+COMPACT_BATCH_SIZE = 100
+
+
+class SessionArchiveError(Exception):
+    pass
+
+
+class _Entry(NamedTuple):
+    segment: str
+    offset: int
+    length: int
+    summary: SessionSummary
+
+
+class SessionArchive:
+    """Read-only home of old sessions: zlib-compressed records in append-only segment files.
+
+    Each record is one session plus its code edit log, compressed on its own so a
+    point lookup reads and inflates only that record. ``index.jsonl`` maps session
+    ids to (segment, offset, length) and carries the summary, so the archive lists
+    without opening segments. Segments are never rewritten; only the compactor
+    appends (holding ``exclusive``), and other workers pick up new index lines
+    incrementally.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        directory.mkdir(parents=True, exist_ok=True)
+        self._index = JsonlTail(directory / INDEX_FILENAME)
+        self._entries: dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def _sync(self) -> None:
+        """Apply index lines appended since the last call. Caller holds ``_lock``."""
+        restarted, records = self._index.read()
+        if restarted:
+            self._entries = {}
+        for record in records:
+            summary = SessionSummary(**record["summary"])
+            self._entries[summary.id] = _Entry(record["segment"], record["offset"], record["length"], summary)
+
+    def _read(self, session_id: str) -> dict | None:
+        with self._lock:
+            self._sync()
+            entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        with open(self.directory / entry.segment, "rb") as f:
+            f.seek(entry.offset)
+            blob = f.read(entry.length)
+        try:
+            return json.loads(zlib.decompress(blob))
+        except (zlib.error, ValueError) as e:
+            raise SessionArchiveError(f"Corrupt archive record for {session_id} in {entry.segment}") from e
+
+    def get(self, session_id: str) -> Session | None:
+        record = self._read(session_id)
+        return Session(**record["session"]) if record else None
+
+    def get_edits(self, session_id: str) -> list[CodeEdit] | None:
+        record = self._read(session_id)
+        return [CodeEdit(**edit) for edit in record["edits"]] if record else None
+
+    def list_summaries(
+        self,
+        status: str | None = None,
+        problem_id: str | None = None,
+        before: tuple[str, str] | None = None,
+        limit: int = 20,
+    ) -> list[SessionSummary]:
+        with self._lock:
+            self._sync()
+            summaries = [entry.summary for entry in self._entries.values()]
+        return page_summaries(summaries, status, problem_id, before, limit)
+
+    @contextmanager
+    def exclusive(self) -> Iterator[bool]:
+        """Try to become the archive's only writer across workers; yields whether that worked."""
+        with open(self.directory / ".lock", "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            yield True
+
+    def append(self, session: Session, edits: list[CodeEdit]) -> None:
+        """Archive a copy of ``session``; a later copy of the same id supersedes it. Caller holds ``exclusive``."""
+        record = {"session": session.model_dump(), "edits": [edit.model_dump(exclude_defaults=True) for edit in edits]}
+        blob = zlib.compress(json.dumps(record, separators=(",", ":")).encode())
+        segment = self._current_segment()
+        path = self.directory / segment
+        offset = path.stat().st_size if path.exists() else 0
+        with open(path, "ab") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())  # the record is durable before the index points at it
+        line = {"segment": segment, "offset": offset, "length": len(blob), "summary": summarize(session).model_dump()}
+        with self._lock:
+            with open(self.directory / INDEX_FILENAME, "a") as f:
+                f.write(json.dumps(line) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._sync()
+
+    def _current_segment(self) -> str:
+        segments = sorted(self.directory.glob("segment-*.zlib"))
+        if segments and segments[-1].stat().st_size < SEGMENT_MAX_BYTES:
+            return segments[-1].name
+        number = int(segments[-1].stem.split("-")[1]) + 1 if segments else 1
+        return f"segment-{number:06d}.zlib"
+
+
+def _is_empty(session: Session) -> bool:
+    """An in-progress session nobody worked on: starter code, nothing run, no interview."""
+    if session.status != "in_progress" or session.test_results or session.interview_messages or session.complexity:
+        return False
+    problem = get_problem(session.problem_id)
+    return session.code in ("", problem.starter_code if problem else "")
+
+
+def _abandoned(session: Session, edits: list[CodeEdit], cutoff: datetime) -> bool:
+    """An in-progress session whose code nobody has touched since ``cutoff``."""
+    last_active = max([session.started_at, *(edit.at for edit in edits)])
+    return last_active < cutoff.isoformat()
+
+
+def _started_before(store: SessionStore, cutoff: datetime, status: str | None = None) -> Iterator[SessionSummary]:
+    """Summaries of sessions started before ``cutoff``, newest first, fetched in batches."""
+    before = (cutoff.isoformat(), "")
+    while True:
+        batch = store.list_summaries(status=status, before=before, limit=COMPACT_BATCH_SIZE)
+        yield from batch
+        if len(batch) < COMPACT_BATCH_SIZE:
+            return
+        before = (batch[-1].started_at, batch[-1].id)
+
+
+def _delete(store: SessionStore, session: Session) -> bool:
+    try:
+        return store.delete(session.id, session.version)
+    except SessionConflictError:
+        return False  # someone is using it after all; leave it for the next run
+
+
+def compact_sessions(
+    store: SessionStore | None = None,
+    archive: SessionArchive | None = None,
+    now: datetime | None = None,
+) -> CompactionReport:
+    """Delete empty sessions past ``session_empty_ttl_hours`` and archive old sessions.
+
+    Submitted and scored sessions are archived once started more than
+    ``session_archive_after_days`` ago. An in-progress session is archived as
+    abandoned only when neither its start nor its last code edit falls within
+    ``session_abandon_after_days``; until then the candidate can come back to it.
+
+    A session is removed from the store only if it is unchanged since it was read,
+    so a session edited during compaction stays live (and any copy archived before
+    the edit is superseded when it is archived again). One worker compacts at a time.
+    """
+    start = time.perf_counter()
+    store = store or get_session_store()
+    archive = archive or get_session_archive()
+    now = now or datetime.now()
+    report = CompactionReport()
+    with archive.exclusive() as acquired:
+        if not acquired:
+            report.skipped = True
+            return report
+        for summary in _started_before(store, now - timedelta(hours=settings.session_empty_ttl_hours), "in_progress"):
+            session = store.get(summary.id)
+            if session and _is_empty(session) and _delete(store, session):
+                report.deleted += 1
+        finished_cutoff = now - timedelta(days=settings.session_archive_after_days)
+        abandoned_cutoff = now - timedelta(days=settings.session_abandon_after_days)
+        candidates = itertools.chain(
+            *(_started_before(store, finished_cutoff, status) for status in FINISHED_STATUSES),
+            _started_before(store, abandoned_cutoff, "in_progress"),
+        )
+        for summary in candidates:
+            session = store.get(summary.id)
+            if session is None:
+                continue
+            edits = store.get_edits(session.id)
+            if session.status not in FINISHED_STATUSES and not _abandoned(session, edits, abandoned_cutoff):
+                continue
+            archive.append(session, edits)
+            if _delete(store, session):
+                report.archived += 1
+        store.compact()
+    report.duration_ms = round((time.perf_counter() - start) * 1000, 2)
+    if report.archived or report.deleted:
+        logger.info("Compacted sessions: %d archived, %d deleted", report.archived, report.deleted)
+    return report
+
+
+_archive: SessionArchive | None = None
+_archive_dir: Path | None = None
+_archive_lock = threading.Lock()
+_compactor: threading.Thread | None = None
+_compactor_stop = threading.Event()
+
+
+def get_session_archive() -> SessionArchive:
+    """The archive under ``sessions_dir``, reopened if that setting changed."""
+    global _archive, _archive_dir
+    directory = BACKEND_DIR / settings.sessions_dir / ARCHIVE_DIRNAME
+    with _archive_lock:
+        if _archive is None or _archive_dir != directory:
+            _archive, _archive_dir = SessionArchive(directory), directory
+        return _archive
+
+
+def _compact_periodically(interval: float) -> None:
+    while not _compactor_stop.wait(interval):
+        try:
+            compact_sessions()
+        except Exception:
+            logger.exception("Session compaction failed; will retry")
+
+
+def start_session_compactor() -> None:
+    """Compact sessions every ``session_compact_interval`` seconds (0 disables)."""
+    global _compactor
+    if settings.session_compact_interval <= 0 or _compactor is not None:
+        return
+    _compactor_stop.clear()
+    _compactor = threading.Thread(
+        target=_compact_periodically, args=(settings.session_compact_interval,), name="session-compactor", daemon=True
+    )
+    _compactor.start()
+
+
+def stop_session_compactor() -> None:
+    global _compactor
+    if _compactor is None:
+        return
+    _compactor_stop.set()
+    _compactor.join(timeout=5)
+    _compactor = None
@@ -1,15 +1,47 @@
+import base64
+import heapq
 import json
-from pathlib import Path
-
-from app.config import settings
-from app.models.session import Session, SessionCreate, SessionUpdate
+import re
+import threading
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+
+from app.models.session import (
+    CodeDelta,
+    CodeEdit,
+    CodePatch,
+    CodePatchResult,
+    CodeVersion,
+    Session,
+    SessionCreate,
+    SessionSummaryPage,
+    SessionUpdate,
+)
+from app.services.problem_search import InvalidCursorError
 from app.services.problem_service import get_problem
+from app.services.session_archive import get_session_archive
+from app.services.session_store import SessionConflictError, UnsavedChangesError, get_session_store
+
+# Every Nth revision the edit log stores the full code, so replaying never walks far.
+CODE_SNAPSHOT_INTERVAL = 50
+
+# Compare-and-swap attempts before a save gives up; each retry reapplies the change to the latest copy.
+MAX_SAVE_ATTEMPTS = 5
+
+_ASTRAL = re.compile("[\U00010000-\U0010ffff]")
 
+_session_locks: dict[str, list] = {}  # session id -> [lock, holders]
+_session_locks_guard = threading.Lock()
 
-def _get_sessions_dir() -> Path:
-    d = Path(__file__).resolve().parent.parent.parent / settings.sessions_dir
-    d.mkdir(parents=True, exist_ok=True)
-    return d
+
+class CodeConflictError(Exception):
+    def __init__(self, revision: int) -> None:
+        super().__init__(f"Code is at revision {revision}")
+        self.revision = revision
+
+
+class InvalidDeltaError(Exception):
+    pass
 
 
 def create_session(req: SessionCreate) -> Session:
@@ -22,44 +54,194 @@ def create_session(req: SessionCreate) -> Session:
         code=problem.starter_code,
         time_remaining_seconds=problem.time_limit_minutes * 60,
     )
-    _save_session(session)
+    _save_session(session, [CodeEdit(revision=0, snapshot=session.code)])
     return session
 
 
 def get_session(session_id: str) -> Session | None:
-    path = _get_sessions_dir() / f"{session_id}.json"
-    if not path.exists():
-        return None
-    with open(path) as f:
-        return Session(**json.load(f))
+    """A live session, or else an archived one (read-only: ``modify_session`` ignores the archive)."""
+    return get_session_store().get(session_id) or get_session_archive().get(session_id)
+
+
+@contextmanager
+def _session_lock(session_id: str) -> Iterator[None]:
+    """Serialize this process's changes to one session; other workers are kept out by compare-and-swap."""
+    with _session_locks_guard:
+        entry = _session_locks.setdefault(session_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _session_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _session_locks[session_id]
+
+
+def modify_session(session_id: str, change: Callable[[Session], Sequence[CodeEdit] | None]) -> Session | None:
+    """Apply ``change`` to the latest copy of the session and save it, or return ``None`` if it doesn't exist.
+
+    ``change`` mutates the session it is given and may return code edits to log. If
+    another worker saved the session in between, the save is rejected and ``change``
+    runs again on the fresh copy, so changes to different fields merge instead of
+    overwriting each other. Exceptions from ``change`` abort without saving. Raises
+    ``SessionConflictError`` after ``MAX_SAVE_ATTEMPTS`` lost races, and
+    ``UnsavedChangesError`` at once if earlier acknowledged changes were lost.
+    """
+    with _session_lock(session_id):
+        for attempt in range(MAX_SAVE_ATTEMPTS):
+            session = get_session_store().get(session_id)
+            if session is None:
+                return None
+            edits = change(session) or ()
+            try:
+                _save_session(session, edits)
+            except UnsavedChangesError:
+                raise  # a retry would succeed and hide the loss from the client
+            except SessionConflictError:
+                if attempt == MAX_SAVE_ATTEMPTS - 1:
+                    raise
+                continue
+            return session
 
 
 def update_session(session_id: str, update: SessionUpdate) -> Session | None:
-    session = get_session(session_id)
-    if not session:
+    def change(session: Session) -> list[CodeEdit]:
+        edits = []
+        if update.code is not None and update.code != session.code:
+            session.code = update.code
+            session.code_revision += 1
+            edits.append(CodeEdit(revision=session.code_revision, snapshot=session.code))
+        if update.time_remaining_seconds is not None:
+            session.time_remaining_seconds = update.time_remaining_seconds
+        if update.status is not None:
+            session.status = update.status
+        return edits
+
+    return modify_session(session_id, change)
+
+
+def _utf16_index(text: str, offset: int) -> int:
+    """The ``str`` index of a UTF-16 code unit offset into ``text``."""
+    if not _ASTRAL.search(text):
+        if offset > len(text):
+            raise InvalidDeltaError(f"Offset {offset} is past the end of the code ({len(text)})")
+        return offset
+    units = 0
+    for index, char in enumerate(text):
+        if units == offset:
+            return index
+        if units > offset:
+            raise InvalidDeltaError(f"Offset {offset} splits a surrogate pair")
+        units += 2 if ord(char) > 0xFFFF else 1
+    if units != offset:
+        raise InvalidDeltaError(f"Offset {offset} is past the end of the code ({units})")
+    return len(text)
+
+
+def apply_deltas(code: str, deltas: Sequence[CodeDelta]) -> str:
+    for delta in deltas:
+        start = _utf16_index(code, delta.offset)
+        end = _utf16_index(code, delta.offset + delta.delete)
+        code = code[:start] + delta.insert + code[end:]
+    return code
+
+
+def patch_code(session_id: str, patch: CodePatch) -> CodePatchResult | None:
+    """Apply an editor's deltas to the session code and append them to the edit log.
+
+    The deltas must be based on the session's current ``code_revision``; otherwise the
+    client is out of sync and gets ``CodeConflictError`` (it should resend the full
+    buffer with a PUT).
+    """
+
+    def change(session: Session) -> list[CodeEdit]:
+        if patch.base_revision != session.code_revision:
+            raise CodeConflictError(session.code_revision)
+        edits = []
+        if patch.deltas:
+            session.code = apply_deltas(session.code, patch.deltas)
+            session.code_revision += 1
+            snapshot = session.code if session.code_revision % CODE_SNAPSHOT_INTERVAL == 0 else None
+            edits.append(CodeEdit(revision=session.code_revision, deltas=patch.deltas, snapshot=snapshot))
+        if patch.time_remaining_seconds is not None:
+            session.time_remaining_seconds = patch.time_remaining_seconds
+        return edits
+
+    session = modify_session(session_id, change)
+    return CodePatchResult(revision=session.code_revision) if session else None
+
+
+def get_code_history(session_id: str) -> list[CodeEdit] | None:
+    store = get_session_store()
+    if store.get(session_id) is None:
+        return get_session_archive().get_edits(session_id)
+    return store.get_edits(session_id)
+
+
+def get_code_at(session_id: str, revision: int) -> CodeVersion | None:
+    """Rebuild the session's code as of ``revision`` from the nearest snapshot before it."""
+    history = get_code_history(session_id)
+    if not history or revision < 0 or revision > history[-1].revision:
         return None
-
-    if update.code is not None:
-        session.code = update.code
-    if update.time_remaining_seconds is not None:
-        session.time_remaining_seconds = update.time_remaining_seconds
-    if update.status is not None:
-        session.status = update.status
-
-    _save_session(session)
-    return session
-
-
-def list_sessions() -> list[Session]:
-    sessions_dir = _get_sessions_dir()
-    sessions = []
-    for path in sorted(sessions_dir.glob("*.json"), reverse=True):
-        with open(path) as f:
-            sessions.append(Session(**json.load(f)))
-    return sessions
-
-
-def _save_session(session: Session) -> None:
-    path = _get_sessions_dir() / f"{session.id}.json"
-    with open(path, "w") as f:
-        json.dump(session.model_dump(), f, indent=2)
+    edits = [edit for edit in history if edit.revision <= revision]
+    start = max((i for i, edit in enumerate(edits) if edit.snapshot is not None), default=None)
+    if start is None:
+        return None  # sessions from before the edit log have no base to replay from
+    code = edits[start].snapshot
+    for edit in edits[start + 1 :]:
+        code = apply_deltas(code, edit.deltas)
+    return CodeVersion(revision=revision, code=code)
+
+
+def _encode_cursor(started_at: str, session_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([started_at, session_id]).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        started_at, session_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+    if not isinstance(started_at, str) or not isinstance(session_id, str):
+        raise InvalidCursorError("Invalid cursor")
+    return started_at, session_id
+
+
+def list_sessions(
+    status: str | None = None,
+    problem_id: str | None = None,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> SessionSummaryPage:
+    """One page of session summaries, newest first.
+
+    The cursor is the ``(started_at, id)`` of the last item returned, so sessions
+    created while paging don't shift later pages. Live and archived sessions are
+    merged; a session caught mid-archival is listed once.
+    """
+    before = _decode_cursor(cursor) if cursor else None
+    live = get_session_store().list_summaries(status, problem_id, before, limit + 1)
+    archived = get_session_archive().list_summaries(status, problem_id, before, limit + 1)
+    items, seen = [], set()
+    for summary in heapq.merge(live, archived, key=lambda s: (s.started_at, s.id), reverse=True):
+        if summary.id not in seen:
+            seen.add(summary.id)
+            items.append(summary)
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = _encode_cursor(items[-1].started_at, items[-1].id)
+    return SessionSummaryPage(items=items, next_cursor=next_cursor)
+
+
+def _save_session(session: Session, edits: Sequence[CodeEdit] = ()) -> None:
+    """Save ``session`` if the store still holds the version it was read at; bumps ``session.version``."""
+    expected_version = session.version
+    session.version += 1
+    try:
+        get_session_store().save(session, edits, expected_version)
+    except BaseException:
+        session.version = expected_version
+        raise
@@ -0,0 +1,892 @@
+import fcntl
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.config import BACKEND_DIR, settings
+from app.models.session import CodeEdit, Session, SessionSummary
+
+logger = logging.getLogger(__name__)
+
+SQLITE_FILENAME = "sessions.db"
+# The JSON store's summary index: one summary per line, the last line for an id wins.
+JSON_INDEX_FILENAME = "index.jsonl"
+
+
+class JsonlTail:
+    """Incremental reader for an append-only JSON-lines file that other processes append to.
+
+    ``read`` returns the records appended since the previous call. When the file was
+    replaced (rewritten by compaction) it starts over from the top and says so.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file: tuple[int, int] | None = None  # (st_dev, st_ino) of the file read so far
+        self._offset = 0
+
+    def read(self) -> tuple[bool, list[dict]]:
+        """``(restarted, records)``; a restarted caller drops what it built from earlier records."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            restarted, self._file, self._offset = self._file is not None, None, 0
+            return restarted, []
+        restarted = self._file != (stat.st_dev, stat.st_ino) or stat.st_size < self._offset
+        if restarted:
+            self._file, self._offset = (stat.st_dev, stat.st_ino), 0
+        records = []
+        if stat.st_size > self._offset:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # another worker is mid-append; read it next time
+                    self._offset += len(line)
+                    if line.strip():
+                        records.append(json.loads(line))
+        return restarted, records
+
+
+def summarize(session: Session) -> SessionSummary:
+    return SessionSummary(
+        id=session.id,
+        problem_id=session.problem_id,
+        status=session.status,
+        started_at=session.started_at,
+        score=(session.score or {}).get("overall_score"),
+    )
+
+
+def page_summaries(
+    summaries: list[SessionSummary],
+    status: str | None,
+    problem_id: str | None,
+    before: tuple[str, str] | None,
+    limit: int,
+) -> list[SessionSummary]:
+    """Filter in-memory summaries and return up to ``limit`` of them, newest first, after ``before``."""
+    matches = [
+        summary
+        for summary in summaries
+        if (status is None or summary.status == status)
+        and (problem_id is None or summary.problem_id == problem_id)
+        and (before is None or (summary.started_at, summary.id) < before)
+    ]
+    matches.sort(key=lambda summary: (summary.started_at, summary.id), reverse=True)
+    return matches[:limit]
+
+
+class SessionConflictError(Exception):
+    """The stored session is not at the version the caller read; reload and reapply the change."""
+
+    def __init__(self, session_id: str, version: int | None) -> None:
+        super().__init__(f"Session {session_id} was changed concurrently (stored version {version})")
+        self.session_id = session_id
+        self.version = version
+
+
+class UnsavedChangesError(SessionConflictError):
+    """Changes already acknowledged to the client could not be written: another worker changed
+    the same fields first. Retrying would hide that, so the client must reload and resend."""
+
+    def __str__(self) -> str:
+        return f"Session {self.session_id} was changed elsewhere before recent edits were saved; reload and save again"
+
+
+class SessionStore(ABC):
+    """Where sessions are persisted. ``session_service`` talks to whichever backend is configured."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Session | None: ...
+
+    def get_version(self, session_id: str) -> int | None:
+        """The stored session's version, ``None`` if there is none. Backends override it with a cheaper read."""
+        session = self.get(session_id)
+        return session.version if session else None
+
+    @abstractmethod
+    def save(self, session: Session, edits: Sequence[CodeEdit] = (), expected_version: int | None = None) -> None:
+        """Persist ``session`` and append ``edits`` to its code edit log.
+
+        With ``expected_version``, the write only happens if the stored session is
+        still at that version (``0`` for one that was never saved); otherwise it
+        raises ``SessionConflictError`` and nothing is written.
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str, expected_version: int | None = None) -> bool:
+        """Remove the session and its edit log; ``False`` if it didn't exist. Conditional like ``save``."""
+
+    @abstractmethod
+    def get_edits(self, session_id: str) -> list[CodeEdit]: ...
+
+    @abstractmethod
+    def list_summaries(
+        self,
+        status: str | None = None,
+        problem_id: str | None = None,
+        before: tuple[str, str] | None = None,
+        limit: int = 20,
+    ) -> list[SessionSummary]:
+        """Up to ``limit`` summaries ordered by ``(started_at, id)`` descending, strictly below ``before``."""
+
+    def compact(self) -> None:
+        """Reclaim space left by deleted sessions; run by the session compactor."""
+
+    def close(self) -> None:
+        pass
+
+
+class JsonSessionStore(SessionStore):
+    """One pretty-printed JSON document per session (the original storage format).
+
+    Summaries are appended to ``index.jsonl`` whenever a save changes them (deletes
+    append a tombstone), and read back incrementally, so listing never opens the
+    session files and sees saves made by other workers. A missing index is rebuilt
+    from the session files once; ``compact`` rewrites it without superseded lines.
+
+    Documents are written to a temporary file and renamed into place, so readers
+    never see a partial session. Compare-and-swap saves hold an exclusive ``flock``
+    on the directory's lock file between reading the stored version and renaming,
+    and so do index appends, so compaction can rewrite the index safely.
+
+    Because every save replaces the file, its (inode, mtime, size) identifies one
+    written version; ``get_version`` remembers the version seen under each and
+    only parses the document when the file has changed since.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._index_path = directory / JSON_INDEX_FILENAME
+        self._index = JsonlTail(self._index_path)
+        self._index_lines = 0  # lines read since the index was last rewritten
+        self._summaries: dict[str, SessionSummary] = {}
+        self._versions: dict[str, tuple[tuple[int, int, int], int]] = {}  # id -> (file identity, version)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # flock is per process, this is per thread
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Exclude other threads and processes writing to this directory."""
+        with self._write_lock, open(self.directory / ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # released when the file closes
+            yield
+
+    def _check_version(self, session_id: str, expected_version: int | None) -> Session | None:
+        stored = self.get(session_id)
+        if expected_version is not None:
+            stored_version = stored.version if stored else 0
+            if stored_version != expected_version:
+                raise SessionConflictError(session_id, stored_version)
+        return stored
+
+    def _append_index(self, record: dict) -> None:
+        """Caller holds ``_locked`` and ``_lock``."""
+        with open(self._index_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    @staticmethod
+    def _identity(stat: os.stat_result) -> tuple[int, int, int]:
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def get(self, session_id: str) -> Session | None:
+        path = self.directory / f"{session_id}.json"
+        try:
+            with open(path) as f:
+                session = Session(**json.load(f))
+                identity = self._identity(os.fstat(f.fileno()))
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._versions[session_id] = (identity, session.version)
+        return session
+
+    def get_version(self, session_id: str) -> int | None:
+        try:
+            identity = self._identity(os.stat(self.directory / f"{session_id}.json"))
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            known = self._versions.get(session_id)
+        if known is not None and known[0] == identity:
+            return known[1]
+        return super().get_version(session_id)
+
+    def save(self, session: Session, edits: Sequence[CodeEdit] = (), expected_version: int | None = None) -> None:
+        path = self.directory / f"{session.id}.json"
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(session.model_dump(), f, indent=2)
+        summary = summarize(session)
+        try:
+            with self._locked():
+                self._check_version(session.id, expected_version)
+                if edits:
+                    with open(self.directory / f"{session.id}.edits.jsonl", "a") as f:
+                        f.writelines(edit.model_dump_json(exclude_defaults=True) + "\n" for edit in edits)
+                os.replace(tmp, path)
+                identity = self._identity(os.stat(path))
+                with self._lock:
+                    self._versions[session.id] = (identity, session.version)
+                    self._sync_index()
+                    if self._summaries.get(session.id) != summary:
+                        self._append_index(summary.model_dump())
+                        self._summaries[session.id] = summary
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def delete(self, session_id: str, expected_version: int | None = None) -> bool:
+        with self._locked():
+            if self._check_version(session_id, expected_version) is None:
+                return False
+            (self.directory / f"{session_id}.edits.jsonl").unlink(missing_ok=True)
+            (self.directory / f"{session_id}.json").unlink()
+            with self._lock:
+                self._sync_index()
+                self._append_index({"id": session_id, "deleted": True})
+                self._summaries.pop(session_id, None)
+                self._versions.pop(session_id, None)
+        return True
+
+    def get_edits(self, session_id: str) -> list[CodeEdit]:
+        path = self.directory / f"{session_id}.edits.jsonl"
+        if not path.exists():
+            return []
+        with open(path) as f:
+            return [CodeEdit.model_validate_json(line) for line in f if line.strip()]
+
+    def list_summaries(
+        self,
+        status: str | None = None,
+        problem_id: str | None = None,
+        before: tuple[str, str] | None = None,
+        limit: int = 20,
+    ) -> list[SessionSummary]:
+        with self._lock:
+            self._sync_index()
+            summaries = list(self._summaries.values())
+        return page_summaries(summaries, status, problem_id, before, limit)
+
+    def compact(self) -> None:
+        """Rewrite the index with one line per live session once superseded lines outnumber them."""
+        with self._locked(), self._lock:
+            self._sync_index()
+            if self._index_lines > 2 * len(self._summaries) + 100:
+                self._write_index(list(self._summaries.values()))
+                self._sync_index()
+
+    def _sync_index(self) -> None:
+        """Apply index lines appended since the last call (by any process). Caller holds ``_lock``."""
+        if not self._index_path.exists():
+            self._rebuild_index()
+        restarted, records = self._index.read()
+        if restarted:
+            self._summaries, self._index_lines = {}, 0
+        self._index_lines += len(records)
+        for record in records:
+            if record.get("deleted"):
+                self._summaries.pop(record["id"], None)
+            else:
+                summary = SessionSummary(**record)
+                self._summaries[summary.id] = summary
+
+    def _rebuild_index(self) -> None:
+        summaries = []
+        for path in self.directory.glob("*.json"):
+            with open(path) as f:
+                summaries.append(summarize(Session(**json.load(f))))
+        self._write_index(summaries)
+        if summaries:
+            logger.info("Rebuilt the session index in %s from %d sessions", self.directory, len(summaries))
+
+    def _write_index(self, summaries: list[SessionSummary]) -> None:
+        tmp = self._index_path.with_name(f"{JSON_INDEX_FILENAME}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            f.writelines(summary.model_dump_json() + "\n" for summary in summaries)
+        os.replace(tmp, self._index_path)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    problem_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    score REAL,  -- overall score, for the session list
+    version INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL  -- the session as JSON, minus the transcript
+);
+CREATE TABLE IF NOT EXISTS interview_messages (
+    session_id TEXT NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS code_edits (
+    session_id TEXT NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    revision INTEGER NOT NULL,
+    edit TEXT NOT NULL,
+    PRIMARY KEY (session_id, revision)
+) WITHOUT ROWID;
+"""
+
+# Created after the ``score`` column migration. The session list pages by
+# (started_at, id), optionally within one status or problem; single-column
+# indexes on status and problem_id are covered by these and dropped.
+_INDEXES = """
+DROP INDEX IF EXISTS idx_sessions_problem_id;
+DROP INDEX IF EXISTS idx_sessions_status;
+DROP INDEX IF EXISTS idx_sessions_started_at;
+CREATE INDEX IF NOT EXISTS idx_sessions_started_at_id ON sessions (started_at, id);
+CREATE INDEX IF NOT EXISTS idx_sessions_status_started_at ON sessions (status, started_at, id);
+CREATE INDEX IF NOT EXISTS idx_sessions_problem_id_started_at ON sessions (problem_id, started_at, id);
+"""
+
+
+class SqliteSessionStore(SessionStore):
+    """Sessions in a SQLite database in WAL mode, so readers never block the writer.
+
+    The indexed columns (``problem_id``, ``status``, ``started_at``) are kept next to
+    the JSON document; the interview transcript lives in its own table and saves
+    only insert the messages added since the last save.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; WAL keeps the db consistent
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.execute("PRAGMA busy_timeout=5000")  # other workers' writes
+            self._conn.executescript(_SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+            if "score" not in columns:  # databases from before the session list
+                self._conn.execute("ALTER TABLE sessions ADD COLUMN score REAL")
+                self._conn.execute("UPDATE sessions SET score = json_extract(data, '$.score.overall_score')")
+            if "version" not in columns:  # databases from before versioned saves
+                self._conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            self._conn.executescript(_INDEXES)
+
+    def _load(self, row: tuple) -> Session:
+        session_id, data = row
+        messages = self._conn.execute(
+            "SELECT message FROM interview_messages WHERE session_id = ? ORDER BY seq", (session_id,)
+        ).fetchall()
+        return Session(**json.loads(data), interview_messages=[json.loads(m) for (m,) in messages])
+
+    def get(self, session_id: str) -> Session | None:
+        with self._lock:
+            row = self._conn.execute("SELECT id, data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            return self._load(row) if row else None
+
+    def get_version(self, session_id: str) -> int | None:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return row[0] if row else None
+
+    def save(self, session: Session, edits: Sequence[CodeEdit] = (), expected_version: int | None = None) -> None:
+        data = session.model_dump_json(exclude={"interview_messages"})
+        messages = [json.dumps(m) for m in session.interview_messages]
+        summary = summarize(session)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")  # takes the write lock, so the version check holds until COMMIT
+            try:
+                if expected_version is not None:
+                    row = self._conn.execute("SELECT version FROM sessions WHERE id = ?", (session.id,)).fetchone()
+                    stored_version = row[0] if row else 0
+                    if stored_version != expected_version:
+                        raise SessionConflictError(session.id, stored_version)
+                self._conn.execute(
+                    "INSERT INTO sessions (id, problem_id, status, started_at, score, version, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET problem_id = excluded.problem_id, status = excluded.status, "
+                    "started_at = excluded.started_at, score = excluded.score, version = excluded.version, "
+                    "data = excluded.data",
+                    (
+                        session.id,
+                        session.problem_id,
+                        session.status,
+                        session.started_at,
+                        summary.score,
+                        session.version,
+                        data,
+                    ),
+                )
+                self._save_messages(session.id, messages)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO code_edits (session_id, revision, edit) VALUES (?, ?, ?)",
+                    [(session.id, edit.revision, edit.model_dump_json(exclude_defaults=True)) for edit in edits],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _save_messages(self, session_id: str, messages: list[str]) -> None:
+        """Append new transcript messages; rewrite the transcript only if its stored prefix changed."""
+        (stored,) = self._conn.execute(
+            "SELECT COUNT(*) FROM interview_messages WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        keep = 0
+        if 0 < stored <= len(messages):
+            (last,) = self._conn.execute(
+                "SELECT message FROM interview_messages WHERE session_id = ? AND seq = ?", (session_id, stored - 1)
+            ).fetchone()
+            keep = stored if last == messages[stored - 1] else 0
+        if keep < stored:
+            self._conn.execute("DELETE FROM interview_messages WHERE session_id = ?", (session_id,))
+        self._conn.executemany(
+            "INSERT INTO interview_messages (session_id, seq, message) VALUES (?, ?, ?)",
+            [(session_id, seq, messages[seq]) for seq in range(keep, len(messages))],
+        )
+
+    def delete(self, session_id: str, expected_version: int | None = None) -> bool:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT version FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                if expected_version is not None and (row[0] if row else 0) != expected_version:
+                    raise SessionConflictError(session_id, row[0] if row else 0)
+                self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))  # cascades
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row is not None
+
+    def compact(self) -> None:
+        # Deleted rows' pages are reused by later inserts; this stops the WAL from holding on to them.
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def get_edits(self, session_id: str) -> list[CodeEdit]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT edit FROM code_edits WHERE session_id = ? ORDER BY revision", (session_id,)
+            ).fetchall()
+        return [CodeEdit.model_validate_json(edit) for (edit,) in rows]
+
+    def list_summaries(
+        self,
+        status: str | None = None,
+        problem_id: str | None = None,
+        before: tuple[str, str] | None = None,
+        limit: int = 20,
+    ) -> list[SessionSummary]:
+        where, params = [], []
+        if status is not None:
+            where.append("status = ?")
+            params.append(status)
+        if problem_id is not None:
+            where.append("problem_id = ?")
+            params.append(problem_id)
+        if before is not None:
+            where.append("(started_at, id) < (?, ?)")
+            params.extend(before)
+        sql = f"SELECT {', '.join(SessionSummary.model_fields)} FROM sessions"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY started_at DESC, id DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit)).fetchall()
+        return [SessionSummary(**dict(zip(SessionSummary.model_fields, row))) for row in rows]
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM sessions LIMIT 1").fetchone() is None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Retries when another worker saves again while the write-behind cache merges with it.
+MAX_MERGE_ATTEMPTS = 3
+
+
+def merge_sessions(base: Session, mine: Session, theirs: Session) -> Session | None:
+    """Three-way merge: ``theirs`` plus every field ``mine`` changed since ``base``.
+
+    Returns ``None`` if both sides changed a field to different values. The result's
+    version is above both inputs'.
+    """
+    base_data, mine_data, merged = base.model_dump(), mine.model_dump(), theirs.model_dump()
+    for field, value in mine_data.items():
+        if field == "version" or value == base_data[field]:
+            continue
+        if merged[field] not in (base_data[field], value):
+            return None
+        merged[field] = value
+    merged["version"] = max(mine.version, theirs.version) + 1
+    return Session(**merged)
+
+
+# The only fields a save may change and still be left for the flusher: the countdown
+# the arena autosaves every few seconds. Everything else is read by other workers'
+# requests (run and submit grade the stored code), so changing it writes through.
+WRITE_BEHIND_FIELDS = frozenset({"version", "time_remaining_seconds"})
+
+
+def _needs_write_through(previous: Session, session: Session) -> bool:
+    return any(
+        getattr(previous, field) != getattr(session, field)
+        for field in Session.model_fields
+        if field not in WRITE_BEHIND_FIELDS
+    )
+
+
+class WriteBehindSessionStore(SessionStore):
+    """Keeps hot sessions in memory and writes timer autosaves to ``inner`` at most every ``flush_interval``.
+
+    Callers get deep copies, so their edits only land through ``save``. A save that
+    changes anything but ``WRITE_BEHIND_FIELDS`` (creation, code, the interview,
+    submit, score) is written through immediately, so another worker that runs or
+    submits the session sees it; timer-only saves mark the session dirty for the
+    background flusher, so storage lags by at most ``flush_interval``. Evicting or
+    closing flushes first.
+
+    Other workers may share ``inner``, so before a cached copy is served or saved
+    over, its version is checked against ``inner``'s (``get_version``). A stale clean
+    copy is reloaded; unflushed changes are merged field by field onto the other
+    worker's version (``merge_sessions``), and every write to ``inner`` is itself
+    conditional on the version last read from or written to it. When both changed
+    the same field, theirs is kept and the session's next save raises
+    ``UnsavedChangesError``, so the client that was told its autosave succeeded
+    finds out and resends it.
+    """
+
+    def __init__(self, inner: SessionStore, flush_interval: float, max_sessions: int) -> None:
+        self.inner = inner
+        self.flush_interval = flush_interval
+        self.max_sessions = max(max_sessions, 1)
+        self._hot: OrderedDict[str, Session] = OrderedDict()
+        self._dirty: dict[str, float] = {}  # session id -> monotonic time it was first left unsaved
+        self._edits: dict[str, list[CodeEdit]] = {}  # code edits not yet appended to the inner log
+        self._persisted: dict[str, int | None] = {}  # session id -> version ``inner`` holds, as far as we know
+        self._base: dict[str, Session] = {}  # dirty session id -> the copy ``inner`` holds, to merge against
+        self._unsaved: dict[str, UnsavedChangesError] = {}  # acknowledged changes lost to a conflict, to report
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # serializes writes so an older copy never lands after a newer one
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="session-flusher", daemon=True)
+        self._flusher.start()
+
+    def _revalidate(self, session_id: str) -> None:
+        """Bring a cached copy up to date if another worker saved the session since we last read or wrote it."""
+        with self._lock:
+            if session_id not in self._hot:
+                return
+            persisted = self._persisted.get(session_id)
+        if self.inner.get_version(session_id) == persisted:
+            return
+        try:
+            self.flush([session_id])  # merges unflushed changes onto theirs
+        except SessionConflictError:
+            pass  # recorded for the session's next save
+        with self._lock:
+            if session_id not in self._dirty and self._persisted.get(session_id) == persisted:
+                self._hot.pop(session_id, None)  # clean but stale: reload from ``inner``
+                self._persisted.pop(session_id, None)
+
+    def get(self, session_id: str) -> Session | None:
+        self._revalidate(session_id)
+        with self._lock:
+            session = self._hot.get(session_id)
+            if session is not None:
+                self._hot.move_to_end(session_id)
+                return session.model_copy(deep=True)
+        session = self.inner.get(session_id)
+        if session is None:
+            return None
+        with self._lock:
+            if session_id not in self._hot:  # else keep a concurrent save's newer copy
+                self._hot[session_id] = session
+                self._persisted[session_id] = session.version
+            session = self._hot[session_id]
+            self._hot.move_to_end(session_id)
+            result = session.model_copy(deep=True)
+        self._evict()
+        return result
+
+    def save(self, session: Session, edits: Sequence[CodeEdit] = (), expected_version: int | None = None) -> None:
+        session = session.model_copy(deep=True)
+        self._revalidate(session.id)
+        with self._lock:
+            unsaved = self._unsaved.pop(session.id, None)
+            if unsaved is not None:
+                raise unsaved
+            previous = self._hot.get(session.id)
+            acknowledged = session.id in self._dirty  # earlier autosaves not yet in ``inner``
+            if previous is None:
+                self._persisted.setdefault(session.id, expected_version)  # let ``inner`` check it
+            elif expected_version is not None and previous.version != expected_version:
+                raise SessionConflictError(session.id, previous.version)
+            elif session.id not in self._dirty:
+                self._base[session.id] = previous  # clean, so it is what ``inner`` holds
+            self._hot[session.id] = session
+            self._hot.move_to_end(session.id)
+            self._dirty.setdefault(session.id, time.monotonic())
+            if edits:
+                self._edits.setdefault(session.id, []).extend(edits)
+        if previous is None or _needs_write_through(previous, session):
+            try:
+                self.flush([session.id])
+            except SessionConflictError:
+                with self._lock:
+                    unsaved = self._unsaved.pop(session.id, None)
+                if acknowledged and unsaved is not None:
+                    raise unsaved
+                raise  # only this save was lost, and the caller hasn't been told it succeeded
+        self._evict()
+
+    def delete(self, session_id: str, expected_version: int | None = None) -> bool:
+        with self._write_lock:  # no flush of this session is in flight
+            with self._lock:
+                cached = self._hot.get(session_id)
+                if cached is not None:
+                    if expected_version is not None and cached.version != expected_version:
+                        raise SessionConflictError(session_id, cached.version)
+                    expected_version = self._persisted.get(session_id)
+            try:
+                return self.inner.delete(session_id, expected_version)
+            finally:
+                with self._lock:  # deleted, or changed by another worker; either way the copy is stale
+                    self._hot.pop(session_id, None)
+                    self._dirty.pop(session_id, None)
+                    self._edits.pop(session_id, None)
+                    self._base.pop(session_id, None)
+                    self._persisted.pop(session_id, None)
+                    self._unsaved.pop(session_id, None)
+
+    def compact(self) -> None:
+        self.inner.compact()
+
+    def get_edits(self, session_id: str) -> list[CodeEdit]:
+        try:
+            self.flush([session_id])
+        except SessionConflictError:
+            pass  # recorded for the session's next save
+        return self.inner.get_edits(session_id)
+
+    def list_summaries(
+        self,
+        status: str | None = None,
+        problem_id: str | None = None,
+        before: tuple[str, str] | None = None,
+        limit: int = 20,
+    ) -> list[SessionSummary]:
+        # Summary fields only change on creation and state transitions, which are
+        # written through, so the inner store's index is current without a flush.
+        return self.inner.list_summaries(status, problem_id, before, limit)
+
+    def flush(self, session_ids: list[str] | None = None) -> int:
+        """Write dirty sessions (all, or just ``session_ids``) to the inner store; returns how many.
+
+        Sessions another worker changed meanwhile, in the same fields, are dropped from
+        the cache and, once the rest are written, reported with ``SessionConflictError``;
+        the session's next save raises ``UnsavedChangesError``.
+        """
+        written, conflict = 0, None
+        with self._write_lock:
+            with self._lock:
+                ids = [i for i in (self._dirty if session_ids is None else session_ids) if i in self._dirty]
+            for session_id in ids:
+                with self._lock:
+                    session = self._hot.get(session_id)
+                    self._dirty.pop(session_id, None)
+                    edits = self._edits.pop(session_id, [])
+                    base = self._base.pop(session_id, None)
+                    expected_version = self._persisted.get(session_id)
+                if session is None:
+                    continue
+                try:
+                    # cached copies are never mutated, so this is the latest state
+                    self.inner.save(session, edits, expected_version)
+                except SessionConflictError as e:
+                    if self._merge_into_inner(session, base, edits):
+                        written += 1
+                    else:
+                        self._discard(session_id, e.version)
+                        conflict = conflict or e
+                    continue
+                except BaseException:
+                    with self._lock:
+                        self._dirty.setdefault(session_id, time.monotonic())
+                        self._edits[session_id] = edits + self._edits.get(session_id, [])
+                        if base is not None:
+                            self._base.setdefault(session_id, base)
+                    raise
+                with self._lock:
+                    self._persisted[session_id] = session.version
+                written += 1
+        if conflict:
+            raise conflict
+        return written
+
+    def _merge_into_inner(self, mine: Session, base: Session | None, edits: list[CodeEdit]) -> bool:
+        """Write ``mine``'s changes since ``base`` over the version another worker saved. Caller holds ``_write_lock``."""
+        if base is None:
+            return False
+        for _ in range(MAX_MERGE_ATTEMPTS):
+            theirs = self.inner.get(mine.id)
+            merged = merge_sessions(base, mine, theirs) if theirs else None
+            if merged is None:
+                return False
+            try:
+                self.inner.save(merged, edits, theirs.version)
+            except SessionConflictError:
+                continue
+            with self._lock:
+                if self._hot.get(mine.id) is mine:
+                    self._hot[mine.id] = merged
+                    self._persisted[mine.id] = merged.version
+                else:  # saved again meanwhile; that copy lacks theirs too, so its flush must merge as well
+                    self._persisted[mine.id] = theirs.version
+            logger.info("Merged session %s with a concurrent save by another worker", mine.id)
+            return True
+        return False
+
+    def _discard(self, session_id: str, version: int | None) -> None:
+        with self._lock:
+            self._hot.pop(session_id, None)
+            self._dirty.pop(session_id, None)
+            self._edits.pop(session_id, None)
+            self._base.pop(session_id, None)
+            self._persisted.pop(session_id, None)
+            self._unsaved[session_id] = UnsavedChangesError(session_id, version)
+        logger.warning(
+            "Session %s was changed by another worker; its unflushed changes conflict and will be reported",
+            session_id,
+        )
+
+    def dirty_count(self) -> int:
+        with self._lock:
+            return len(self._dirty)
+
+    def _evict(self) -> None:
+        while True:
+            with self._lock:
+                if len(self._hot) <= self.max_sessions:
+                    return
+                victim = next(iter(self._hot))
+                if victim not in self._dirty:
+                    del self._hot[victim]
+                    self._persisted.pop(victim, None)
+                    continue
+            try:
+                self.flush([victim])
+            except SessionConflictError:
+                pass  # flush dropped it
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except SessionConflictError:
+                pass  # the conflicting sessions were dropped and logged
+            except Exception:
+                logger.exception("Session flush failed; will retry")
+
+    def close(self) -> None:
+        self._stop.set()
+        self._flusher.join(timeout=5)
+        try:
+            self.flush()
+        except SessionConflictError:
+            pass  # logged by ``_discard``
+        finally:
+            self.inner.close()
+
+
+_store: SessionStore | None = None
+_store_key: tuple | None = None
+_store_lock = threading.Lock()
+
+
+def import_json_sessions(directory: Path, store: SessionStore | None) -> tuple[int, list[str]]:
+    """Copy the JSON store's sessions in ``directory`` into ``store``; ``(imported, failures)``.
+
+    Sessions already in ``store`` are overwritten, so an import can be re-run. Each
+    session keeps its code edit log, or gets one seeded with its current code. With
+    ``store=None`` the files are only validated. The JSON files are left in place.
+    """
+    imported, failed = 0, []
+    for path in sorted(directory.glob("*.json")):
+        try:
+            with open(path) as f:
+                session = Session(**json.load(f))
+            edits = []
+            edits_path = directory / f"{session.id}.edits.jsonl"
+            if edits_path.exists():
+                with open(edits_path) as f:
+                    edits = [CodeEdit.model_validate_json(line) for line in f if line.strip()]
+        except (OSError, ValueError) as e:  # includes pydantic validation errors
+            failed.append(f"{path.name}: {e}")
+            continue
+        if store is not None:
+            # the edit log needs a snapshot for later revisions to replay from
+            store.save(session, edits or [CodeEdit(revision=session.code_revision, snapshot=session.code)])
+        imported += 1
+    return imported, failed
+
+
+def _open_backend(backend: str, directory: Path) -> SessionStore:
+    if backend == "json":
+        return JsonSessionStore(directory)
+    if backend == "sqlite":
+        path = directory / SQLITE_FILENAME
+        created = not path.exists()
+        store = SqliteSessionStore(path)
+        if created and any(directory.glob("*.json")):
+            # Upgrading from the JSON store: bring its sessions along instead of starting empty.
+            imported, failed = import_json_sessions(directory, store)
+            logger.info("Imported %d JSON sessions from %s into %s", imported, directory, path)
+            for failure in failed:
+                logger.warning("Could not import session %s", failure)
+        return store
+    raise ValueError(f"Unknown SESSION_STORE {backend!r} (expected 'sqlite' or 'json')")
+
+
+def _open_store(backend: str, directory: Path, flush_interval: float, cache_size: int) -> SessionStore:
+    store = _open_backend(backend, directory)
+    if flush_interval <= 0:
+        return store
+    return WriteBehindSessionStore(store, flush_interval, cache_size)
+
+
+def get_session_store() -> SessionStore:
+    """The configured store, reopened (after flushing the old one) if its settings changed."""
+    global _store, _store_key
+    key = (
+        settings.session_store,
+        BACKEND_DIR / settings.sessions_dir,
+        settings.session_flush_interval,
+        settings.session_cache_size,
+    )
+    with _store_lock:
+        if _store is None or _store_key != key:
+            if _store is not None:
+                _store.close()
+            _store, _store_key = _open_store(*key), key
+        return _store
+
+
+def shutdown_session_store() -> None:
+    global _store, _store_key
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+        _store, _store_key = None, None
@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator
+from contextlib import aclosing, contextmanager
+from pathlib import Path
+
+from app.config import BACKEND_DIR, settings
+from app.models.problem import Problem
+from app.services.ai_service import AI_SERVICE_ERRORS, AIServiceError, chat_completion_stream
+
+logger = logging.getLogger(__name__)
+
+SOLUTION_PROMPT = """You are an expert Python programmer and educator.
+Generate a clean, well-commented solution for the following coding problem.
+
+**CRITICAL FORMAT RULES — follow exactly:**
+1. Start with a block of comments explaining:
+   - What the problem is asking (1-2 lines)
+   - The approach/algorithm you will use (2-4 lines)
+   - Time and space complexity (1-2 lines)
+   - Key steps of the solution (numbered list)
+2. Then write the actual code with inline comments on non-obvious lines.
+3. Output ONLY valid Python code (with comments). No markdown, no backticks, no explanation outside of comments.
+4. The function signature must match the starter code exactly.
+
+Problem: {title}
+{description}
+
+Constraints: {constraints}
+
+Starter code:
+{starter_code}
+
+Examples:
+{examples}"""
+
+_memory: OrderedDict[str, tuple[str, str]] = OrderedDict()  # problem id -> (content hash, solution)
+_memory_lock = threading.Lock()
+
+
+class _Generation:
+    """One upstream generation, shared by every request for the same problem while it runs.
+
+    Chunks are kept as they arrive so a stream that joins late replays what it
+    missed and then follows along; ``result`` waits for the whole text. Once the
+    last listener has gone away the upstream call is cancelled, so an abandoned
+    request doesn't keep a gateway connection busy.
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.chunks: list[str] = []
+        self.error: Exception | None = None
+        self.finished = False
+        self.task: asyncio.Task | None = None
+        self._listeners = 0
+        self._changed = asyncio.Condition()
+
+    async def run(self, problem: Problem) -> None:
+        try:
+            stream = chat_completion_stream(
+                build_solution_messages(problem), temperature=0.3, max_tokens=4096, timeout=120.0
+            )
+            async with aclosing(stream) as chunks:
+                async for chunk in chunks:
+                    async with self._changed:
+                        self.chunks.append(chunk)
+                        self._changed.notify_all()
+        except asyncio.CancelledError:
+            logger.info("Solution generation for %s cancelled: no one is listening", problem.id)
+            self.error = AIServiceError("Solution generation was cancelled")
+            raise
+        except AI_SERVICE_ERRORS as e:
+            logger.error("Solution generation failed for %s: %s", problem.id, e)
+            self.error = e
+        except Exception as e:  # handed to every listener, which re-raises it
+            logger.exception("Solution generation crashed for %s", problem.id)
+            self.error = e
+        else:
+            if settings.openrouter_api_key:  # don't cache the "not configured" placeholder
+                _remember(problem.id, self.key, strip_fences("".join(self.chunks)))
+        finally:
+            self._forget()
+            async with self._changed:
+                self.finished = True
+                self._changed.notify_all()
+
+    def _forget(self) -> None:
+        if _inflight.get(self.key) is self:
+            del _inflight[self.key]
+
+    @contextmanager
+    def _listening(self) -> Iterator[None]:
+        self._listeners += 1
+        try:
+            yield
+        finally:
+            self._listeners -= 1
+            if not self._listeners and not self.finished and self.task is not None:
+                self._forget()  # later requests start afresh instead of joining a cancelled call
+                self.task.cancel()
+
+    async def follow(self) -> AsyncIterator[str]:
+        with self._listening():
+            sent = 0
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda sent=sent: self.finished or len(self.chunks) > sent)
+                    chunks, finished = self.chunks[sent:], self.finished
+                for chunk in chunks:
+                    yield chunk
+                sent += len(chunks)
+                if finished:
+                    if self.error is not None:
+                        raise self.error
+                    return
+
+    async def result(self) -> str:
+        with self._listening():
+            async with self._changed:
+                await self._changed.wait_for(lambda: self.finished)
+        if self.error is not None:
+            raise self.error
+        return strip_fences("".join(self.chunks))
+
+
+_inflight: dict[str, _Generation] = {}  # content hash -> generation in progress
+
+
+def build_solution_messages(problem: Problem) -> list[dict]:
+    examples_text = "\n".join(
+        f"  Input: {ex.get('input', '')}  Output: {ex.get('output', '')}" for ex in problem.examples
+    )
+    prompt = SOLUTION_PROMPT.format(
+        title=problem.title,
+        description=problem.description,
+        constraints=", ".join(problem.constraints),
+        starter_code=problem.starter_code,
+        examples=examples_text,
+    )
+    return [
+        {"role": "system", "content": prompt},
+        {"role": "user", "content": "Generate the solution now."},
+    ]
+
+
+def strip_fences(solution: str) -> str:
+    """Strip markdown code fences if the AI added them."""
+    solution = solution.strip()
+    if solution.startswith("```python"):
+        solution = solution[len("```python") :].strip()
+    if solution.startswith("```"):
+        solution = solution[3:].strip()
+    if solution.endswith("```"):
+        solution = solution[:-3].strip()
+    return solution
+
+
+def content_hash(problem: Problem) -> str:
+    """Version of a generated solution: changes when the problem, the prompt or the model does."""
+    payload = json.dumps([problem.model_dump(mode="json"), SOLUTION_PROMPT, settings.openrouter_model])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _disk_path(problem_id: str) -> Path | None:
+    if not settings.solution_cache_dir:
+        return None
+    return BACKEND_DIR / settings.solution_cache_dir / f"{problem_id}.json"
+
+
+def _remember_in_memory(problem_id: str, key: str, solution: str) -> None:
+    with _memory_lock:
+        _memory[problem_id] = (key, solution)
+        _memory.move_to_end(problem_id)
+        while len(_memory) > settings.solution_cache_size:
+            _memory.popitem(last=False)
+
+
+def _remember(problem_id: str, key: str, solution: str) -> None:
+    _remember_in_memory(problem_id, key, solution)
+    path = _disk_path(problem_id)
+    if path is None:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"content_hash": key, "solution": solution}))
+        tmp.replace(path)
+    except OSError as e:
+        logger.warning("Could not cache the solution for %s: %s", problem_id, e)
+
+
+def cached_solution(problem: Problem) -> str | None:
+    """The problem's bundled solution, else a generated one cached for its current content."""
+    if problem.solution:
+        return problem.solution
+    key = content_hash(problem)
+    with _memory_lock:
+        entry = _memory.get(problem.id)
+        if entry is not None and entry[0] == key:
+            _memory.move_to_end(problem.id)
+            return entry[1]
+    path = _disk_path(problem.id)
+    if path is None:
+        return None
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("content_hash") != key or not isinstance(data.get("solution"), str):
+        return None  # generated for an older version of the problem
+    _remember_in_memory(problem.id, key, data["solution"])
+    return data["solution"]
+
+
+def _generation(problem: Problem) -> _Generation:
+    """The running generation for this problem, or a newly started one."""
+    key = content_hash(problem)
+    generation = _inflight.get(key)
+    if generation is None:
+        generation = _inflight[key] = _Generation(key)
+        # a task of its own, so one client disconnecting doesn't abort it for the others
+        generation.task = asyncio.get_running_loop().create_task(generation.run(problem))
+    return generation
+
+
+async def get_solution(problem: Problem) -> str:
+    """A reference solution, generated by the LLM only if none is bundled or cached.
+
+    Concurrent calls for the same problem share one upstream request. Raises
+    whatever the LLM call raised.
+    """
+    solution = cached_solution(problem)
+    if solution is not None:
+        return solution
+    return await _generation(problem).result()
+
+
+async def stream_solution(problem: Problem) -> AsyncIterator[str]:
+    """``get_solution`` as text chunks: cached solutions are replayed a line at a time, new ones
+    streamed as the LLM writes them."""
+    solution = cached_solution(problem)
+    if solution is not None:
+        for line in solution.splitlines(keepends=True):
+            yield line
+        return
+    async with aclosing(_generation(problem).follow()) as chunks:
+        async for chunk in chunks:
+            yield chunk
@@ -0,0 +1,32 @@
+import logging
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+
+async def until_disconnected(request: Request, events: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Relay ``events`` while the client is still there, then close them.
+
+    Closing the generator unwinds whatever it is awaiting, which closes the
+    upstream LLM stream and frees its gateway connection. Under uvicorn Starlette
+    already cancels the response as soon as the client disconnects; checking
+    between events also covers servers that only report it on the next write.
+    """
+    async with aclosing(events):
+        async for event in events:
+            if await request.is_disconnected():
+                logger.info("Client left %s; cancelling the stream", request.url.path)
+                return
+            yield event
+
+
+def sse_response(request: Request, events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        until_disconnected(request, events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
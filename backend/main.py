@@ -1,10 +1,37 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.config import settings
-from app.routers import problems, sessions, execution, interview, scoring, code_chat
+from app.routers import admin, problems, sessions, execution, interview, scoring, code_chat
+from app.sandbox.pool import get_pool, shutdown_pool
+from app.services.ai_service import close_ai_client, get_ai_client
+from app.services.execution_queue import get_scheduler, shutdown_scheduler
+from app.services.problem_service import start_problem_watcher, stop_problem_watcher
+from app.services.session_archive import start_session_compactor, stop_session_compactor
+from app.services.session_store import SessionConflictError, shutdown_session_store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_pool()  # pre-spawn warm sandbox workers before the first request
+    get_scheduler()
+    get_ai_client()
+    start_problem_watcher()
+    start_session_compactor()
+    yield
+    stop_session_compactor()
+    stop_problem_watcher()
+    # Running jobs save their results, so the session store closes after they finish.
+    shutdown_scheduler()
+    shutdown_pool()
+    shutdown_session_store()
+    await close_ai_client()
+
 
-app = FastAPI(title="CodeDrill", version="1.0.0")
+app = FastAPI(title="CodeDrill", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,12 +41,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(SessionConflictError)
+async def session_conflict_handler(request: Request, exc: SessionConflictError):
+    """Any endpoint that saves a session: the client should reload it and retry."""
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+
 app.include_router(problems.router)
 app.include_router(sessions.router)
 app.include_router(execution.router)
 app.include_router(interview.router)
 app.include_router(scoring.router)
 app.include_router(code_chat.router)
+app.include_router(admin.router)
 
 
 @app.get("/api/health")
@@ -0,0 +1,61 @@
+import asyncio
+
+import httpx
+import pytest
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    """Route the shared AI client to an in-process fake gateway; yields the requests it received."""
+    from app.services import ai_service
+
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if b'"stream": true' in request.content or b'"stream":true' in request.content:
+            body = 'data: {"choices":[{"delta":{"content":"Hel"}}]}\n\ndata: {"choices":[{"delta":{"content":"lo"}}]}\n\ndata: [DONE]\n\n'
+            return httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})
+        return httpx.Response(200, json={"choices": [{"message": {"content": "Hello"}}]})
+
+    monkeypatch.setattr("app.config.settings.openrouter_api_key", "test-key")
+    monkeypatch.setattr(ai_service, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    yield requests
+    asyncio.run(ai_service.close_ai_client())
+
+
+class TestSharedClient:
+    def test_calls_reuse_one_client(self, gateway):
+        from app.services.ai_service import chat_completion, chat_completion_stream, get_ai_client
+
+        async def run():
+            client = get_ai_client()
+            reply = await chat_completion([{"role": "user", "content": "hi"}])
+            chunks = [chunk async for chunk in chat_completion_stream([{"role": "user", "content": "hi"}])]
+            assert get_ai_client() is client
+            return reply, chunks
+
+        reply, chunks = asyncio.run(run())
+        assert reply == "Hello"
+        assert chunks == ["Hel", "lo"]
+        assert len(gateway) == 2
+        assert all(r.headers["Authorization"] == "Bearer test-key" for r in gateway)
+
+    def test_closed_client_is_reopened(self, gateway):
+        from app.services.ai_service import close_ai_client, get_ai_client
+
+        client = get_ai_client()
+        asyncio.run(close_ai_client())
+        assert client.is_closed
+        assert get_ai_client() is not client
+
+    def test_http2_only_with_h2_installed(self, monkeypatch):
+        import importlib.util
+
+        from app.services import ai_service
+
+        monkeypatch.setattr(ai_service, "_client", None)
+        monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+        client = ai_service.get_ai_client()  # must not fail without h2
+        assert not client._transport._pool._http2
+        asyncio.run(ai_service.close_ai_client())
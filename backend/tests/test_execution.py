@@ -1,13 +1,26 @@
+import json
+
 import pytest
 
+EXECUTE_ENDPOINTS = ["/api/execute/run", "/api/execute/submit", "/api/execute/run/stream", "/api/execute/submit/stream"]
+
+
+def _sse_events(text: str) -> list:
+    events = []
+    for block in text.split("\n\n"):
+        if block.startswith("data: "):
+            payload = block[len("data: ") :]
+            events.append(payload if payload == "[DONE]" else json.loads(payload))
+    return events
+
 
 class TestExecution:
-    @pytest.mark.parametrize("endpoint", ["/api/execute/run", "/api/execute/submit"])
+    @pytest.mark.parametrize("endpoint", EXECUTE_ENDPOINTS)
     def test_execute_nonexistent_session(self, client, endpoint):
         res = client.post(endpoint, json={"session_id": "nonexistent"})
         assert res.status_code == 404
 
-    @pytest.mark.parametrize("endpoint", ["/api/execute/run", "/api/execute/submit"])
+    @pytest.mark.parametrize("endpoint", EXECUTE_ENDPOINTS)
     def test_execute_missing_body(self, client, endpoint):
         res = client.post(endpoint)
         assert res.status_code == 422  # validation error
@@ -22,3 +35,557 @@ class TestExecution:
     def test_execute_wrong_method(self, client, endpoint, method):
         res = client.request(method, endpoint)
         assert res.status_code == 405
+
+
+TWO_SUM_SOLUTION = """
+def two_sum(nums: list[int], target: int) -> list[int]:
+    seen = {}
+    for i, n in enumerate(nums):
+        if target - n in seen:
+            return [seen[target - n], i]
+        seen[n] = i
+"""
+
+
+@pytest.fixture
+def two_sum_session(client) -> str:
+    session_id = client.post("/api/sessions", json={"problem_id": "two-sum"}).json()["id"]
+    client.put(f"/api/sessions/{session_id}", json={"code": TWO_SUM_SOLUTION})
+    return session_id
+
+
+class TestRunCode:
+    def test_run_passes_visible_tests(self, client, two_sum_session):
+        res = client.post("/api/execute/run", json={"session_id": two_sum_session})
+        assert res.status_code == 200
+        data = res.json()
+        assert data["all_passed"] is True
+        assert [r["test_index"] for r in data["results"]] == list(range(len(data["results"])))
+
+    def test_submit_saves_results(self, client, two_sum_session):
+        res = client.post("/api/execute/submit", json={"session_id": two_sum_session})
+        assert res.json()["all_passed"] is True
+        session = client.get(f"/api/sessions/{two_sum_session}").json()
+        assert session["status"] == "submitted"
+        assert len(session["test_results"]) == len(res.json()["results"])
+
+    def test_blocked_import_fails_every_test(self, client, two_sum_session):
+        client.put(f"/api/sessions/{two_sum_session}", json={"code": "import os\n" + TWO_SUM_SOLUTION})
+        data = client.post("/api/execute/run", json={"session_id": two_sum_session}).json()
+        assert data["all_passed"] is False
+        assert all("Blocked import" in r["error"] for r in data["results"])
+
+
+COUNTER_SOLUTION = """
+class Counter:
+    def __init__(self):
+        self.total = 0
+
+    def add(self, n):
+        self.total += n
+        return self
+"""
+
+
+class TestPrecompiledTests:
+    def _run(self, tests: list[tuple[str, str]]):
+        from app.sandbox.runner import run_code
+
+        return run_code(COUNTER_SOLUTION, [{"input": i, "expected": e} for i, e in tests], use_cache=False)
+
+    def test_multi_statement_input_uses_trailing_expression(self):
+        results = self._run([("c = Counter()\nc.add(2).add(3)\nc.total", "5")])
+        assert results[0].passed, results[0].error
+        assert results[0].actual == "5"
+
+    def test_trailing_expression_inside_try(self):
+        source = "try:\n    Counter().add('x')\nexcept TypeError:\n    'caught'"
+        results = self._run([(source, "'caught'")])
+        assert results[0].passed, results[0].error
+
+    def test_non_literal_expected_is_evaluated_in_sandbox(self):
+        results = self._run([("Counter().add(1).total", "Counter().add(1).total")])
+        assert results[0].passed
+        assert results[0].expected == "1"
+
+    def test_input_cannot_clobber_harness_state(self):
+        results = self._run([("for i in range(5):\n    pass\ni", "4"), ("i", "4")])
+        assert [r.test_index for r in results] == [0, 1]
+        assert all(r.passed for r in results)
+
+    def test_solution_cannot_disable_the_test_timeout(self, monkeypatch):
+        from app.sandbox.runner import run_code
+
+        monkeypatch.setattr("app.config.settings.sandbox_test_timeout", 0.5)
+        code = (
+            "_perf_counter = lambda: 0.0\n"
+            "class _signal:\n"
+            "    ITIMER_REAL = 0\n"
+            "    def setitimer(*args):\n"
+            "        pass\n"
+        )
+        tests = [{"input": "while True: pass", "expected": "None"}, {"input": "1", "expected": "1"}]
+        results = run_code(code, tests, use_cache=False)
+        assert results[0].error == "Time limit exceeded (0.5s per test)"
+        assert results[0].wall_time_ms >= 400
+        assert results[1].passed
+
+    def test_syntax_error_is_reported_per_test(self):
+        results = self._run([("Counter(", "0"), ("Counter().total", "0")])
+        assert not results[0].passed
+        assert "never closed" in results[0].error or "syntax" in results[0].error
+        assert results[1].passed
+
+    def test_recompiles_when_sandbox_interpreter_differs(self, monkeypatch):
+        from types import SimpleNamespace
+
+        from app.sandbox import precompile
+
+        monkeypatch.setattr(precompile, "sys", SimpleNamespace(implementation=SimpleNamespace(cache_tag="other-99")))
+        results = self._run([("c = Counter()\nc.add(4)\nc.total", "4"), ("Counter(", "0")])
+        assert results[0].passed, results[0].error
+        assert results[1].error
+
+    def test_compiled_tests_are_cached(self):
+        from app.sandbox.precompile import compile_test
+
+        assert compile_test("Counter().total", "0") is compile_test("Counter().total", "0")
+
+
+SLEEPY_TEST = {
+    "input": "import time\nstart = (time.time(), time.monotonic())\ntime.sleep(30)\n"
+    "(time.time() - start[0], time.monotonic() - start[1])",
+    "expected": "(30.0, 30.0)",
+}
+
+
+class TestVirtualClock:
+    def test_sleep_advances_instantly(self):
+        from app.sandbox.runner import run_code
+
+        result = run_code("", [SLEEPY_TEST], use_cache=False, virtual_clock=True)[0]
+        assert result.passed, result.error
+        assert result.wall_time_ms < 1000
+
+    def test_asyncio_sleep_advances_instantly(self):
+        from app.sandbox.runner import run_code
+
+        code = (
+            "import asyncio, time\n\n"
+            "async def waits():\n"
+            "    start = time.monotonic()\n"
+            "    await asyncio.gather(asyncio.sleep(30), asyncio.sleep(10))\n"
+            "    try:\n"
+            "        await asyncio.wait_for(asyncio.sleep(60), timeout=5)\n"
+            "    except asyncio.TimeoutError:\n"
+            "        pass\n"
+            "    return time.monotonic() - start\n"
+        )
+        tests = [{"input": "asyncio.run(waits())", "expected": "35.0"}]
+        result = run_code(code, tests, use_cache=False, virtual_clock=True)[0]
+        assert result.passed, result.error
+        assert result.wall_time_ms < 1000
+
+    def test_real_clock_by_default(self, monkeypatch):
+        from app.sandbox.runner import run_code
+
+        monkeypatch.setattr("app.config.settings.sandbox_test_timeout", 0.5)
+        result = run_code("", [SLEEPY_TEST], use_cache=False)[0]
+        assert result.error.startswith("Time limit exceeded")
+
+    def test_negative_sleep_still_raises(self):
+        from app.sandbox.runner import run_code
+
+        result = run_code("import time", [{"input": "time.sleep(-1)", "expected": "None"}], virtual_clock=True)[0]
+        assert "non-negative" in result.error
+
+    def test_time_imports_are_cacheable_only_on_virtual_clock(self):
+        from app.sandbox.cache import cache_key, is_cacheable
+
+        tests = [{"input": "f()", "expected": "1"}]
+        assert not is_cacheable("import time", tests)
+        assert is_cacheable("import time", tests, virtual_clock=True)
+        assert not is_cacheable("import time, random", tests, virtual_clock=True)
+        assert cache_key("x", tests) != cache_key("x", tests, virtual_clock=True)
+
+    def test_flagged_problem_runs_on_virtual_clock(self, client):
+        from pathlib import Path
+
+        data = json.loads((Path(__file__).parent.parent / "data/problems/fastapi/rate-limiter.json").read_text())
+        assert data["virtual_clock"] is True
+
+        session_id = client.post("/api/sessions", json={"problem_id": "rate-limiter"}).json()["id"]
+        client.put(f"/api/sessions/{session_id}", json={"code": data["solution"]})
+        body = client.post("/api/execute/submit", json={"session_id": session_id, "use_cache": False}).json()
+        assert body["all_passed"], [r["error"] for r in body["results"]]
+        assert all(r["wall_time_ms"] < 20 for r in body["results"])
+
+
+class TestStreamingExecution:
+    def test_run_stream_emits_each_result_then_summary(self, client, two_sum_session):
+        res = client.post("/api/execute/run/stream", json={"session_id": two_sum_session})
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("text/event-stream")
+        events = _sse_events(res.text)
+        results = [e["result"] for e in events if isinstance(e, dict) and "result" in e]
+        assert results and all(r["passed"] for r in results)
+        assert events[-2] == {"all_passed": True, "error": None}
+        assert events[-1] == "[DONE]"
+
+    def test_submit_stream_saves_results(self, client, two_sum_session):
+        res = client.post("/api/execute/submit/stream", json={"session_id": two_sum_session})
+        results = [e["result"] for e in _sse_events(res.text) if isinstance(e, dict) and "result" in e]
+        session = client.get(f"/api/sessions/{two_sum_session}").json()
+        assert session["status"] == "submitted"
+        assert len(session["test_results"]) == len(results)
+
+    def test_timeout_keeps_results_of_finished_tests(self, client, two_sum_session, monkeypatch):
+        monkeypatch.setattr("app.config.settings.sandbox_timeout", 1)
+        hanging = TWO_SUM_SOLUTION.replace("    seen = {}", "    while nums == [3, 2, 4]:\n        pass\n    seen = {}")
+        client.put(f"/api/sessions/{two_sum_session}", json={"code": hanging})
+
+        results = client.post("/api/execute/run", json={"session_id": two_sum_session}).json()["results"]
+        assert results[0]["passed"] is True
+        assert results[0]["error"] is None
+        assert results[1]["passed"] is False
+        assert "Time limit exceeded" in results[1]["error"]
+
+
+class TestResourceLimits:
+    def test_slow_test_fails_on_its_own(self, client, two_sum_session, monkeypatch):
+        monkeypatch.setattr("app.config.settings.sandbox_test_timeout", 0.5)
+        hanging = TWO_SUM_SOLUTION.replace("    seen = {}", "    while nums == [3, 2, 4]:\n        pass\n    seen = {}")
+        client.put(f"/api/sessions/{two_sum_session}", json={"code": hanging})
+
+        results = client.post("/api/execute/submit", json={"session_id": two_sum_session}).json()["results"]
+        assert results[1]["error"] == "Time limit exceeded (0.5s per test)"
+        assert all(r["passed"] for i, r in enumerate(results) if i != 1)
+
+    def test_results_report_per_test_metrics(self, client, two_sum_session):
+        results = client.post("/api/execute/run", json={"session_id": two_sum_session}).json()["results"]
+        for r in results:
+            assert r["wall_time_ms"] >= 0
+            assert r["cpu_time_ms"] >= 0
+            assert r["peak_rss_kb"] > 0
+
+    def test_memory_limit_is_enforced(self, client, two_sum_session):
+        greedy = TWO_SUM_SOLUTION.replace("    seen = {}", "    blob = bytearray(2 * 1024**3)\n    seen = {}")
+        client.put(f"/api/sessions/{two_sum_session}", json={"code": greedy})
+
+        results = client.post("/api/execute/run", json={"session_id": two_sum_session}).json()["results"]
+        assert all(r["error"].startswith("Memory limit exceeded") for r in results)
+
+
+def _result(index: int):
+    from app.models.session import SubmissionResult
+
+    return SubmissionResult(test_index=index, passed=True, input="x", expected="1", actual="1")
+
+
+class TestResultCache:
+    def test_repeat_run_is_served_from_cache(self, client, two_sum_session):
+        before = client.get("/api/execute/stats").json()["cache"]
+        first = client.post("/api/execute/run", json={"session_id": two_sum_session}).json()
+        second = client.post("/api/execute/run", json={"session_id": two_sum_session}).json()
+        after = client.get("/api/execute/stats").json()["cache"]
+        assert second == first
+        assert after["memory_hits"] > before["memory_hits"]
+
+    def test_opt_out_skips_cache(self, client, two_sum_session):
+        client.post("/api/execute/run", json={"session_id": two_sum_session})
+        before = client.get("/api/execute/stats").json()["cache"]
+        client.post("/api/execute/run", json={"session_id": two_sum_session, "use_cache": False})
+        after = client.get("/api/execute/stats").json()["cache"]
+        assert after["memory_hits"] == before["memory_hits"]
+
+    @pytest.mark.parametrize(
+        "code, cacheable",
+        [
+            ("def f(): return 1", True),
+            ("import time\ndef f(): return time.time()", False),
+            ("from random import randint", False),
+            ("import os, datetime", False),
+            ("import timeit", True),
+        ],
+    )
+    def test_nondeterministic_imports_are_not_cacheable(self, code, cacheable):
+        from app.sandbox.cache import is_cacheable
+
+        assert is_cacheable(code, [{"input": "f()", "expected": "1"}]) is cacheable
+
+    def test_key_ignores_trailing_whitespace(self):
+        from app.sandbox.cache import cache_key
+
+        tests = [{"input": "f()", "expected": "1"}]
+        assert cache_key("def f():\r\n    return 1  \n\n", tests) == cache_key("def f():\n    return 1", tests)
+
+    def test_lru_evicts_by_size(self):
+        from app.sandbox.cache import ResultCache
+
+        cache = ResultCache(max_bytes=300)  # room for two ~145-byte entries
+        cache.put("a", [_result(0)])
+        cache.put("b", [_result(1)])
+        assert cache.get("a") is not None  # "a" is now most recently used
+        cache.put("c", [_result(2)])
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] >= 1
+
+    def test_disk_tier_survives_memory_clear(self, tmp_path):
+        from app.sandbox.cache import ResultCache
+
+        cache = ResultCache(max_bytes=10**6, disk_dir=str(tmp_path), disk_max_bytes=10**6)
+        cache.put("k" * 64, [_result(0)])
+        cache.clear()
+        assert cache.get("k" * 64) == [_result(0)]
+        assert cache.stats()["disk_hits"] == 1
+
+
+class TestShardedSubmit:
+    def test_sharded_submit_matches_serial(self, client, two_sum_session):
+        serial = client.post("/api/execute/submit", json={"session_id": two_sum_session, "sharded": False}).json()
+        sharded = client.post("/api/execute/submit", json={"session_id": two_sum_session, "sharded": True}).json()
+        assert sharded["all_passed"] == serial["all_passed"]
+        assert [(r["test_index"], r["actual"]) for r in sharded["results"]] == [
+            (r["test_index"], r["actual"]) for r in serial["results"]
+        ]
+
+    def test_shards_map_back_to_original_indices(self):
+        from app.sandbox.runner import run_code_sharded
+
+        tests = [{"input": f"double({i})", "expected": str(i * 2 if i != 3 else -1)} for i in range(7)]
+        results = run_code_sharded("def double(x):\n    return x * 2", tests, shards=3, use_cache=False)
+        assert [r.test_index for r in results] == list(range(7))
+        assert [r.passed for r in results] == [i != 3 for i in range(7)]
+        assert [r.input for r in results] == [t["input"] for t in tests]
+
+    @pytest.mark.parametrize("test_count, cores, expected", [(14, 4, 4), (2, 16, 2), (0, 4, 1), (30, 64, 8)])
+    def test_shard_count_follows_tests_and_cores(self, monkeypatch, test_count, cores, expected):
+        from app.sandbox.runner import choose_shard_count
+
+        monkeypatch.setattr("os.cpu_count", lambda: cores)
+        monkeypatch.setattr("app.config.settings.sandbox_pool_size", 0)
+        assert choose_shard_count(test_count) == expected
+
+    @pytest.mark.parametrize("pool_size, concurrency, expected", [(4, 4, 1), (16, 4, 4), (16, 1, 8), (3, 4, 1)])
+    def test_shard_count_leaves_pool_workers_for_other_jobs(self, monkeypatch, pool_size, concurrency, expected):
+        from app.sandbox.runner import choose_shard_count
+
+        monkeypatch.setattr("os.cpu_count", lambda: 64)
+        monkeypatch.setattr("app.config.settings.sandbox_pool_size", pool_size)
+        monkeypatch.setattr("app.config.settings.execution_max_concurrency", concurrency)
+        assert choose_shard_count(30) == expected
+
+
+QUADRATIC_TWO_SUM = """
+def two_sum(nums, target):
+    for i in range(len(nums)):
+        for j in range(i + 1, len(nums)):
+            if nums[i] + nums[j] == target:
+                return [i, j]
+"""
+
+
+def _check(sizes: list[int], target: str = "O(n)"):
+    from app.models.problem import ComplexityCheck
+
+    generator = "def generate(n):\n    return (list(range(n)), 2 * n - 3)\n"
+    return ComplexityCheck(function="two_sum", generator=generator, sizes=sizes, target=target)
+
+
+class TestPerformanceCheck:
+    SIZES = (1000, 2000, 4000, 8000, 16000, 32000)
+
+    @pytest.mark.parametrize(
+        "growth, expected",
+        [
+            (lambda n: 5e-7, "O(1)"),
+            (lambda n: 1e-7 * n.bit_length(), "O(log n)"),
+            (lambda n: 1e-7 * n, "O(n)"),
+            (lambda n: 1e-7 * n * n.bit_length(), "O(n log n)"),
+            (lambda n: 1e-9 * n * n, "O(n^2)"),
+            (lambda n: 1e-12 * n**3, "O(n^3)"),
+        ],
+    )
+    def test_fit_recovers_growth_class(self, growth, expected):
+        from app.sandbox.complexity import fit_complexity
+
+        assert fit_complexity(self.SIZES, [growth(n) for n in self.SIZES]) == expected
+
+    def test_fit_ignores_a_single_outlier(self):
+        from app.sandbox.complexity import fit_complexity
+
+        seconds = [1e-7 * n for n in self.SIZES]
+        seconds[3] *= 4
+        assert fit_complexity(self.SIZES, seconds) == "O(n)"
+
+    def test_fit_needs_three_sizes(self):
+        from app.sandbox.complexity import fit_complexity
+
+        assert fit_complexity([1000, 2000], [1e-4, 2e-4]) is None
+
+    @pytest.mark.parametrize(
+        "target, growth, verdict",
+        [
+            ("O(n)", lambda n: 1e-7 * n, "pass"),
+            ("O(n log n)", lambda n: 1e-7 * n, "pass"),
+            ("O(n)", lambda n: 1e-7 * n * n.bit_length(), "pass"),  # a log factor is within timing noise
+            ("O(n)", lambda n: 1e-8 * n**1.3, "borderline"),
+            ("O(n)", lambda n: 1e-9 * n * n, "fail"),
+        ],
+    )
+    def test_verdict_against_target(self, target, growth, verdict):
+        from app.models.session import ComplexityTiming
+        from app.sandbox.complexity import build_report
+
+        timings = [ComplexityTiming(n=n, seconds=growth(n)) for n in self.SIZES]
+        assert build_report(target, timings).verdict == verdict
+
+    def test_noisy_linear_timings_always_pass(self):
+        import random
+
+        from app.models.session import ComplexityTiming
+        from app.sandbox.complexity import build_report
+
+        rng = random.Random(7)
+        for _ in range(200):
+            timings = [ComplexityTiming(n=n, seconds=1e-7 * n * rng.uniform(0.85, 1.15)) for n in self.SIZES]
+            report = build_report("O(n)", timings)
+            assert (report.verdict, report.estimated) == ("pass", "O(n)")
+
+    def test_reference_solution_verdict_is_stable(self):
+        from pathlib import Path
+
+        from app.models.problem import Problem
+        from app.sandbox.runner import profile_code
+
+        problem = Problem(
+            **json.loads((Path(__file__).parent.parent / "data/problems/algorithms/two-sum.json").read_text())
+        )
+        reports = [profile_code(problem.solution, problem.complexity) for _ in range(3)]
+        assert [(r.verdict, r.estimated) for r in reports] == [("pass", "O(n)")] * 3
+
+    def test_timeout_is_a_fail(self):
+        from app.models.session import ComplexityTiming
+        from app.sandbox.complexity import build_report
+
+        timings = [ComplexityTiming(n=1000, seconds=0.01), ComplexityTiming(n=2000, error="Time limit exceeded")]
+        report = build_report("O(n)", timings)
+        assert report.verdict == "fail"
+        assert report.estimated is None
+
+    def test_quadratic_solution_fails_linear_target(self):
+        from app.sandbox.runner import profile_code
+
+        report = profile_code(QUADRATIC_TWO_SUM, _check([200, 400, 800, 1600]))
+        assert report.estimated in {"O(n^2)", "O(n^3)"}
+        assert report.verdict == "fail"
+        assert [t.n for t in report.timings] == [200, 400, 800, 1600]
+
+    def test_missing_function_is_inconclusive(self):
+        from app.sandbox.runner import profile_code
+
+        report = profile_code("def something_else():\n    pass\n", _check([10, 20, 40]))
+        assert report.verdict == "inconclusive"
+        assert "two_sum" in report.error
+
+    def test_profile_endpoint_saves_report(self, client, two_sum_session):
+        res = client.post("/api/execute/profile", json={"session_id": two_sum_session})
+        assert res.status_code == 200
+        report = res.json()
+        assert report["target"] == "O(n)"
+        assert report["verdict"] == "pass"
+        assert len(report["timings"]) == 5
+
+        session = client.get(f"/api/sessions/{two_sum_session}").json()
+        assert session["complexity"]["estimated"] == report["estimated"]
+
+    def test_profile_without_check_is_404(self, client):
+        session_id = client.post("/api/sessions", json={"problem_id": "climbing-stairs"}).json()["id"]
+        res = client.post("/api/execute/profile", json={"session_id": session_id})
+        assert res.status_code == 404
+
+
+@pytest.fixture
+def blocked_scheduler(monkeypatch):
+    """A one-thread scheduler whose first job blocks until the test releases it."""
+    import threading
+
+    from app.services import execution_queue
+
+    scheduler = execution_queue.ExecutionScheduler(concurrency=1, queue_size=1, job_ttl_seconds=60)
+    release = threading.Event()
+    started = threading.Event()
+    scheduler.submit("run", lambda: (started.set(), release.wait()))
+    assert started.wait(timeout=5)
+    monkeypatch.setattr(execution_queue, "_scheduler", scheduler)
+    yield scheduler
+    release.set()
+    scheduler.shutdown()
+
+
+class TestExecutionJobs:
+    def test_job_is_queued_then_completes(self, client, two_sum_session):
+        import time
+
+        res = client.post("/api/execute/jobs", json={"session_id": two_sum_session, "mode": "submit"})
+        assert res.status_code == 202
+        job = res.json()
+        assert job["status"] in {"queued", "running", "done"}
+
+        for _ in range(100):
+            job = client.get(f"/api/execute/jobs/{job['job_id']}").json()
+            if job["status"] in {"done", "failed"}:
+                break
+            time.sleep(0.05)
+        assert job["status"] == "done"
+        assert job["result"]["all_passed"] is True
+
+    def test_job_for_missing_session_is_404(self, client):
+        res = client.post("/api/execute/jobs", json={"session_id": "nonexistent"})
+        assert res.status_code == 404
+
+    def test_unknown_job_is_404(self, client):
+        assert client.get("/api/execute/jobs/nonexistent").status_code == 404
+
+    def test_queue_position_is_reported(self, client, two_sum_session, blocked_scheduler):
+        job = client.post("/api/execute/jobs", json={"session_id": two_sum_session}).json()
+        assert job["status"] == "queued"
+        assert job["position"] == 1
+
+    @pytest.mark.parametrize("endpoint", ["/api/execute/run", "/api/execute/jobs", "/api/execute/run/stream"])
+    def test_full_queue_returns_429(self, client, two_sum_session, blocked_scheduler, endpoint):
+        blocked_scheduler.submit("run", lambda: None)  # fills the single queue slot
+        res = client.post(endpoint, json={"session_id": two_sum_session})
+        assert res.status_code == 429
+        assert int(res.headers["Retry-After"]) >= 1
+
+
+class TestSandboxPool:
+    def test_full_queue_raises_busy(self):
+        from app.sandbox.pool import SandboxBusyError, SandboxPool
+
+        pool = SandboxPool(size=1, queue_depth=0, max_idle_seconds=60)
+        pool.start()
+        worker = pool.acquire(timeout=1)
+        try:
+            with pytest.raises(SandboxBusyError):
+                pool.acquire(timeout=1)
+        finally:
+            pool.release(worker)
+            pool.shutdown()
+
+    def test_released_worker_is_replaced(self):
+        from app.sandbox.pool import SandboxPool
+
+        pool = SandboxPool(size=1, queue_depth=1, max_idle_seconds=60)
+        pool.start()
+        first = pool.acquire(timeout=1)
+        pool.release(first)
+        second = pool.acquire(timeout=1)
+        try:
+            assert second is not first
+            assert second.is_alive()
+        finally:
+            pool.release(second)
+            pool.shutdown()
@@ -2,3 +2,20 @@ def test_health_check(client):
     res = client.get("/api/health")
     assert res.status_code == 200
     assert res.json() == {"status": "ok"}
+
+
+def test_session_store_closes_after_running_jobs(monkeypatch):
+    import asyncio
+
+    import main
+
+    calls = []
+    for name in ("shutdown_scheduler", "shutdown_pool", "shutdown_session_store"):
+        monkeypatch.setattr(main, name, lambda name=name: calls.append(name))
+
+    async def run():
+        async with main.lifespan(main.app):
+            pass
+
+    asyncio.run(run())
+    assert calls == ["shutdown_scheduler", "shutdown_pool", "shutdown_session_store"]
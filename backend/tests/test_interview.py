@@ -0,0 +1,270 @@
+import json
+
+import pytest
+
+
+def _sse_events(text: str) -> list:
+    events = []
+    for block in text.split("\n\n"):
+        if block.startswith("data: "):
+            payload = block[len("data: ") :]
+            events.append(payload if payload == "[DONE]" else json.loads(payload))
+    return events
+
+
+REPLIES = [
+    "Thanks, that covers everything. [INTERVIEW_COMPLETE]",
+    "  What is the time complexity?\n",
+    "Good. [INTERVIEW_COMPLETE] Any questions?",
+    "Is [INTERVIEW] a tag or [INTERVIEW_",
+    "[INTERVIEW_COMPLETE]",
+    "",
+]
+
+
+class TestSentinelFilter:
+    @pytest.mark.parametrize("reply", REPLIES)
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+    def test_matches_the_non_streaming_cleanup(self, reply, size):
+        from app.routers.interview import SentinelFilter
+
+        sentinel = SentinelFilter()
+        pieces = [sentinel.feed(reply[i : i + size]) for i in range(0, len(reply), size)]
+        pieces.append(sentinel.finish())
+        assert "".join(pieces) == reply.replace("[INTERVIEW_COMPLETE]", "").strip()
+        assert sentinel.is_complete == ("[INTERVIEW_COMPLETE]" in reply)
+
+    def test_sentinel_never_reaches_the_client(self):
+        from app.routers.interview import SentinelFilter
+
+        sentinel = SentinelFilter()
+        assert sentinel.feed("Thanks! [INTER") == "Thanks!"
+        assert sentinel.feed("VIEW_COMP") == ""
+        assert sentinel.feed("LETE]") == ""
+        assert sentinel.finish() == ""
+        assert sentinel.is_complete
+
+
+class TestInterviewStream:
+    @pytest.fixture
+    def session_id(self, client, sample_problem_id):
+        return client.post("/api/sessions", json={"problem_id": sample_problem_id}).json()["id"]
+
+    @pytest.fixture
+    def llm(self, monkeypatch):
+        """Stream ``llm.chunks`` as the interviewer's reply, recording the prompts it was sent."""
+
+        class FakeLLM:
+            def __init__(self):
+                self.chunks = ["Why a ", "hash map? [INTERVIEW", "_COMPLETE]"]
+                self.prompts = []
+
+            async def stream(self, messages, **kwargs):
+                self.prompts.append(messages)
+                for chunk in self.chunks:
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    yield chunk
+
+        fake = FakeLLM()
+        monkeypatch.setattr("app.routers.interview.chat_completion_stream", fake.stream)
+        return fake
+
+    def test_chat_stream_forwards_chunks_and_saves_the_reply(self, client, session_id, llm):
+        res = client.post("/api/interview/chat/stream", json={"session_id": session_id, "message": "Done"})
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("text/event-stream")
+        events = _sse_events(res.text)
+        assert "".join(e["chunk"] for e in events if isinstance(e, dict) and "chunk" in e) == "Why a hash map?"
+        assert "INTERVIEW" not in res.text
+        assert events[-2:] == [{"is_complete": True, "error": None}, "[DONE]"]
+
+        messages = client.get(f"/api/sessions/{session_id}").json()["interview_messages"]
+        assert messages == [{"role": "user", "content": "Done"}, {"role": "assistant", "content": "Why a hash map?"}]
+
+    def test_start_stream_replaces_the_previous_interview(self, client, session_id, llm):
+        llm.chunks = ["Tell me about ", "your approach."]
+        client.post("/api/interview/chat/stream", json={"session_id": session_id, "message": "Earlier"})
+        events = _sse_events(client.post("/api/interview/start/stream", json={"session_id": session_id}).text)
+        assert events[-2] == {"is_complete": False, "error": None}
+
+        messages = client.get(f"/api/sessions/{session_id}").json()["interview_messages"]
+        assert [m["content"] for m in messages] == [
+            "I'm ready for the interview. Please begin.",
+            "Tell me about your approach.",
+        ]
+        assert llm.prompts[-1][-1]["content"] == "I'm ready for the interview. Please begin."
+
+    def test_failed_reply_is_reported_and_not_saved(self, client, session_id, llm):
+        import httpx
+
+        llm.chunks = ["Why a ", httpx.RemoteProtocolError("gateway reset")]
+        events = _sse_events(
+            client.post("/api/interview/chat/stream", json={"session_id": session_id, "message": "Done"}).text
+        )
+        assert events[-2:] == [{"error": "gateway reset"}, "[DONE]"]
+        assert client.get(f"/api/sessions/{session_id}").json()["interview_messages"] == []
+
+    def test_unexpected_failure_is_logged_with_its_traceback(self, client, session_id, llm, caplog):
+        llm.chunks = ["Why a ", ZeroDivisionError("bug")]
+        events = _sse_events(
+            client.post("/api/interview/chat/stream", json={"session_id": session_id, "message": "Done"}).text
+        )
+        assert events[-2:] == [{"error": "Internal error — please try again"}, "[DONE]"]
+        assert any(record.exc_info and record.exc_info[0] is ZeroDivisionError for record in caplog.records)
+
+    def test_unknown_session_is_404(self, client):
+        res = client.post("/api/interview/chat/stream", json={"session_id": "missing", "message": "hi"})
+        assert res.status_code == 404
+
+
+def _exchanges(count: int, words: int = 40) -> list[dict]:
+    messages = []
+    for i in range(count):
+        messages.append({"role": "assistant", "content": f"Question {i}: " + "why " * words})
+        messages.append({"role": "user", "content": f"Answer {i}: " + "because " * words})
+    return messages
+
+
+class TestInterviewContext:
+    def test_estimate_tokens(self):
+        from app.services.interview_context import estimate_tokens
+
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("Use a hash map.") == 5
+        assert estimate_tokens("internationalization") == 5
+        assert estimate_tokens("word " * 1000) == 1000
+
+    def test_short_interview_is_sent_in_full(self):
+        from app.models.session import Session
+        from app.services.interview_context import build_context
+
+        session = Session(problem_id="two-sum", interview_messages=_exchanges(3))
+        messages = build_context("You are an interviewer.", session)
+        assert messages[0] == {"role": "system", "content": "You are an interviewer."}
+        assert messages[1:] == session.interview_messages
+
+    def test_prompt_stays_within_budget(self, monkeypatch):
+        from app.models.session import Session
+        from app.services.interview_context import build_context, message_tokens
+
+        monkeypatch.setattr("app.config.settings.interview_context_tokens", 1000)
+        sizes = []
+        for count in (10, 50, 200):
+            session = Session(problem_id="two-sum", interview_messages=_exchanges(count))
+            messages = build_context("You are an interviewer.", session)
+            sizes.append(sum(map(message_tokens, messages)))
+            assert messages[-6:] == session.interview_messages[-6:]
+            assert "earlier messages are not shown" in messages[1]["content"]
+        assert max(sizes) <= 1000
+        assert sizes[0] == sizes[-1]
+
+    def test_latest_turns_are_kept_even_over_budget(self, monkeypatch):
+        from app.models.session import Session
+        from app.services.interview_context import build_context
+
+        monkeypatch.setattr("app.config.settings.interview_context_tokens", 10)
+        session = Session(problem_id="two-sum", interview_messages=_exchanges(5))
+        assert build_context("Interview.", session)[-6:] == session.interview_messages[-6:]
+
+    def test_summary_replaces_covered_turns(self):
+        from app.models.session import Session
+        from app.services.interview_context import build_context, transcript_within_budget
+
+        session = Session(
+            problem_id="two-sum",
+            interview_messages=_exchanges(5),
+            interview_summary="Candidate chose a hash map.",
+            interview_summary_messages=4,
+        )
+        messages = build_context("Interview.", session)
+        assert messages[1] == {
+            "role": "system",
+            "content": "Summary of the interview so far:\nCandidate chose a hash map.",
+        }
+        assert messages[2:] == session.interview_messages[4:]
+        transcript = transcript_within_budget(session)
+        assert transcript.startswith(
+            "Summary of the interview so far:\nCandidate chose a hash map.\n\nInterviewer: Question 2"
+        )
+
+    @pytest.fixture
+    def summarizer(self, monkeypatch) -> list:
+        """A fake LLM summarizer; returns the prompts it was sent."""
+        prompts = []
+
+        async def summarize(messages, **kwargs):
+            prompts.append(messages[0]["content"])
+            return f" Summary #{len(prompts)} "
+
+        monkeypatch.setattr("app.config.settings.openrouter_api_key", "test-key")
+        monkeypatch.setattr("app.services.interview_context.chat_completion", summarize)
+        return prompts
+
+    def test_refresh_folds_older_turns_into_the_summary(self, client, sample_problem_id, summarizer):
+        import asyncio
+
+        from app.services.interview_context import refresh_summary
+        from app.services.session_service import get_session, modify_session
+
+        session_id = client.post("/api/sessions", json={"problem_id": sample_problem_id}).json()["id"]
+        modify_session(session_id, lambda s: s.interview_messages.extend(_exchanges(4)))
+        assert asyncio.run(refresh_summary(session_id)) is False  # 8 messages: nothing old enough yet
+
+        modify_session(session_id, lambda s: s.interview_messages.extend(_exchanges(3)))
+        assert asyncio.run(refresh_summary(session_id)) is True
+        session = get_session(session_id)
+        assert (session.interview_summary, session.interview_summary_messages) == ("Summary #1", 8)
+        assert "Question 3" in summarizer[0] and "(none yet)" in summarizer[0]
+
+        modify_session(session_id, lambda s: s.interview_messages.extend(_exchanges(3)))
+        assert asyncio.run(refresh_summary(session_id)) is True
+        assert get_session(session_id).interview_summary_messages == 14
+        assert "Summary #1" in summarizer[1]
+
+    def test_summary_of_a_restarted_interview_is_discarded(self, client, sample_problem_id, summarizer, monkeypatch):
+        import asyncio
+
+        from app.services import interview_context
+        from app.services.session_service import get_session, modify_session
+
+        session_id = client.post("/api/sessions", json={"problem_id": sample_problem_id}).json()["id"]
+        modify_session(session_id, lambda s: s.interview_messages.extend(_exchanges(8)))
+
+        async def restart_while_summarizing(messages, **kwargs):
+            modify_session(session_id, lambda s: setattr(s, "interview_messages", []))
+            return "Stale summary"
+
+        monkeypatch.setattr(interview_context, "chat_completion", restart_while_summarizing)
+        assert asyncio.run(interview_context.refresh_summary(session_id)) is False
+        assert get_session(session_id).interview_summary == ""
+
+    def test_chat_uses_the_summary_and_refreshes_it(self, client, sample_problem_id, summarizer, monkeypatch):
+        import time
+
+        from app.services.session_service import get_session, modify_session
+
+        session_id = client.post("/api/sessions", json={"problem_id": sample_problem_id}).json()["id"]
+        modify_session(session_id, lambda s: s.interview_messages.extend(_exchanges(6)))
+        prompts = []
+
+        async def reply(messages, **kwargs):
+            prompts.append(messages)
+            return "Next question?"
+
+        monkeypatch.setattr("app.routers.interview.chat_completion", reply)
+        client.post("/api/interview/chat", json={"session_id": session_id, "message": "Done"})
+        assert len(prompts[0]) == 1 + 12 + 1  # no summary yet: system, transcript, new message
+
+        deadline = time.monotonic() + 2  # the summary is refreshed in the background after the reply
+        while get_session(session_id).interview_summary_messages != 8 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        session = get_session(session_id)
+        assert session.interview_summary_messages == 8
+        client.post("/api/interview/chat", json={"session_id": session_id, "message": "Done again"})
+        assert prompts[1][1]["content"] == "Summary of the interview so far:\nSummary #1"
+        assert prompts[1][2:-1] == session.interview_messages[8:]
+
+        client.post("/api/interview/start", json={"session_id": session_id})
+        session = get_session(session_id)
+        assert (session.interview_summary, session.interview_summary_messages) == ("", 0)
@@ -1,3 +1,4 @@
+import httpx
 import pytest
 
 
@@ -56,6 +57,145 @@ class TestListProblems:
         assert res.status_code == 200
         assert res.json() == []
 
+    def test_filter_by_tags_matches_all_of_them(self, client):
+        res = client.get("/api/problems?tag=hash-map&tag=array")
+        assert res.status_code == 200
+        problems = res.json()
+        assert "two-sum" in [p["id"] for p in problems]
+        for p in problems:
+            assert {"hash-map", "array"} <= set(p["tags"])
+
+
+# ── Conditional GETs ─────────────────────────────────────────
+
+
+class TestConditionalGet:
+    def test_detail_body_matches_model(self, client):
+        from app.services.problem_service import get_problem
+
+        res = client.get("/api/problems/two-sum")
+        assert res.status_code == 200
+        assert res.headers["content-type"] == "application/json"
+        assert res.json() == get_problem("two-sum").model_dump(mode="json")
+
+    @pytest.mark.parametrize("url", ["/api/problems", "/api/problems/two-sum", "/api/problems?category=algorithms"])
+    def test_matching_etag_returns_304(self, client, url):
+        etag = client.get(url).headers["etag"]
+        assert etag.startswith('"') and etag.endswith('"')
+
+        res = client.get(url, headers={"If-None-Match": etag})
+        assert res.status_code == 304
+        assert res.content == b""
+        assert res.headers["etag"] == etag
+
+    def test_etag_lists_and_weak_tags_match(self, client):
+        etag = client.get("/api/problems/two-sum").headers["etag"]
+        assert client.get("/api/problems/two-sum", headers={"If-None-Match": f'"stale", W/{etag}'}).status_code == 304
+        assert client.get("/api/problems/two-sum", headers={"If-None-Match": "*"}).status_code == 304
+
+    def test_stale_etag_returns_body(self, client):
+        res = client.get("/api/problems/two-sum", headers={"If-None-Match": '"stale"'})
+        assert res.status_code == 200
+        assert res.json()["id"] == "two-sum"
+
+    def test_each_filter_has_its_own_etag(self, client):
+        etags = {
+            client.get(url).headers["etag"]
+            for url in ["/api/problems", "/api/problems?category=algorithms", "/api/problems?difficulty=easy"]
+        }
+        assert len(etags) == 3
+
+    def test_responses_are_serialized_once_per_catalogue_version(self, problem_service, monkeypatch):
+        first = problem_service.list_problems_json(category="algorithms")
+        monkeypatch.setattr(problem_service, "list_problems", lambda *args: pytest.fail("re-serialized"))
+        assert problem_service.list_problems_json(category="algorithms") is first
+
+    def test_etag_changes_only_for_edited_problems(self, client, problem_service, problem_data):
+        edited = client.get("/api/problems/two-sum").headers["etag"]
+        untouched = client.get("/api/problems/binary-search").headers["etag"]
+        _edit_problem(problem_data / "algorithms" / "two-sum.json", title="Two Sum (edited)")
+        problem_service.refresh_problems()
+
+        res = client.get("/api/problems/two-sum", headers={"If-None-Match": edited})
+        assert res.status_code == 200
+        assert res.json()["title"] == "Two Sum (edited)"
+        assert client.get("/api/problems/binary-search", headers={"If-None-Match": untouched}).status_code == 304
+
+    def test_unknown_problem_is_404(self, client):
+        assert client.get("/api/problems/nonexistent-problem-xyz").status_code == 404
+
+
+# ── Search ───────────────────────────────────────────────────
+
+
+class TestProblemSearch:
+    def test_title_match_ranks_first(self, client):
+        res = client.get("/api/problems/search?q=two sum")
+        assert res.status_code == 200
+        data = res.json()
+        assert data["items"][0]["id"] == "two-sum"
+        assert data["total"] == len(data["items"])
+
+    def test_searches_descriptions(self, client):
+        """'indices' appears only in the Two Sum description, not its title or tags."""
+        ids = [p["id"] for p in client.get("/api/problems/search?q=indices").json()["items"]]
+        assert "two-sum" in ids
+
+    def test_last_term_matches_as_prefix(self, client):
+        ids = [p["id"] for p in client.get("/api/problems/search?q=anag").json()["items"]]
+        assert set(ids[:2]) == {"valid-anagram", "group-anagrams"}
+
+    def test_every_term_must_match(self, client):
+        data = client.get("/api/problems/search?q=anagram xyzzyq").json()
+        assert data == {"items": [], "total": 0, "next_cursor": None}
+
+    def test_combines_query_with_facets(self, client):
+        data = client.get("/api/problems/search?q=array&category=algorithms&difficulty=easy").json()
+        assert data["items"]
+        for p in data["items"]:
+            assert (p["category"], p["difficulty"]) == ("algorithms", "easy")
+
+    def test_cursor_pages_cover_every_match_once(self, client):
+        everything = client.get("/api/problems/search?limit=100").json()
+        assert everything["next_cursor"] is None
+        expected = [p["id"] for p in everything["items"]]
+        assert expected == [p["id"] for p in client.get("/api/problems").json()]  # no query: catalogue order
+
+        seen, cursor = [], None
+        while True:
+            url = "/api/problems/search?limit=7" + (f"&cursor={cursor}" if cursor else "")
+            page = client.get(url).json()
+            assert page["total"] == len(expected)
+            seen += [p["id"] for p in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == expected
+
+    def test_ranked_pages_follow_score_order(self, client):
+        full = [p["id"] for p in client.get("/api/problems/search?q=test&limit=100").json()["items"]]
+        first = client.get("/api/problems/search?q=test&limit=3").json()
+        second = client.get(f"/api/problems/search?q=test&limit=3&cursor={first['next_cursor']}").json()
+        assert [p["id"] for p in first["items"] + second["items"]] == full[:6]
+
+    def test_invalid_cursor(self, client):
+        res = client.get("/api/problems/search?cursor=not-a-cursor")
+        assert res.status_code == 400
+
+    def test_limit_is_bounded(self, client):
+        assert client.get("/api/problems/search?limit=0").status_code == 422
+        assert client.get("/api/problems/search?limit=101").status_code == 422
+
+    def test_search_never_reads_problem_files(self, problem_service, monkeypatch):
+        def fail(rel_path, *args):
+            raise AssertionError(f"search read {rel_path}")
+
+        monkeypatch.setattr(problem_service, "_entry_from_file", fail)
+        monkeypatch.setattr(problem_service, "_read_problem", fail)
+        items, total, _ = problem_service.search_problems("binary", tags=["binary-search"])
+        assert items[0].id == "binary-search"
+        assert total == len(items)
+
 
 # ── Problem detail ───────────────────────────────────────────
 
@@ -130,3 +270,457 @@ class TestProblemDataIntegrity:
         valid = {"algorithms", "fastapi", "django", "pytest", "python"}
         for p in res.json():
             assert p["category"] in valid, f"{p['id']} has invalid category: {p['category']}"
+
+    def test_index_summaries_match_problem_files(self):
+        import subprocess
+        import sys
+        from pathlib import Path
+
+        script = Path(__file__).resolve().parents[2] / "scripts" / "build_problem_index.py"
+        res = subprocess.run([sys.executable, str(script), "--check"], capture_output=True, text=True, check=False)
+        assert res.returncode == 0, res.stdout
+
+
+# ── Catalogue loading ────────────────────────────────────────
+
+
+@pytest.fixture
+def problem_service(monkeypatch):
+    """The problem service with a freshly loaded catalogue (from the JSON files), reset again afterwards."""
+    from app.services import problem_service
+
+    monkeypatch.setattr("app.config.settings.problem_bundle", "")
+    problem_service.reload_problems()
+    yield problem_service
+    problem_service.reload_problems()
+
+
+class TestCatalogueLoading:
+    def test_listing_never_reads_problem_files(self, problem_service, monkeypatch):
+        def fail(rel_path, *args):
+            raise AssertionError(f"listing read {rel_path}")
+
+        monkeypatch.setattr(problem_service, "_read_problem", fail)
+        assert len(problem_service.list_problems()) >= 70
+        assert problem_service.list_problems(category="algorithms", difficulty="easy")
+
+    def test_full_problems_are_kept_in_bounded_lru(self, problem_service, monkeypatch):
+        monkeypatch.setattr("app.config.settings.problem_cache_size", 2)
+        for problem_id in ["two-sum", "valid-anagram", "binary-search"]:
+            assert problem_service.get_problem(problem_id).id == problem_id
+        assert list(problem_service._problems) == ["valid-anagram", "binary-search"]
+
+    def test_concurrent_first_loads_read_the_file_once(self, problem_service, monkeypatch):
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        reads = []
+        original = problem_service._read_problem
+        start = threading.Barrier(8)
+
+        def slow_read(rel_path, source=None):
+            reads.append(rel_path)
+            time.sleep(0.05)
+            return original(rel_path, source)
+
+        def load(_):
+            start.wait()
+            return problem_service.get_problem("two-sum")
+
+        monkeypatch.setattr(problem_service, "_read_problem", slow_read)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            problems = list(executor.map(load, range(8)))
+        assert len(reads) == 1
+        assert all(p is problems[0] for p in problems)
+
+    def test_unknown_problem_does_not_touch_disk(self, problem_service, monkeypatch):
+        monkeypatch.setattr(problem_service, "_read_problem", lambda rel_path, source=None: pytest.fail("read"))
+        assert problem_service.get_problem("nonexistent-problem-xyz") is None
+
+
+# ── Hot reload ───────────────────────────────────────────────
+
+
+@pytest.fixture
+def problem_data(problem_service, tmp_path, monkeypatch):
+    """A writable copy of two problems (plus their index) served as the data dir."""
+    import json
+    import shutil
+    from pathlib import Path
+
+    source = Path(__file__).resolve().parent.parent / "data" / "problems"
+    with open(source / "problem_index.json") as f:
+        entries = [e for e in json.load(f)["problems"] if e["id"] in ("two-sum", "binary-search")]
+    for entry in entries:
+        (tmp_path / entry["file"]).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(source / entry["file"], tmp_path / entry["file"])
+    (tmp_path / "problem_index.json").write_text(json.dumps({"problems": entries}))
+
+    problem_service.stop_problem_watcher()  # reloads happen only when a test asks for them
+    monkeypatch.setattr("app.config.settings.data_dir", str(tmp_path))
+    problem_service.reload_problems()
+    yield tmp_path
+    monkeypatch.undo()
+    problem_service.start_problem_watcher()
+
+
+def _edit_problem(path, **changes):
+    import json
+    import os
+
+    data = json.loads(path.read_text())
+    data.update(changes)
+    path.write_text(json.dumps(data))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))  # filesystems with coarse mtimes
+
+
+class TestHotReload:
+    def test_nothing_changed(self, problem_service, problem_data):
+        report = problem_service.refresh_problems()
+        assert (report.added, report.changed, report.removed) == ([], [], [])
+        assert report.problems == 2
+
+    def test_refresh_without_changes_keeps_version_and_etag(self, client, problem_service, problem_data):
+        catalogue = problem_service._get_catalogue()
+        etag = client.get("/api/problems/two-sum").headers["etag"]
+        first, second = problem_service.refresh_problems(), problem_service.refresh_problems()
+        assert first.version == second.version == catalogue.version
+        assert problem_service._get_catalogue() is catalogue
+        assert client.get("/api/problems/two-sum", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_edited_problem_is_reloaded(self, problem_service, problem_data):
+        assert problem_service.get_problem("two-sum").title == "Two Sum"
+        _edit_problem(problem_data / "algorithms" / "two-sum.json", title="Two Sum (edited)")
+
+        report = problem_service.refresh_problems()
+        assert report.changed == ["two-sum"]
+        assert problem_service.get_problem("two-sum").title == "Two Sum (edited)"
+        summary = next(p for p in problem_service.list_problems() if p.id == "two-sum")
+        assert summary.title == "Two Sum (edited)"
+
+    def test_only_changed_files_are_read(self, problem_service, problem_data, monkeypatch):
+        problem_service.get_problem("binary-search")
+        _edit_problem(problem_data / "algorithms" / "two-sum.json", title="Two Sum (edited)")
+
+        reads = []
+        original = problem_service._read_json
+        monkeypatch.setattr(
+            problem_service, "_read_json", lambda rel_path: reads.append(rel_path) or original(rel_path)
+        )
+        problem_service.refresh_problems()
+        assert reads == ["algorithms/two-sum.json"]
+        problem_service.get_problem("binary-search")  # still cached
+        assert reads == ["algorithms/two-sum.json"]
+
+    def test_added_and_removed_problems(self, problem_service, problem_data):
+        import json
+
+        data = json.loads((problem_data / "algorithms" / "two-sum.json").read_text())
+        data.update(id="three-sum-draft", title="Three Sum")
+        (problem_data / "algorithms" / "three-sum-draft.json").write_text(json.dumps(data))
+        (problem_data / "algorithms" / "binary-search.json").unlink()
+
+        report = problem_service.refresh_problems()
+        assert report.added == ["three-sum-draft"]
+        assert report.removed == ["binary-search"]
+        assert [p.id for p in problem_service.list_problems()] == ["two-sum", "three-sum-draft"]
+        assert problem_service.get_problem("binary-search") is None
+        assert problem_service.get_problem("three-sum-draft").title == "Three Sum"
+
+    def test_stale_cache_entry_is_not_served(self, problem_service, problem_data):
+        """A load that finishes after a reload must not pin the old file version in the cache."""
+        old_mtime = problem_service._get_catalogue().mtimes["algorithms/two-sum.json"]
+        old_problem = problem_service.get_problem("two-sum")
+        _edit_problem(problem_data / "algorithms" / "two-sum.json", title="Two Sum (edited)")
+        problem_service.refresh_problems()
+
+        problem_service._cache_problem(old_problem, old_mtime)  # a slow reader caching what it read earlier
+        assert problem_service.get_problem("two-sum").title == "Two Sum (edited)"
+
+    def test_reload_swaps_catalogue_atomically(self, problem_service, problem_data):
+        before = problem_service._get_catalogue()
+        _edit_problem(problem_data / "algorithms" / "two-sum.json", title="Two Sum (edited)")
+        report = problem_service.refresh_problems()
+
+        after = problem_service._get_catalogue()
+        assert after is not before
+        assert after.version == before.version + 1 == report.version
+        assert before.entries["algorithms/two-sum.json"].summary.title == "Two Sum"  # old snapshot untouched
+
+    def test_admin_endpoint_reports_reload(self, client, problem_service, problem_data):
+        _edit_problem(problem_data / "algorithms" / "binary-search.json", title="Binary Search II")
+        res = client.post("/api/admin/problems/reload")
+        assert res.status_code == 200
+        data = res.json()
+        assert data["changed"] == ["binary-search"]
+        assert data["problems"] == 2
+        assert data["duration_ms"] >= 0
+        assert client.get("/api/problems/binary-search").json()["title"] == "Binary Search II"
+
+
+# ── Compiled bundle ──────────────────────────────────────────
+
+
+def _use_bundle(problem_service, monkeypatch, data_dir, path):
+    from app.services.problem_bundle import write_bundle
+
+    count = write_bundle(data_dir, path)
+    monkeypatch.setattr("app.config.settings.problem_bundle", str(path))
+    return count
+
+
+class TestProblemBundle:
+    def test_catalogue_and_problems_load_from_bundle(self, problem_service, tmp_path, monkeypatch):
+        import json
+
+        data_dir = problem_service._get_data_dir()
+        count = _use_bundle(problem_service, monkeypatch, data_dir, tmp_path / "problems.bundle")
+        expected = problem_service.list_problems()
+
+        def fail(rel_path):
+            raise AssertionError(f"read {rel_path} despite the bundle")
+
+        monkeypatch.setattr(problem_service, "_read_json", fail)
+        problem_service.reload_problems()
+        assert problem_service._get_catalogue().bundle is not None
+        assert problem_service.list_problems() == expected
+        assert len(expected) == count
+
+        problem = problem_service.get_problem("two-sum")
+        with open(data_dir / "algorithms" / "two-sum.json") as f:
+            assert problem == problem_service.Problem(**json.load(f))
+
+    def test_files_edited_after_build_are_read_from_disk(self, problem_service, problem_data, monkeypatch):
+        _use_bundle(problem_service, monkeypatch, problem_data, problem_data / "problems.bundle")
+        _edit_problem(problem_data / "algorithms" / "two-sum.json", title="Two Sum (edited)")
+        problem_service.reload_problems()
+
+        catalogue = problem_service._get_catalogue()
+        assert catalogue.entries["algorithms/two-sum.json"].blob is None
+        assert catalogue.entries["algorithms/binary-search.json"].blob is not None
+        assert problem_service.get_problem("two-sum").title == "Two Sum (edited)"
+        assert problem_service.get_problem("binary-search").title == "Binary Search"
+
+    def test_bundle_matching_no_file_is_ignored(self, problem_service, problem_data, monkeypatch):
+        import os
+
+        _use_bundle(problem_service, monkeypatch, problem_data, problem_data / "problems.bundle")
+        for path in problem_data.glob("*/*.json"):  # e.g. a checkout mounted over the image's copy
+            os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 60))
+        problem_service.reload_problems()
+
+        assert problem_service._get_catalogue().bundle is None
+        assert problem_service.get_problem("two-sum").id == "two-sum"
+
+    def test_unreadable_bundle_falls_back_to_files(self, problem_service, tmp_path, monkeypatch):
+        path = tmp_path / "problems.bundle"
+        path.write_bytes(b"not a bundle")
+        monkeypatch.setattr("app.config.settings.problem_bundle", str(path))
+        problem_service.reload_problems()
+        assert problem_service._get_catalogue().bundle is None
+        assert problem_service.get_problem("two-sum").id == "two-sum"
+
+    def test_invalid_problem_fails_the_build(self, problem_data):
+        from app.services.problem_bundle import ProblemBundleError, write_bundle
+
+        _edit_problem(problem_data / "algorithms" / "two-sum.json", test_cases="not a list")
+        with pytest.raises(ProblemBundleError, match="two-sum"):
+            write_bundle(problem_data, problem_data / "problems.bundle")
+
+
+# ── Reference solutions ──────────────────────────────────────
+
+
+def _sse_chunks(body: str) -> list[str]:
+    import json
+
+    payloads = [line[6:] for line in body.splitlines() if line.startswith("data: ")]
+    assert payloads[-1] == "[DONE]"
+    return [json.loads(p)["chunk"] for p in payloads[:-1]]
+
+
+@pytest.fixture
+def solution_service(tmp_path, monkeypatch):
+    """The solution service with empty caches and a temp disk cache."""
+    from collections import OrderedDict
+
+    from app.services import solution_service
+
+    monkeypatch.setattr(solution_service, "_memory", OrderedDict())
+    monkeypatch.setattr("app.config.settings.solution_cache_dir", str(tmp_path / "solutions"))
+    monkeypatch.setattr("app.config.settings.openrouter_api_key", "test-key")
+    return solution_service
+
+
+@pytest.fixture
+def llm_calls(solution_service, monkeypatch) -> list:
+    """Replace the LLM with a fake that streams a fenced solution; returns the prompts it was sent."""
+    import asyncio
+
+    calls = []
+
+    async def fake_stream(messages, **kwargs):
+        calls.append(messages)
+        for chunk in ["```python\n", "def solve():\n", "    return 1\n", "```"]:
+            await asyncio.sleep(0.01)
+            yield chunk
+
+    monkeypatch.setattr(solution_service, "chat_completion_stream", fake_stream)
+    return calls
+
+
+def _unbundled_problem(**changes):
+    from app.services.problem_service import get_problem
+
+    return get_problem("two-sum").model_copy(update={"solution": None, **changes})
+
+
+class TestSolutions:
+    def test_serves_the_bundled_solution(self, client, llm_calls):
+        from app.services.problem_service import get_problem
+
+        res = client.get("/api/problems/two-sum/solution")
+        assert res.status_code == 200
+        assert res.json()["solution"] == get_problem("two-sum").solution
+        assert llm_calls == []
+
+    def test_problem_detail_hides_the_solution(self, client):
+        assert "solution" not in client.get("/api/problems/two-sum").json()
+
+    def test_stream_replays_the_bundled_solution(self, client, llm_calls):
+        from app.services.problem_service import get_problem
+
+        chunks = _sse_chunks(client.get("/api/problems/two-sum/solution/stream").text)
+        assert len(chunks) > 1
+        assert "".join(chunks) == get_problem("two-sum").solution
+        assert llm_calls == []
+
+    def test_concurrent_requests_share_one_generation(self, solution_service, llm_calls):
+        import asyncio
+
+        problem = _unbundled_problem()
+
+        async def scenario():
+            streamed = solution_service.stream_solution(problem)
+            return await asyncio.gather(
+                solution_service.get_solution(problem),
+                solution_service.get_solution(problem),
+                _collect(streamed),
+            )
+
+        first, second, streamed = asyncio.run(scenario())
+        assert first == second == "def solve():\n    return 1"
+        assert streamed == "```python\ndef solve():\n    return 1\n```"
+        assert len(llm_calls) == 1
+
+    def test_generated_solution_is_cached_on_disk(self, solution_service, llm_calls, monkeypatch):
+        import asyncio
+        from collections import OrderedDict
+
+        problem = _unbundled_problem()
+        asyncio.run(solution_service.get_solution(problem))
+        monkeypatch.setattr(solution_service, "_memory", OrderedDict())  # as if the server restarted
+
+        assert solution_service.cached_solution(problem) == "def solve():\n    return 1"
+        assert asyncio.run(_collect(solution_service.stream_solution(problem))) == "def solve():\n    return 1"
+        assert len(llm_calls) == 1
+
+    def test_editing_the_problem_invalidates_the_cache(self, solution_service, llm_calls):
+        import asyncio
+
+        asyncio.run(solution_service.get_solution(_unbundled_problem()))
+        edited = _unbundled_problem(description="Now with a twist.")
+        assert solution_service.cached_solution(edited) is None
+        asyncio.run(solution_service.get_solution(edited))
+        assert len(llm_calls) == 2
+
+    @pytest.mark.parametrize(
+        "error, status",
+        [
+            (httpx.ReadTimeout("slow"), 504),
+            (httpx.ConnectError("refused"), 502),
+        ],
+    )
+    def test_solution_endpoint_maps_gateway_failures(self, client, solution_service, monkeypatch, error, status):
+        async def broken_stream(messages, **kwargs):
+            raise error
+            yield
+
+        monkeypatch.setattr(solution_service, "chat_completion_stream", broken_stream)
+        monkeypatch.setattr("app.routers.problems.get_problem", lambda problem_id: _unbundled_problem())
+        assert client.get("/api/problems/two-sum/solution").status_code == status
+
+    def test_failed_generation_is_not_cached(self, solution_service, monkeypatch):
+        import asyncio
+
+        async def broken_stream(messages, **kwargs):
+            raise RuntimeError("upstream down")
+            yield
+
+        monkeypatch.setattr(solution_service, "chat_completion_stream", broken_stream)
+        problem = _unbundled_problem()
+        with pytest.raises(RuntimeError, match="upstream down"):
+            asyncio.run(solution_service.get_solution(problem))
+        assert solution_service.cached_solution(problem) is None
+        assert solution_service._inflight == {}
+
+    @pytest.fixture
+    def slow_llm(self, solution_service, monkeypatch) -> dict:
+        """An LLM that sends one chunk and then stalls; records whether its stream was closed."""
+        import asyncio
+
+        state = {"calls": 0, "closed": False}
+
+        async def stalled_stream(messages, **kwargs):
+            state["calls"] += 1
+            try:
+                yield "def solve():\n"
+                await asyncio.sleep(30)
+                yield "    return 1\n"
+            finally:
+                state["closed"] = True
+
+        monkeypatch.setattr(solution_service, "chat_completion_stream", stalled_stream)
+        return state
+
+    def test_abandoned_stream_cancels_the_generation(self, solution_service, slow_llm):
+        import asyncio
+
+        problem = _unbundled_problem()
+
+        async def scenario():
+            stream = solution_service.stream_solution(problem)
+            assert await anext(stream) == "def solve():\n"
+            await stream.aclose()  # the client went away
+            await asyncio.sleep(0.01)
+
+        asyncio.run(scenario())
+        assert slow_llm["closed"]
+        assert solution_service._inflight == {}
+        assert solution_service.cached_solution(problem) is None
+
+    def test_generation_continues_while_someone_listens(self, solution_service, slow_llm):
+        import asyncio
+
+        problem = _unbundled_problem()
+
+        async def scenario():
+            first, second = solution_service.stream_solution(problem), solution_service.stream_solution(problem)
+            await anext(first)
+            await anext(second)
+            await first.aclose()
+            await asyncio.sleep(0.01)
+            assert not slow_llm["closed"]
+            await second.aclose()
+            await asyncio.sleep(0.01)
+            assert slow_llm["closed"]
+            return solution_service._inflight
+
+        assert asyncio.run(scenario()) == {}
+        assert slow_llm["calls"] == 1
+
+
+async def _collect(chunks) -> str:
+    return "".join([chunk async for chunk in chunks])
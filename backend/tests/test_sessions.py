@@ -1,6 +1,14 @@
 import pytest
 
 
+@pytest.fixture(params=["sqlite", "json"])
+def session_backend(request, monkeypatch):
+    """Run every session test against each storage backend."""
+    monkeypatch.setattr("app.config.settings.session_store", request.param)
+    return request.param
+
+
+@pytest.mark.usefixtures("session_backend")
 class TestCreateSession:
     def test_create_session_returns_201_fields(self, client, sample_problem_id):
         res = client.post("/api/sessions", json={"problem_id": sample_problem_id})
@@ -33,6 +41,7 @@ class TestCreateSession:
         assert sess_res.json()["code"] == starter_code
 
 
+@pytest.mark.usefixtures("session_backend")
 class TestGetSession:
     def test_get_session_by_id(self, client, sample_problem_id):
         create_res = client.post("/api/sessions", json={"problem_id": sample_problem_id})
@@ -47,6 +56,7 @@ class TestGetSession:
         assert res.status_code == 404
 
 
+@pytest.mark.usefixtures("session_backend")
 class TestUpdateSession:
     @pytest.mark.parametrize(
         "update_field, update_value",
@@ -94,11 +104,12 @@ class TestUpdateSession:
         assert data["time_remaining_seconds"] == 0
 
 
+@pytest.mark.usefixtures("session_backend")
 class TestListSessions:
     def test_list_sessions_empty(self, client):
         res = client.get("/api/sessions")
         assert res.status_code == 200
-        assert res.json() == []
+        assert res.json() == {"items": [], "next_cursor": None}
 
     def test_list_sessions_after_create(self, client, sample_problem_id):
         client.post("/api/sessions", json={"problem_id": sample_problem_id})
@@ -106,4 +117,909 @@ class TestListSessions:
 
         res = client.get("/api/sessions")
         assert res.status_code == 200
-        assert len(res.json()) == 2
+        assert len(res.json()["items"]) == 2
+
+    def test_items_are_summaries_newest_first(self, client):
+        ids = [client.post("/api/sessions", json={"problem_id": "two-sum"}).json()["id"] for _ in range(3)]
+        items = client.get("/api/sessions").json()["items"]
+        assert [item["id"] for item in items] == ids[::-1]
+        assert set(items[0]) == {"id", "problem_id", "status", "started_at", "score"}
+
+    def test_cursor_pages_through_every_session(self, client):
+        ids = [client.post("/api/sessions", json={"problem_id": "two-sum"}).json()["id"] for _ in range(5)]
+        seen, cursor = [], None
+        while True:
+            page = client.get("/api/sessions", params={"limit": 2, **({"cursor": cursor} if cursor else {})}).json()
+            seen += [item["id"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+            client.post("/api/sessions", json={"problem_id": "two-sum"})  # newer sessions don't shift the pages
+        assert seen == ids[::-1]
+
+    def test_filters_by_status_and_problem(self, client):
+        two_sum = client.post("/api/sessions", json={"problem_id": "two-sum"}).json()["id"]
+        client.post("/api/sessions", json={"problem_id": "valid-parentheses"})
+        client.put(f"/api/sessions/{two_sum}", json={"status": "submitted"})
+
+        def ids(**params):
+            return [item["id"] for item in client.get("/api/sessions", params=params).json()["items"]]
+
+        assert ids(status="submitted") == [two_sum]
+        assert ids(problem_id="two-sum") == [two_sum]
+        assert ids(problem_id="two-sum", status="in_progress") == []
+        assert len(ids(status="in_progress")) == 1
+
+    def test_summary_carries_overall_score(self, client):
+        from app.services.session_service import _save_session, get_session
+
+        session_id = client.post("/api/sessions", json={"problem_id": "two-sum"}).json()["id"]
+        session = get_session(session_id)
+        session.status, session.score = "scored", {"overall_score": 87, "summary": "Good"}
+        _save_session(session)
+        assert client.get("/api/sessions", params={"status": "scored"}).json()["items"][0]["score"] == 87
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "WzEsIDJd"])  # the second decodes to [1, 2]
+    def test_invalid_cursor(self, client, cursor):
+        assert client.get("/api/sessions", params={"cursor": cursor}).status_code == 400
+
+
+@pytest.mark.usefixtures("session_backend")
+class TestCodePatch:
+    @staticmethod
+    def _create(client, problem_id):
+        session_id = client.post("/api/sessions", json={"problem_id": problem_id}).json()["id"]
+        client.put(f"/api/sessions/{session_id}", json={"code": "def solve():\n    pass\n"})
+        return session_id
+
+    def test_applies_deltas_and_bumps_revision(self, client, sample_problem_id):
+        session_id = self._create(client, sample_problem_id)
+        res = client.patch(
+            f"/api/sessions/{session_id}/code",
+            json={
+                "base_revision": 1,
+                "deltas": [{"offset": 17, "delete": 4, "insert": "return 42"}, {"offset": 0, "insert": "# v2\n"}],
+                "time_remaining_seconds": 300,
+            },
+        )
+        assert res.status_code == 200
+        assert res.json() == {"revision": 2}
+        data = client.get(f"/api/sessions/{session_id}").json()
+        assert data["code"] == "# v2\ndef solve():\n    return 42\n"
+        assert data["code_revision"] == 2
+        assert data["time_remaining_seconds"] == 300
+
+    def test_stale_base_revision_conflicts(self, client, sample_problem_id):
+        session_id = self._create(client, sample_problem_id)
+        res = client.patch(f"/api/sessions/{session_id}/code", json={"base_revision": 0, "deltas": [{"offset": 0}]})
+        assert res.status_code == 409
+        assert res.headers["X-Code-Revision"] == "1"
+        assert client.get(f"/api/sessions/{session_id}").json()["code"] == "def solve():\n    pass\n"
+
+    def test_offset_past_end_is_rejected(self, client, sample_problem_id):
+        session_id = self._create(client, sample_problem_id)
+        res = client.patch(
+            f"/api/sessions/{session_id}/code", json={"base_revision": 1, "deltas": [{"offset": 999, "insert": "x"}]}
+        )
+        assert res.status_code == 422
+        assert client.get(f"/api/sessions/{session_id}").json()["code_revision"] == 1
+
+    def test_offsets_are_utf16_code_units(self, client, sample_problem_id):
+        session_id = client.post("/api/sessions", json={"problem_id": sample_problem_id}).json()["id"]
+        client.put(f"/api/sessions/{session_id}", json={"code": "s = '\U0001f600'\nx = 1"})
+        # the emoji is two UTF-16 units, so "x" starts at unit 9, not str index 8
+        res = client.patch(
+            f"/api/sessions/{session_id}/code",
+            json={"base_revision": 1, "deltas": [{"offset": 9, "delete": 1, "insert": "y"}]},
+        )
+        assert res.status_code == 200
+        assert client.get(f"/api/sessions/{session_id}").json()["code"] == "s = '\U0001f600'\ny = 1"
+
+        res = client.patch(f"/api/sessions/{session_id}/code", json={"base_revision": 2, "deltas": [{"offset": 6}]})
+        assert res.status_code == 422  # inside the surrogate pair
+
+    def test_missing_session(self, client):
+        res = client.patch("/api/sessions/missing/code", json={"base_revision": 0, "deltas": []})
+        assert res.status_code == 404
+
+    def test_history_replays_every_revision(self, client, sample_problem_id, monkeypatch):
+        monkeypatch.setattr("app.services.session_service.CODE_SNAPSHOT_INTERVAL", 4)
+        session_id = self._create(client, sample_problem_id)
+        expected = {1: "def solve():\n    pass\n"}
+        for revision in range(1, 11):
+            client.patch(
+                f"/api/sessions/{session_id}/code",
+                json={"base_revision": revision, "deltas": [{"offset": 0, "insert": f"# {revision}\n"}]},
+            )
+            expected[revision + 1] = f"# {revision}\n" + expected[revision]
+
+        history = client.get(f"/api/sessions/{session_id}/code/history").json()
+        assert [edit["revision"] for edit in history] == list(range(12))
+        assert [edit["revision"] for edit in history if edit["snapshot"] is not None] == [0, 1, 4, 8]
+        for revision, code in expected.items():
+            res = client.get(f"/api/sessions/{session_id}/code", params={"revision": revision})
+            assert res.json() == {"revision": revision, "code": code}
+        assert client.get(f"/api/sessions/{session_id}/code", params={"revision": 12}).status_code == 404
+
+    def test_put_logs_a_snapshot_only_when_code_changes(self, client, sample_problem_id):
+        session_id = self._create(client, sample_problem_id)
+        client.put(f"/api/sessions/{session_id}", json={"code": "def solve():\n    pass\n", "status": "submitted"})
+        history = client.get(f"/api/sessions/{session_id}/code/history").json()
+        assert [(edit["revision"], edit["snapshot"] is not None) for edit in history] == [(0, True), (1, True)]
+
+
+class TestConcurrentSaves:
+    @pytest.fixture(params=["sqlite", "json"])
+    def store(self, request, tmp_path):
+        from app.services.session_store import JsonSessionStore, SqliteSessionStore
+
+        store = (
+            SqliteSessionStore(tmp_path / "sessions.db") if request.param == "sqlite" else JsonSessionStore(tmp_path)
+        )
+        yield store
+        store.close()
+
+    def test_store_rejects_stale_version(self, store, tmp_path):
+        from app.models.session import Session
+        from app.services.session_store import SessionConflictError
+
+        session = Session(problem_id="two-sum", version=1)
+        store.save(session, expected_version=0)
+        stale = session.model_copy(deep=True)
+        session.code, session.version = "mine", 2
+        store.save(session, expected_version=1)
+
+        stale.code, stale.version = "theirs", 2
+        with pytest.raises(SessionConflictError):
+            store.save(stale, expected_version=1)
+        assert store.get(session.id).code == "mine"
+        assert not list(tmp_path.glob("*.tmp"))  # JSON writes go through a renamed temp file
+
+    @pytest.mark.usefixtures("session_backend")
+    def test_modify_reapplies_change_after_a_concurrent_save(self, client, sample_problem_id):
+        from app.services.session_service import _save_session, get_session, modify_session
+
+        session_id = client.post("/api/sessions", json={"problem_id": sample_problem_id}).json()["id"]
+        seen_versions = []
+
+        def change(session):
+            seen_versions.append(session.version)
+            if len(seen_versions) == 1:  # someone else saves between our read and our write
+                other = get_session(session_id)
+                other.status = "submitted"
+                _save_session(other)
+            session.code = "mine"
+
+        modify_session(session_id, change)
+        assert seen_versions == [1, 2]
+        session = get_session(session_id)
+        assert (session.code, session.status, session.version) == ("mine", "submitted", 3)
+
+    @pytest.mark.usefixtures("session_backend")
+    def test_scoring_keeps_autosave_made_during_evaluation(self, client, sample_problem_id, monkeypatch):
+        import asyncio
+
+        from app.models.session import SessionUpdate
+        from app.services.scoring_service import evaluate_session
+        from app.services.session_service import get_session, update_session
+
+        session_id = client.post("/api/sessions", json={"problem_id": sample_problem_id}).json()["id"]
+
+        async def slow_evaluation(messages, **kwargs):
+            update_session(session_id, SessionUpdate(code="typed while scoring"))
+            raise RuntimeError("AI unavailable")  # use the fallback score
+
+        monkeypatch.setattr("app.services.scoring_service.chat_completion", slow_evaluation)
+        asyncio.run(evaluate_session(session_id))
+        session = get_session(session_id)
+        assert session.code == "typed while scoring"
+        assert session.status == "scored" and session.score
+
+    @pytest.mark.usefixtures("session_backend")
+    def test_interview_reply_keeps_concurrent_changes(self, client, sample_problem_id, monkeypatch):
+        from app.models.session import SessionUpdate
+        from app.services.session_service import get_session, update_session
+
+        session_id = client.post("/api/sessions", json={"problem_id": sample_problem_id}).json()["id"]
+
+        async def reply(messages, **kwargs):
+            update_session(session_id, SessionUpdate(time_remaining_seconds=42))
+            return "Why a hash map?"
+
+        monkeypatch.setattr("app.routers.interview.chat_completion", reply)
+        res = client.post("/api/interview/chat", json={"session_id": session_id, "message": "Done"})
+        assert res.status_code == 200
+        session = get_session(session_id)
+        assert session.time_remaining_seconds == 42
+        assert [m["content"] for m in session.interview_messages] == ["Done", "Why a hash map?"]
+
+
+class TestSqliteSessionStore:
+    @pytest.fixture
+    def store(self, tmp_path):
+        from app.services.session_store import SqliteSessionStore
+
+        store = SqliteSessionStore(tmp_path / "sessions.db")
+        yield store
+        store.close()
+
+    @staticmethod
+    def _transcript_rows(store):
+        return store._conn.execute("SELECT seq, message FROM interview_messages ORDER BY seq").fetchall()
+
+    def test_uses_wal(self, store):
+        assert store._conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+    def test_round_trip(self, store):
+        from app.models.session import Session
+
+        session = Session(problem_id="two-sum", code="x = 1", interview_messages=[{"role": "user", "content": "hi"}])
+        store.save(session)
+        assert store.get(session.id) == session
+        assert store.get("missing") is None
+
+    def test_transcript_saves_only_append(self, store):
+        from app.models.session import Session
+
+        session = Session(problem_id="two-sum", interview_messages=[{"role": "user", "content": "hi"}])
+        store.save(session)
+        first_rowid = store._conn.execute("SELECT rowid FROM sessions").fetchone()
+        session.interview_messages.append({"role": "assistant", "content": "hello"})
+
+        inserted = []
+        store._conn.set_trace_callback(inserted.append)
+        store.save(session)
+        store._conn.set_trace_callback(None)
+        assert sum("INSERT INTO interview_messages" in sql for sql in inserted) == 1
+        assert not any("DELETE" in sql for sql in inserted)
+        assert [seq for seq, _ in self._transcript_rows(store)] == [0, 1]
+        assert store._conn.execute("SELECT rowid FROM sessions").fetchone() == first_rowid
+
+    def test_restarted_transcript_is_rewritten(self, store):
+        from app.models.session import Session
+
+        session = Session(problem_id="two-sum", interview_messages=[{"role": "user", "content": "old"}] * 3)
+        store.save(session)
+        session.interview_messages = [{"role": "user", "content": "new"}] * 3
+        store.save(session)
+        assert store.get(session.id).interview_messages == session.interview_messages
+        session.interview_messages = []
+        store.save(session)
+        assert self._transcript_rows(store) == []
+
+    def test_indexes_filterable_columns(self, store):
+        indexes = {row[1] for row in store._conn.execute("PRAGMA index_list(sessions)")}
+        assert {
+            "idx_sessions_started_at_id",
+            "idx_sessions_status_started_at",
+            "idx_sessions_problem_id_started_at",
+        } <= indexes
+
+    def test_session_list_reads_only_the_index(self, store):
+        from app.models.session import Session
+
+        for _ in range(3):
+            store.save(Session(problem_id="two-sum", status="submitted"))
+        plan = store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id, problem_id, status, started_at, score FROM sessions "
+            "WHERE status = ? AND (started_at, id) < (?, ?) ORDER BY started_at DESC, id DESC LIMIT 3",
+            ("submitted", "9", "9"),
+        ).fetchall()
+        detail = " ".join(row[-1] for row in plan)
+        assert "idx_sessions_status_started_at" in detail
+        assert "TEMP B-TREE" not in detail  # no sort step
+
+    def test_adds_score_column_to_existing_databases(self, tmp_path):
+        import sqlite3
+
+        from app.models.session import Session
+        from app.services.session_store import SqliteSessionStore
+
+        session = Session(problem_id="two-sum", status="scored", score={"overall_score": 72})
+        conn = sqlite3.connect(tmp_path / "old.db")
+        conn.execute(
+            "CREATE TABLE sessions (id TEXT PRIMARY KEY, problem_id TEXT NOT NULL, status TEXT NOT NULL, "
+            "started_at TEXT NOT NULL, data TEXT NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO sessions VALUES (?, ?, ?, ?, ?)",
+            (session.id, session.problem_id, session.status, session.started_at, session.model_dump_json()),
+        )
+        conn.commit()
+        conn.close()
+
+        store = SqliteSessionStore(tmp_path / "old.db")
+        try:
+            assert [summary.score for summary in store.list_summaries()] == [72]
+        finally:
+            store.close()
+
+
+class TestJsonSessionIndex:
+    def test_rebuilds_missing_index_from_session_files(self, tmp_path):
+        import json
+
+        from app.models.session import Session
+        from app.services.session_store import JSON_INDEX_FILENAME, JsonSessionStore
+
+        session = Session(problem_id="two-sum")
+        (tmp_path / f"{session.id}.json").write_text(json.dumps(session.model_dump()))
+        store = JsonSessionStore(tmp_path)
+        assert [summary.id for summary in store.list_summaries()] == [session.id]
+        assert (tmp_path / JSON_INDEX_FILENAME).exists()
+
+    def test_autosaves_do_not_grow_the_index(self, tmp_path):
+        from app.models.session import Session
+        from app.services.session_store import JSON_INDEX_FILENAME, JsonSessionStore
+
+        store = JsonSessionStore(tmp_path)
+        session = Session(problem_id="two-sum")
+        store.save(session)
+        for i in range(5):
+            session.code = f"x = {i}"
+            store.save(session)
+        session.status = "submitted"
+        store.save(session)
+        assert len((tmp_path / JSON_INDEX_FILENAME).read_text().splitlines()) == 2
+
+    def test_sees_saves_from_other_workers(self, tmp_path):
+        from app.models.session import Session
+        from app.services.session_store import JsonSessionStore
+
+        reader, writer = JsonSessionStore(tmp_path), JsonSessionStore(tmp_path)
+        assert reader.list_summaries() == []
+        session = Session(problem_id="two-sum")
+        writer.save(session)
+        session.status = "scored"
+        writer.save(session)
+        assert [(summary.id, summary.status) for summary in reader.list_summaries()] == [(session.id, "scored")]
+
+    def test_cached_get_does_not_read_the_session_file(self, tmp_path, monkeypatch):
+        from app.models.session import Session
+        from app.services.session_store import JsonSessionStore, WriteBehindSessionStore
+
+        store = WriteBehindSessionStore(JsonSessionStore(tmp_path), 60.0, 16)
+        session = Session(problem_id="two-sum", version=1)
+        store.save(session, expected_version=0)
+        reads = []
+        get = JsonSessionStore.get
+        monkeypatch.setattr(
+            JsonSessionStore, "get", lambda self, session_id: reads.append(session_id) or get(self, session_id)
+        )
+
+        for _ in range(3):
+            assert store.get(session.id).version == 1
+        assert reads == []
+        store.close()
+
+    def test_version_follows_saves_from_other_workers(self, tmp_path):
+        from app.models.session import Session
+        from app.services.session_store import JsonSessionStore
+
+        reader, writer = JsonSessionStore(tmp_path), JsonSessionStore(tmp_path)
+        session = Session(problem_id="two-sum", version=1)
+        writer.save(session, expected_version=0)
+        assert reader.get_version(session.id) == 1
+        session.version = 2
+        writer.save(session, expected_version=1)
+        assert reader.get_version(session.id) == 2
+        writer.delete(session.id)
+        assert reader.get_version(session.id) is None
+
+
+class TestMigrateSessions:
+    def test_imports_json_sessions(self, tmp_path):
+        import json
+        import subprocess
+        import sys
+        from pathlib import Path
+
+        from app.models.session import Session
+        from app.services.session_store import SqliteSessionStore
+
+        sessions = [
+            Session(problem_id="two-sum", interview_messages=[{"role": "user", "content": "hi"}]),
+            Session(problem_id="binary-search", status="scored", score={"overall": 80}),
+        ]
+        for session in sessions:
+            (tmp_path / f"{session.id}.json").write_text(json.dumps(session.model_dump(), indent=2))
+        (tmp_path / "broken.json").write_text("{")
+
+        script = Path(__file__).resolve().parent.parent.parent / "scripts" / "migrate_sessions.py"
+        res = subprocess.run(
+            [sys.executable, str(script), "--sessions-dir", str(tmp_path)], capture_output=True, text=True, check=False
+        )
+        assert res.returncode == 1  # the broken file is reported
+        assert "Imported 2 of 3 sessions" in res.stdout
+        assert "broken.json" in res.stdout
+
+        store = SqliteSessionStore(tmp_path / "sessions.db")
+        try:
+            for session in sessions:
+                assert store.get(session.id) == session
+        finally:
+            store.close()
+
+    def test_upgrade_keeps_json_sessions_visible(self, client, sample_problem_id, tmp_path, monkeypatch):
+        monkeypatch.setattr("app.config.settings.session_store", "json")
+        session_id = client.post("/api/sessions", json={"problem_id": sample_problem_id}).json()["id"]
+        client.put(f"/api/sessions/{session_id}", json={"code": "x = 1"})
+        client.put(f"/api/sessions/{session_id}", json={"status": "submitted"})
+
+        monkeypatch.setattr("app.config.settings.session_store", "sqlite")
+        assert not (tmp_path / "sessions.db").exists()
+        assert [s["id"] for s in client.get("/api/sessions").json()["items"]] == [session_id]
+        session = client.get(f"/api/sessions/{session_id}").json()
+        assert (session["code"], session["status"]) == ("x = 1", "submitted")
+        history = client.get(f"/api/sessions/{session_id}/code/history").json()
+        assert [edit["revision"] for edit in history] == [0, 1]
+
+        from app.services.session_store import get_session_store, shutdown_session_store
+
+        get_session_store().delete(session_id)
+        shutdown_session_store()  # reopening an existing database doesn't import again
+        assert client.get("/api/sessions").json()["items"] == []
+
+
+class TestWriteBehindSessionStore:
+    @pytest.fixture
+    def inner(self):
+        from app.services.session_store import SessionConflictError, SessionStore
+
+        class MemoryStore(SessionStore):
+            def __init__(self):
+                self.saved = {}
+                self.edits = {}
+                self.writes = []
+                self.closed = False
+
+            def get(self, session_id):
+                return self.saved.get(session_id)
+
+            def save(self, session, edits=(), expected_version=None):
+                stored_version = self.saved[session.id].version if session.id in self.saved else 0
+                if expected_version is not None and stored_version != expected_version:
+                    raise SessionConflictError(session.id, stored_version)
+                self.writes.append(session.id)
+                self.saved[session.id] = session.model_copy(deep=True)
+                self.edits.setdefault(session.id, []).extend(edits)
+
+            def get_edits(self, session_id):
+                return list(self.edits.get(session_id, []))
+
+            def delete(self, session_id, expected_version=None):
+                self.edits.pop(session_id, None)
+                return self.saved.pop(session_id, None) is not None
+
+            def list_summaries(self, status=None, problem_id=None, before=None, limit=20):
+                from app.services.session_store import page_summaries, summarize
+
+                return page_summaries([summarize(s) for s in self.saved.values()], status, problem_id, before, limit)
+
+            def close(self):
+                self.closed = True
+
+        return MemoryStore()
+
+    @pytest.fixture
+    def make_store(self, inner):
+        from app.services.session_store import WriteBehindSessionStore
+
+        stores = []
+
+        def make(flush_interval=60.0, max_sessions=16):
+            stores.append(WriteBehindSessionStore(inner, flush_interval, max_sessions))
+            return stores[-1]
+
+        yield make
+        for store in stores:
+            store.close()
+
+    def test_timer_autosaves_stay_in_memory_until_flushed(self, inner, make_store):
+        from app.models.session import Session
+
+        store = make_store()
+        session = Session(problem_id="two-sum", time_remaining_seconds=1800)
+        store.save(session)  # creation is written through
+        for i in range(20):
+            session.time_remaining_seconds -= 5
+            store.save(session)
+        assert inner.writes == [session.id]
+        assert store.get(session.id).time_remaining_seconds == 1700
+
+        assert store.flush() == 1
+        assert inner.saved[session.id].time_remaining_seconds == 1700
+        assert store.flush() == 0
+
+    @pytest.mark.parametrize(
+        "changes",
+        [
+            {"code": "x = 1", "code_revision": 1},
+            {"interview_messages": [{"role": "user", "content": "hi"}]},
+            {"status": "submitted"},
+            {"status": "scored", "score": {"overall_score": 80}},
+        ],
+    )
+    def test_other_changes_write_through(self, inner, make_store, changes):
+        from app.models.session import Session
+
+        store = make_store()
+        session = Session(problem_id="two-sum")
+        store.save(session)
+        for field, value in changes.items():
+            setattr(session, field, value)
+        store.save(session)
+        assert inner.writes == [session.id] * 2
+        assert inner.saved[session.id] == session
+        assert store.dirty_count() == 0
+
+    def test_background_flush_bounds_staleness(self, inner, make_store):
+        import time
+
+        from app.models.session import Session
+
+        store = make_store(flush_interval=0.05)
+        session = Session(problem_id="two-sum", time_remaining_seconds=1800)
+        store.save(session)
+        session.time_remaining_seconds = 1795
+        store.save(session)
+
+        deadline = time.monotonic() + 2
+        while inner.saved[session.id].time_remaining_seconds != 1795 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert inner.saved[session.id].time_remaining_seconds == 1795
+
+    def test_callers_get_copies(self, make_store):
+        from app.models.session import Session
+
+        store = make_store()
+        session = Session(problem_id="two-sum")
+        store.save(session)
+        session.code = "not saved"
+        loaded = store.get(session.id)
+        loaded.interview_messages.append({"role": "user", "content": "hi"})
+        assert store.get(session.id).code == ""
+        assert store.get(session.id).interview_messages == []
+
+    def test_eviction_flushes_dirty_sessions(self, inner, make_store):
+        from app.models.session import Session
+
+        store = make_store(max_sessions=2)
+        sessions = [Session(problem_id="two-sum") for _ in range(3)]
+        store.save(sessions[0])
+        sessions[0].time_remaining_seconds = 60
+        store.save(sessions[0])
+        store.save(sessions[1])
+        store.save(sessions[2])  # evicts sessions[0]
+        assert inner.saved[sessions[0].id].time_remaining_seconds == 60
+        assert store.dirty_count() == 0
+
+    def test_close_flushes(self, inner, make_store):
+        from app.models.session import Session
+
+        store = make_store()
+        session = Session(problem_id="two-sum")
+        store.save(session)
+        session.time_remaining_seconds = 42
+        store.save(session)
+        store.close()
+        assert inner.saved[session.id].time_remaining_seconds == 42
+        assert inner.closed
+
+    @staticmethod
+    def _worker_save(inner, session_id, **changes):
+        """Save like another worker sharing ``inner`` would."""
+        theirs = inner.get(session_id).model_copy(deep=True)
+        for field, value in changes.items():
+            setattr(theirs, field, value)
+        theirs.version += 1
+        inner.save(theirs, expected_version=theirs.version - 1)
+
+    def _cached_autosave(self, store, seconds):
+        from app.models.session import Session
+
+        session = Session(problem_id="two-sum", version=1, time_remaining_seconds=1800)
+        store.save(session, expected_version=0)
+        mine = store.get(session.id)
+        mine.time_remaining_seconds, mine.version = seconds, 2
+        store.save(mine, expected_version=1)
+        return session.id
+
+    def test_flush_merges_another_workers_save(self, inner, make_store):
+        store = make_store()
+        session_id = self._cached_autosave(store, 1200)
+        self._worker_save(inner, session_id, status="scored", score={"overall_score": 90})
+
+        assert store.flush() == 1
+        merged = inner.saved[session_id]
+        assert (merged.time_remaining_seconds, merged.status, merged.version) == (1200, "scored", 3)
+        assert store.get(session_id) == merged
+
+    def test_conflicting_autosave_is_reported_on_next_save(self, inner, make_store):
+        from app.services.session_store import SessionConflictError, UnsavedChangesError
+
+        store = make_store()
+        session_id = self._cached_autosave(store, 1200)
+        self._worker_save(inner, session_id, time_remaining_seconds=1100)
+
+        with pytest.raises(SessionConflictError):
+            store.flush()
+        assert inner.saved[session_id].time_remaining_seconds == 1100
+        assert store.get(session_id).time_remaining_seconds == 1100
+        assert store.dirty_count() == 0
+
+        session = store.get(session_id)
+        session.time_remaining_seconds, session.version = 1000, session.version + 1
+        with pytest.raises(UnsavedChangesError):
+            store.save(session, expected_version=session.version - 1)
+        store.save(session, expected_version=session.version - 1)  # reported once; the resend goes through
+        assert store.get(session_id).time_remaining_seconds == 1000
+
+    def test_other_workers_saves_are_not_hidden_by_the_cache(self, inner, make_store):
+        store = make_store()
+        session_id = self._cached_autosave(store, 1200)
+        store.flush()
+        self._worker_save(inner, session_id, code="theirs")
+        assert store.get(session_id).code == "theirs"
+
+        self._worker_save(inner, session_id, status="submitted")
+        mine = store.get(session_id)
+        assert (mine.code, mine.status) == ("theirs", "submitted")
+
+    @pytest.fixture
+    def two_workers(self, tmp_path):
+        """Two write-behind stores over one database, like two uvicorn workers."""
+        from app.services.session_store import SqliteSessionStore, WriteBehindSessionStore
+
+        path = tmp_path / "sessions.db"
+        stores = [WriteBehindSessionStore(SqliteSessionStore(path), 60.0, 16) for _ in range(2)]
+        yield stores
+        for store in stores:
+            store.close()
+
+    @staticmethod
+    def _autosave(store, session_id, **changes):
+        latest = store.get(session_id)
+        for field, value in changes.items():
+            setattr(latest, field, value)
+        latest.version += 1
+        store.save(latest, expected_version=latest.version - 1)
+
+    def test_workers_sharing_a_database(self, two_workers):
+        from app.models.session import Session
+        from app.services.session_store import UnsavedChangesError
+
+        a, b = two_workers
+        session = Session(problem_id="two-sum", version=1, time_remaining_seconds=1800)
+        a.save(session, expected_version=0)
+
+        self._autosave(b, session.id, time_remaining_seconds=1700)
+        b.flush()
+        assert a.get(session.id).time_remaining_seconds == 1700
+
+        self._autosave(a, session.id, time_remaining_seconds=1600)  # acknowledged, still in a's memory
+        self._autosave(b, session.id, time_remaining_seconds=1500)
+        b.flush()
+        assert a.get(session.id).time_remaining_seconds == 1500
+        with pytest.raises(UnsavedChangesError):
+            self._autosave(a, session.id, time_remaining_seconds=1400)
+        self._autosave(a, session.id, time_remaining_seconds=1400)
+        a.flush()
+        assert b.get(session.id).time_remaining_seconds == 1400
+
+    def test_code_autosaved_on_one_worker_is_submitted_on_another(self, two_workers):
+        from app.models.session import Session
+
+        a, b = two_workers
+        session = Session(problem_id="two-sum", version=1, code="old")
+        a.save(session, expected_version=0)
+        assert b.get(session.id).code == "old"  # cached by b
+
+        self._autosave(a, session.id, code="new", code_revision=1, time_remaining_seconds=900)
+        submitted = b.get(session.id)
+        assert (submitted.code, submitted.time_remaining_seconds) == ("new", 900)
+        self._autosave(b, session.id, status="submitted")
+        assert a.get(session.id).code == b.inner.get(session.id).code == "new"
+
+    def test_stale_cached_version_is_rejected(self, make_store):
+        from app.models.session import Session
+        from app.services.session_store import SessionConflictError
+
+        store = make_store()
+        session = Session(problem_id="two-sum", version=1)
+        store.save(session, expected_version=0)
+        session.version = 2
+        store.save(session, expected_version=1)
+        with pytest.raises(SessionConflictError):
+            store.save(session, expected_version=1)
+
+    def test_autosave_endpoint_writes_code_through_and_timer_behind(self, client, sample_problem_id, monkeypatch):
+        from app.services.session_store import get_session_store
+
+        monkeypatch.setattr("app.config.settings.session_flush_interval", 60.0)
+        session_id = client.post("/api/sessions", json={"problem_id": sample_problem_id}).json()["id"]
+        store = get_session_store()
+        client.put(f"/api/sessions/{session_id}", json={"code": "x = 1"})
+        assert store.inner.get(session_id).code == "x = 1"
+        assert store.dirty_count() == 0
+
+        client.put(f"/api/sessions/{session_id}", json={"time_remaining_seconds": 600})
+        assert store.inner.get(session_id).time_remaining_seconds != 600
+        assert client.get(f"/api/sessions/{session_id}").json()["time_remaining_seconds"] == 600
+        assert client.get("/api/sessions").json()["items"][0]["id"] == session_id  # listing needs no flush
+        assert store.dirty_count() == 1
+
+        client.put(f"/api/sessions/{session_id}", json={"status": "submitted"})
+        assert client.get("/api/sessions").json()["items"][0]["status"] == "submitted"
+        assert store.inner.get(session_id).time_remaining_seconds == 600
+
+
+@pytest.mark.usefixtures("session_backend")
+class TestSessionCompaction:
+    @staticmethod
+    def _stored(problem_id="two-sum", days_old=0.0, **fields):
+        from datetime import datetime, timedelta
+
+        from app.models.session import Session
+        from app.services.session_store import get_session_store
+
+        started_at = (datetime.now() - timedelta(days=days_old)).isoformat()
+        session = Session(problem_id=problem_id, started_at=started_at, version=1, **fields)
+        get_session_store().save(session, expected_version=0)
+        return session
+
+    def test_archives_old_sessions_with_point_lookups(self, client):
+        from app.services.session_archive import compact_sessions
+        from app.services.session_store import get_session_store
+
+        old = self._stored(days_old=45, status="scored", code="def f(): pass", score={"overall_score": 64})
+        fresh = self._stored(status="scored", code="x = 1")
+
+        report = compact_sessions()
+        assert (report.archived, report.deleted, report.skipped) == (1, 0, False)
+        assert get_session_store().get(old.id) is None
+
+        res = client.get(f"/api/sessions/{old.id}")
+        assert res.status_code == 200
+        assert res.json()["code"] == "def f(): pass"
+        items = client.get("/api/sessions").json()["items"]
+        assert [(item["id"], item["score"]) for item in items] == [(fresh.id, None), (old.id, 64)]
+        assert client.get(f"/api/sessions/{old.id}/code/history").status_code == 200
+
+    def test_archived_sessions_are_read_only(self, client):
+        from app.services.session_archive import compact_sessions
+
+        old = self._stored(days_old=45, status="scored")
+        compact_sessions()
+        assert client.put(f"/api/sessions/{old.id}", json={"code": "x"}).status_code == 404
+
+    @pytest.mark.parametrize("path", ["/api/execute/run", "/api/execute/submit", "/api/execute/submit/stream"])
+    def test_archived_sessions_cannot_be_run(self, client, path):
+        from app.services.session_archive import compact_sessions
+
+        old = self._stored(days_old=45, status="submitted", code="def twoSum(nums, target): pass")
+        compact_sessions()
+        res = client.post(path, json={"session_id": old.id})
+        assert res.status_code == 409
+        assert "archived" in res.json()["detail"]
+
+    def test_submission_finishing_after_archival_reports_an_error(self, client, monkeypatch):
+        from app.services import executor
+        from app.services.session_archive import compact_sessions
+
+        session = self._stored(days_old=45, status="submitted", code="def twoSum(nums, target): pass")
+        run_code_sharded = executor.run_code_sharded
+
+        def archive_while_running(*args, **kwargs):
+            results = run_code_sharded(*args, **kwargs)
+            compact_sessions()
+            return results
+
+        monkeypatch.setattr(executor, "run_code_sharded", archive_while_running)
+        res = client.post("/api/execute/submit", json={"session_id": session.id, "use_cache": False})
+        assert res.status_code == 409
+        assert "not saved" in res.json()["detail"]
+
+    def test_in_progress_sessions_are_archived_only_once_abandoned(self):
+        from datetime import datetime, timedelta
+
+        from app.models.session import CodeEdit
+        from app.services.session_archive import compact_sessions, get_session_archive
+        from app.services.session_store import get_session_store
+
+        store = get_session_store()
+        unfinished = self._stored(days_old=45, code="half done")
+        abandoned = self._stored(days_old=120, code="half done")
+        returned = self._stored(days_old=120, code="half done")
+        recent_edit = CodeEdit(revision=1, snapshot="still going", at=(datetime.now() - timedelta(days=3)).isoformat())
+        returned.version = 2
+        store.save(returned, [recent_edit], expected_version=1)
+
+        assert compact_sessions().archived == 1
+        assert get_session_archive().get(abandoned.id).code == "half done"
+        assert store.get(unfinished.id) and store.get(returned.id)
+
+    def test_empty_sessions_expire_after_ttl(self, sample_problem_id):
+        from app.services.problem_service import get_problem
+        from app.services.session_archive import compact_sessions
+        from app.services.session_store import get_session_store
+
+        starter = get_problem(sample_problem_id).starter_code
+        empty = self._stored(sample_problem_id, days_old=2, code=starter)
+        worked_on = self._stored(sample_problem_id, days_old=2, code=starter + "\n# wip")
+        just_opened = self._stored(sample_problem_id, code=starter)
+
+        assert compact_sessions().deleted == 1
+        store = get_session_store()
+        assert store.get(empty.id) is None
+        assert store.get(worked_on.id) and store.get(just_opened.id)
+        assert [s.id for s in store.list_summaries()] == [just_opened.id, worked_on.id]
+
+    def test_session_changed_during_compaction_stays_live(self, monkeypatch):
+        from app.models.session import SessionUpdate
+        from app.services.session_archive import SessionArchive, compact_sessions
+        from app.services.session_service import get_session, update_session
+
+        old = self._stored(days_old=45, status="submitted")
+        append = SessionArchive.append
+
+        def append_then_edit(archive, session, edits):
+            append(archive, session, edits)
+            update_session(session.id, SessionUpdate(status="scored"))  # the candidate came back
+
+        monkeypatch.setattr(SessionArchive, "append", append_then_edit)
+        assert compact_sessions().archived == 0
+        assert get_session(old.id).status == "scored"
+
+    def test_one_worker_compacts_at_a_time(self):
+        from app.services.session_archive import compact_sessions, get_session_archive
+
+        self._stored(days_old=45, status="scored")
+        with get_session_archive().exclusive() as acquired:
+            assert acquired
+            assert compact_sessions().skipped
+        assert compact_sessions().archived == 1
+
+    def test_admin_endpoint(self, client):
+        self._stored(days_old=45, status="scored")
+        res = client.post("/api/admin/sessions/compact")
+        assert res.status_code == 200
+        assert res.json()["archived"] == 1
+
+
+class TestSessionArchive:
+    def test_segments_roll_over_and_records_stay_readable(self, tmp_path, monkeypatch):
+        from app.models.session import CodeEdit, Session
+        from app.services.session_archive import SessionArchive
+
+        monkeypatch.setattr("app.services.session_archive.SEGMENT_MAX_BYTES", 200)
+        archive = SessionArchive(tmp_path)
+        sessions = [Session(problem_id="two-sum", code=f"x = {i}\n" * 50) for i in range(5)]
+        with archive.exclusive():
+            for session in sessions:
+                archive.append(session, [CodeEdit(revision=0, snapshot=session.code)])
+
+        assert len(list(tmp_path.glob("segment-*.zlib"))) > 1
+        assert sum(p.stat().st_size for p in tmp_path.glob("segment-*.zlib")) < sum(
+            len(s.model_dump_json()) for s in sessions
+        )
+        reader = SessionArchive(tmp_path)  # another worker
+        for session in sessions:
+            assert reader.get(session.id) == session
+            assert reader.get_edits(session.id)[0].snapshot == session.code
+        assert reader.get("missing") is None
+
+    def test_json_index_is_rewritten_once_mostly_superseded(self, tmp_path):
+        from app.models.session import Session
+        from app.services.session_store import JSON_INDEX_FILENAME, JsonSessionStore
+
+        store = JsonSessionStore(tmp_path)
+        keep = Session(problem_id="two-sum")
+        store.save(keep)
+        for _ in range(120):
+            session = Session(problem_id="two-sum")
+            store.save(session)
+            store.delete(session.id)
+        store.compact()
+        assert len((tmp_path / JSON_INDEX_FILENAME).read_text().splitlines()) == 1
+        assert [s.id for s in JsonSessionStore(tmp_path).list_summaries()] == [keep.id]
@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+
+class FakeRequest:
+    """Stands in for a ``Request`` whose client leaves after ``connected_for`` disconnect checks."""
+
+    def __init__(self, connected_for: int) -> None:
+        self.connected_for = connected_for
+        self.url = type("URL", (), {"path": "/api/test"})()
+
+    async def is_disconnected(self) -> bool:
+        self.connected_for -= 1
+        return self.connected_for < 0
+
+
+class TestUntilDisconnected:
+    def test_closes_the_stream_when_the_client_leaves(self):
+        from app.services.streaming import until_disconnected
+
+        closed = []
+
+        async def upstream():
+            try:
+                for i in range(10):
+                    yield f"event {i}"
+            finally:
+                closed.append(True)
+
+        async def relay():
+            return [event async for event in until_disconnected(FakeRequest(connected_for=3), upstream())]
+
+        assert asyncio.run(relay()) == ["event 0", "event 1", "event 2"]
+        assert closed == [True]
+
+    def test_relays_everything_to_a_connected_client(self):
+        from app.services.streaming import until_disconnected
+
+        async def upstream():
+            for i in range(3):
+                yield f"event {i}"
+
+        async def relay():
+            return [event async for event in until_disconnected(FakeRequest(connected_for=100), upstream())]
+
+        assert asyncio.run(relay()) == ["event 0", "event 1", "event 2"]
+
+
+class TestCodeChatStream:
+    def test_streams_the_answer(self, client, monkeypatch):
+        prompts = []
+
+        async def fake_stream(messages, **kwargs):
+            prompts.append(messages)
+            for chunk in ["A hash map ", "gives O(1) lookups."]:
+                yield chunk
+
+        monkeypatch.setattr("app.routers.code_chat.chat_completion_stream", fake_stream)
+        res = client.post(
+            "/api/code-chat/stream",
+            json={"problem_id": "two-sum", "code": "seen = {}", "message": "Why?", "selected_text": "seen = {}"},
+        )
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("text/event-stream")
+        payloads = [line[6:] for line in res.text.splitlines() if line.startswith("data: ")]
+        assert payloads[-1] == "[DONE]"
+        assert "".join(json.loads(p)["chunk"] for p in payloads[:-1]) == "A hash map gives O(1) lookups."
+        assert "seen = {}" in prompts[0][0]["content"]
+        assert prompts[0][-1] == {"role": "user", "content": "Why?"}
+
+    def test_upstream_error_is_reported(self, client, monkeypatch):
+        import httpx
+
+        async def broken_stream(messages, **kwargs):
+            raise httpx.RemoteProtocolError("gateway reset")
+            yield
+
+        monkeypatch.setattr("app.routers.code_chat.chat_completion_stream", broken_stream)
+        res = client.post("/api/code-chat/stream", json={"problem_id": "two-sum", "code": "", "message": "Why?"})
+        assert 'data: {"error": "gateway reset"}' in res.text
+        assert res.text.endswith("data: [DONE]\n\n")
@@ -35,6 +35,49 @@ async function request<T>(
   }
 }
 
+/**
+ * POST to an SSE endpoint, passing each `{ chunk }` event to `onChunk` as it arrives.
+ * Resolves with the summary event sent before `[DONE]`; rejects on an `{ error }` event.
+ */
+async function streamRequest<T>(
+  path: string,
+  body: unknown,
+  onChunk: (chunk: string) => void,
+  options?: { signal?: AbortSignal },
+): Promise<T> {
+  const res = await fetch(`${BASE}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body),
+    signal: options?.signal,
+  })
+  if (!res.ok || !res.body) {
+    const error = await res.json().catch(() => ({ detail: res.statusText }))
+    throw new Error(error.detail || res.statusText)
+  }
+
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  let summary = {} as T
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) return summary
+    buffer += decoder.decode(value, { stream: true })
+    const events = buffer.split('\n\n')
+    buffer = events.pop()!
+    for (const event of events) {
+      if (!event.startsWith('data: ')) continue
+      const payload = event.slice(6)
+      if (payload === '[DONE]') return summary
+      const data = JSON.parse(payload)
+      if (data.error) throw new Error(data.error)
+      if (typeof data.chunk === 'string') onChunk(data.chunk)
+      else summary = data
+    }
+  }
+}
+
 export function useApi() {
   if (DEMO) return useMockApi()
   return {
@@ -44,5 +87,9 @@ export function useApi() {
       request<T>(path, { method: 'POST', body: JSON.stringify(body), ...options }),
     put: <T>(path: string, body?: unknown, options?: { timeout?: number }) =>
       request<T>(path, { method: 'PUT', body: JSON.stringify(body), ...options }),
+    patch: <T>(path: string, body?: unknown, options?: { timeout?: number }) =>
+      request<T>(path, { method: 'PATCH', body: JSON.stringify(body), ...options }),
+    stream: <T>(path: string, body: unknown, onChunk: (chunk: string) => void, options?: { signal?: AbortSignal }) =>
+      streamRequest<T>(path, body, onChunk, options),
   }
 }
@@ -3,7 +3,7 @@
  * Returns data from the bundled problems JSON and uses localStorage for sessions.
  */
 import bundleData from './problems-bundle.json'
-import type { Problem, ProblemSummary, Session, ExecutionResult, EvaluationResult } from '../types'
+import type { Problem, ProblemSummary, Session, SessionSummaryPage, ExecutionResult, EvaluationResult, CodeDelta } from '../types'
 
 const problems: Problem[] = (bundleData as any).problems
 
@@ -59,9 +59,21 @@ async function mockGet<T>(path: string): Promise<T> {
     return problem as T
   }
 
-  // GET /sessions
-  if (params[0] === 'sessions' && params.length === 1) {
-    return loadSessions() as T
+  // GET /sessions — the demo keeps few sessions, so everything fits on one page
+  if (new URL(path, 'http://localhost').pathname === '/sessions') {
+    const page: SessionSummaryPage = {
+      items: loadSessions()
+        .map((s) => ({
+          id: s.id,
+          problem_id: s.problem_id,
+          status: s.status,
+          started_at: s.started_at,
+          score: s.score?.overall_score ?? null,
+        }))
+        .sort((a, b) => b.started_at.localeCompare(a.started_at)),
+      next_cursor: null,
+    }
+    return page as T
   }
 
   // GET /sessions/:id
@@ -85,7 +97,9 @@ async function mockPost<T>(path: string, body?: unknown): Promise<T> {
     const session: Session = {
       id: `demo-${Date.now()}`,
       problem_id,
+      version: 1,
       code: problem.starter_code,
+      code_revision: 0,
       started_at: new Date().toISOString(),
       submitted_at: null,
       time_remaining_seconds: problem.time_limit_minutes * 60,
@@ -142,6 +156,10 @@ async function mockPut<T>(path: string, body?: unknown): Promise<T> {
     const sessions = loadSessions()
     const idx = sessions.findIndex((s) => s.id === params[1])
     if (idx === -1) throw new Error('Session not found')
+    const { code } = body as { code?: string }
+    if (code !== undefined && code !== sessions[idx].code) {
+      sessions[idx].code_revision = (sessions[idx].code_revision ?? 0) + 1
+    }
     Object.assign(sessions[idx], body)
     saveSessions(sessions)
     return sessions[idx] as T
@@ -150,10 +168,47 @@ async function mockPut<T>(path: string, body?: unknown): Promise<T> {
   throw new Error(`Mock API: unhandled PUT ${path}`)
 }
 
+async function mockPatch<T>(path: string, body?: unknown): Promise<T> {
+  const { params } = parsePath(path)
+
+  // PATCH /sessions/:id/code
+  if (params[0] === 'sessions' && params[2] === 'code') {
+    const sessions = loadSessions()
+    const session = sessions.find((s) => s.id === params[1])
+    if (!session) throw new Error('Session not found')
+    const { base_revision, deltas, time_remaining_seconds } = body as {
+      base_revision: number
+      deltas: CodeDelta[]
+      time_remaining_seconds?: number
+    }
+    const revision = session.code_revision ?? 0
+    if (base_revision !== revision) throw new Error(`Code is at revision ${revision}`)
+    for (const d of deltas) {
+      session.code = session.code.slice(0, d.offset) + (d.insert ?? '') + session.code.slice(d.offset + (d.delete ?? 0))
+    }
+    if (deltas.length) session.code_revision = revision + 1
+    if (time_remaining_seconds !== undefined) session.time_remaining_seconds = time_remaining_seconds
+    saveSessions(sessions)
+    return { revision: session.code_revision } as T
+  }
+
+  throw new Error(`Mock API: unhandled PATCH ${path}`)
+}
+
+async function mockStream<T>(path: string, body: unknown, onChunk: (chunk: string) => void): Promise<T> {
+  // SSE variants (/interview/start/stream, ...) reply with the same canned message in one chunk
+  const { message } = await mockPost<{ message: string }>(path.replace(/\/stream$/, ''), body)
+  onChunk(message)
+  return { is_complete: false, error: null } as T
+}
+
 export function useMockApi() {
   return {
     get: <T>(path: string, _options?: { timeout?: number }) => mockGet<T>(path),
     post: <T>(path: string, body?: unknown, _options?: { timeout?: number }) => mockPost<T>(path, body),
     put: <T>(path: string, body?: unknown, _options?: { timeout?: number }) => mockPut<T>(path, body),
+    patch: <T>(path: string, body?: unknown, _options?: { timeout?: number }) => mockPatch<T>(path, body),
+    stream: <T>(path: string, body: unknown, onChunk: (chunk: string) => void, _options?: { signal?: AbortSignal }) =>
+      mockStream<T>(path, body, onChunk),
   }
 }
@@ -9,31 +9,36 @@ export const useChatStore = defineStore('chat', () => {
   const loading = ref(false)
   const isComplete = ref(false)
 
-  async function startInterview(sessionId: string) {
+  const streaming = ref(false)
+
+  // Stream the interviewer's reply into a new message; the reply is saved server-side once complete
+  async function streamReply(path: string, body: unknown) {
     loading.value = true
-    messages.value = []
-    isComplete.value = false
+    const reply: ChatMessage = { role: 'assistant', content: '' }
     try {
-      const res = await api.post<{ message: string; is_complete: boolean }>('/interview/start', { session_id: sessionId })
-      messages.value.push({ role: 'assistant', content: res.message })
+      const res = await api.stream<{ is_complete: boolean }>(path, body, (chunk) => {
+        if (!streaming.value) {
+          messages.value.push(reply)
+          streaming.value = true
+        }
+        messages.value[messages.value.length - 1].content += chunk
+      })
+      isComplete.value = res.is_complete ?? false
     } finally {
       loading.value = false
+      streaming.value = false
     }
   }
 
+  async function startInterview(sessionId: string) {
+    messages.value = []
+    isComplete.value = false
+    await streamReply('/interview/start/stream', { session_id: sessionId })
+  }
+
   async function sendMessage(sessionId: string, message: string) {
     messages.value.push({ role: 'user', content: message })
-    loading.value = true
-    try {
-      const res = await api.post<{ message: string; is_complete: boolean }>('/interview/chat', {
-        session_id: sessionId,
-        message,
-      })
-      messages.value.push({ role: 'assistant', content: res.message })
-      isComplete.value = res.is_complete
-    } finally {
-      loading.value = false
-    }
+    await streamReply('/interview/chat/stream', { session_id: sessionId, message })
   }
 
   function reset() {
@@ -41,5 +46,5 @@ export const useChatStore = defineStore('chat', () => {
     isComplete.value = false
   }
 
-  return { messages, loading, isComplete, startInterview, sendMessage, reset }
+  return { messages, loading, streaming, isComplete, startInterview, sendMessage, reset }
 })
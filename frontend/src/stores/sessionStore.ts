@@ -1,12 +1,13 @@
 import { defineStore } from 'pinia'
 import { ref } from 'vue'
 import { useApi } from '../composables/useApi'
-import type { Session, ExecutionResult } from '../types'
+import type { Session, SessionSummary, SessionSummaryPage, ExecutionResult, CodeDelta, CodePatchResult } from '../types'
 
 export const useSessionStore = defineStore('session', () => {
   const api = useApi()
   const currentSession = ref<Session | null>(null)
-  const sessions = ref<Session[]>([])
+  const sessions = ref<SessionSummary[]>([])
+  const sessionsCursor = ref<string | null>(null)
   const loading = ref(false)
   const executing = ref(false)
 
@@ -34,15 +35,62 @@ export const useSessionStore = defineStore('session', () => {
     currentSession.value = await api.put<Session>(`/sessions/${sessionId}`, data)
   }
 
+  /** The single edit turning `before` into `after`: the span between their common prefix and suffix. */
+  function diffCode(before: string, after: string): CodeDelta[] {
+    if (before === after) return []
+    let start = 0
+    while (start < before.length && start < after.length && before[start] === after[start]) start++
+    let end = 0
+    while (
+      end < before.length - start &&
+      end < after.length - start &&
+      before[before.length - 1 - end] === after[after.length - 1 - end]
+    ) end++
+    return [{ offset: start, delete: before.length - start - end, insert: after.slice(start, after.length - end) }]
+  }
+
+  // Autosave sends only what changed since the last saved revision; if the server
+  // has moved on (another tab, a failed save) it falls back to a full PUT.
+  async function saveCode(sessionId: string, code: string, timeRemaining?: number) {
+    const session = currentSession.value
+    if (!session || session.id !== sessionId) {
+      await updateSession(sessionId, { code, time_remaining_seconds: timeRemaining })
+      return
+    }
+    const deltas = diffCode(session.code, code)
+    if (!deltas.length && timeRemaining === undefined) return
+    try {
+      const { revision } = await api.patch<CodePatchResult>(`/sessions/${sessionId}/code`, {
+        base_revision: session.code_revision,
+        deltas,
+        time_remaining_seconds: timeRemaining,
+      })
+      session.code = code
+      session.code_revision = revision
+      if (timeRemaining !== undefined) session.time_remaining_seconds = timeRemaining
+    } catch {
+      await updateSession(sessionId, { code, time_remaining_seconds: timeRemaining })
+    }
+  }
+
   async function fetchSessions() {
     loading.value = true
     try {
-      sessions.value = await api.get<Session[]>('/sessions')
+      const page = await api.get<SessionSummaryPage>('/sessions')
+      sessions.value = page.items
+      sessionsCursor.value = page.next_cursor
     } finally {
       loading.value = false
     }
   }
 
+  async function fetchMoreSessions() {
+    if (!sessionsCursor.value) return
+    const page = await api.get<SessionSummaryPage>(`/sessions?cursor=${encodeURIComponent(sessionsCursor.value)}`)
+    sessions.value.push(...page.items)
+    sessionsCursor.value = page.next_cursor
+  }
+
   async function runCode(sessionId: string): Promise<ExecutionResult> {
     executing.value = true
     try {
@@ -66,5 +114,5 @@ export const useSessionStore = defineStore('session', () => {
     }
   }
 
-  return { currentSession, sessions, loading, executing, createSession, fetchSession, updateSession, fetchSessions, runCode, submitCode }
+  return { currentSession, sessions, sessionsCursor, loading, executing, createSession, fetchSession, updateSession, saveCode, fetchSessions, fetchMoreSessions, runCode, submitCode }
 })
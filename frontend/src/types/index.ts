@@ -16,6 +16,15 @@ export interface Problem {
   test_cases: TestCase[]
   time_limit_minutes: number
   tags: string[]
+  complexity?: ComplexityCheck | null
+}
+
+export interface ComplexityCheck {
+  function: string
+  generator: string
+  sizes: number[]
+  target: string
+  repeats: number
 }
 
 export interface ProblemSummary {
@@ -27,6 +36,12 @@ export interface ProblemSummary {
   time_limit_minutes: number
 }
 
+export interface ProblemSearchPage {
+  items: ProblemSummary[]
+  total: number
+  next_cursor: string | null
+}
+
 export interface SubmissionResult {
   test_index: number
   passed: boolean
@@ -34,21 +49,61 @@ export interface SubmissionResult {
   expected: string
   actual: string
   error: string | null
+  wall_time_ms?: number | null
+  cpu_time_ms?: number | null
+  peak_rss_kb?: number | null
+}
+
+export interface ComplexityReport {
+  target: string
+  estimated: string | null
+  verdict: 'pass' | 'borderline' | 'fail' | 'inconclusive'
+  timings: { n: number; seconds: number | null; error: string | null }[]
+  error: string | null
 }
 
 export interface Session {
   id: string
   problem_id: string
+  version: number
   code: string
+  code_revision: number
   started_at: string
   submitted_at: string | null
   time_remaining_seconds: number | null
   test_results: SubmissionResult[]
+  complexity?: ComplexityReport | null
   interview_messages: ChatMessage[]
+  interview_summary?: string
+  interview_summary_messages?: number
   score: EvaluationResult | null
   status: 'in_progress' | 'submitted' | 'scored'
 }
 
+export interface SessionSummary {
+  id: string
+  problem_id: string
+  status: Session['status']
+  started_at: string
+  score: number | null
+}
+
+export interface SessionSummaryPage {
+  items: SessionSummary[]
+  next_cursor: string | null
+}
+
+/** One editor change; offsets are UTF-16 code units, i.e. JS string indexes. */
+export interface CodeDelta {
+  offset: number
+  delete?: number
+  insert?: string
+}
+
+export interface CodePatchResult {
+  revision: number
+}
+
 export interface ChatMessage {
   role: 'user' | 'assistant' | 'system'
   content: string
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Compile all problems into one memory-mappable bundle the backend loads instead of the JSON tree.
+
+Every problem is validated while building, so a bundle only ever holds loadable
+problems. Files edited after the bundle was built are detected by mtime and read
+from disk, so a stale bundle is slower, never wrong. Rebuild after editing problems.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+from app.config import settings
+from app.services.problem_bundle import ProblemBundleError, write_bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=BACKEND_DIR / (settings.problem_bundle or "build/problems.bundle"),
+        help="bundle path (default: PROBLEM_BUNDLE, relative to backend/)",
+    )
+    args = parser.parse_args()
+
+    try:
+        count = write_bundle(BACKEND_DIR / settings.data_dir, args.output)
+    except ProblemBundleError as e:
+        print(e)
+        sys.exit(1)
+    print(f"Wrote {count} problems to {args.output} ({args.output.stat().st_size // 1024} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Rebuild problem_index.json with the summary fields and search terms the problem list is served from.
+
+Existing entries keep their order; problem files not yet in the index are appended
+(sorted by path) and entries whose file no longer exists are dropped. Run after
+adding or editing a problem; ``--check`` exits non-zero if the index is stale.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+DATA_DIR = BACKEND_DIR / "data" / "problems"
+INDEX_FILE = DATA_DIR / "problem_index.json"
+
+sys.path.insert(0, str(BACKEND_DIR))
+from app.services.problem_search import description_terms
+
+SUMMARY_FIELDS = {"title": "", "category": "", "difficulty": "", "tags": [], "time_limit_minutes": 30}
+
+
+def build_entry(rel_path: str) -> dict:
+    with open(DATA_DIR / rel_path) as f:
+        data = json.load(f)
+    entry = {"id": data["id"], "file": rel_path}
+    for field, default in SUMMARY_FIELDS.items():
+        entry[field] = data.get(field, default)
+    entry["terms"] = description_terms(data.get("description", ""))
+    return entry
+
+
+def build_index() -> list[dict]:
+    existing = []
+    if INDEX_FILE.exists():
+        with open(INDEX_FILE) as f:
+            existing = [e["file"] for e in json.load(f)["problems"]]
+
+    on_disk = {p.relative_to(DATA_DIR).as_posix() for p in DATA_DIR.glob("*/*.json")}
+    ordered = [f for f in existing if f in on_disk] + sorted(on_disk - set(existing))
+    return [build_entry(rel_path) for rel_path in ordered]
+
+
+def render(entries: list[dict]) -> str:
+    lines = ",\n".join(f"    {json.dumps(entry, ensure_ascii=False)}" for entry in entries)
+    return '{\n  "problems": [\n' + lines + "\n  ]\n}\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="fail if the index is out of date instead of writing it")
+    args = parser.parse_args()
+
+    entries = build_index()
+    ids = [e["id"] for e in entries]
+    duplicates = sorted({pid for pid in ids if ids.count(pid) > 1})
+    if duplicates:
+        print(f"Duplicate problem ids: {', '.join(duplicates)}")
+        sys.exit(1)
+
+    content = render(entries)
+    current = INDEX_FILE.read_text() if INDEX_FILE.exists() else ""
+    if args.check:
+        if content != current:
+            print(f"{INDEX_FILE} is out of date — run scripts/build_problem_index.py")
+            sys.exit(1)
+        print(f"Index is up to date ({len(entries)} problems)")
+        return
+
+    INDEX_FILE.write_text(content)
+    print(f"Wrote {len(entries)} problems to {INDEX_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Import JSON session files (sessions/*.json) into the SQLite session store.
+
+The backend does this by itself the first time it creates the database next to
+JSON sessions; run it to re-import, or into another database. Sessions already in
+the database are overwritten with the file's contents, so the import can be re-run
+safely. The JSON files are left in place; delete them once the backend runs with
+SESSION_STORE=sqlite.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+from app.config import settings
+from app.services.session_store import SQLITE_FILENAME, SqliteSessionStore, import_json_sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sessions-dir",
+        type=Path,
+        default=BACKEND_DIR / settings.sessions_dir,
+        help="directory holding the JSON sessions (default: SESSIONS_DIR, relative to backend/)",
+    )
+    parser.add_argument("--db", type=Path, help=f"SQLite database (default: <sessions-dir>/{SQLITE_FILENAME})")
+    parser.add_argument("--dry-run", action="store_true", help="only validate the files")
+    args = parser.parse_args()
+
+    total = len(list(args.sessions_dir.glob("*.json")))
+    store = None if args.dry_run else SqliteSessionStore(args.db or args.sessions_dir / SQLITE_FILENAME)
+    try:
+        imported, failed = import_json_sessions(args.sessions_dir, store)
+    finally:
+        if store is not None:
+            store.close()
+    verb = "Validated" if args.dry_run else "Imported"
+    print(f"{verb} {imported} of {total} sessions")
+    for failure in failed:
+        print(f"  FAILED {failure}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
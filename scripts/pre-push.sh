@@ -76,6 +76,14 @@ if [ -f scripts/validate_solutions.py ]; then
   fi
 fi
 
+if [ -f scripts/build_problem_index.py ]; then
+  if python3 scripts/build_problem_index.py --check > /dev/null 2>&1; then
+    pass "Problems — Index up to date"
+  else
+    fail "Problems — problem_index.json is stale (run scripts/build_problem_index.py)"
+  fi
+fi
+
 # ── 3. Security: secrets in diff ────────────
 DIFF=$(git diff "$MAIN"...HEAD -- . ':!*.lock' ':!node_modules' ':!.venv' ':!*.sample' 2>/dev/null || true)
 SECRETS_FOUND=""